@@ -1,3 +1,5 @@
+from app.search import SearchIndex
+
 class Student:
     def __init__(self, student_id, name): # Initialize student object
         self.id = student_id # Assign student ID
@@ -15,11 +17,14 @@ student_db = [] # Global data stores
 teacher_db = [] # Global data stores
 next_student_id = 1 # Global data stores
 next_teacher_id = 1 # Global data stores 
+student_index = SearchIndex() # Name/ID search over student_db, updated on every add
+teacher_index = SearchIndex() # Name/speciality search over teacher_db
 
 def add_student(name):
     global next_student_id
     new_student = Student(next_student_id, name) # Create new student object
     student_db.append(new_student) # Add to student database
+    student_index.add(new_student, name, record_id=new_student.id) # Make the new student searchable
     next_student_id += 1 # Increment student ID for next student
     return new_student
 
@@ -27,6 +32,7 @@ def add_teacher(name, speciality):
     global next_teacher_id
     new_teacher = Teacher(next_teacher_id, name, speciality) # Create new teacher object
     teacher_db.append(new_teacher) # Add to teacher database
+    teacher_index.add(new_teacher, name, speciality, record_id=new_teacher.id) # Make the new teacher searchable
     next_teacher_id += 1 # Increment teacher ID for next teacher
     return new_teacher
 
@@ -61,15 +67,11 @@ def enroll_student_in_instrument(student_id, instrument_name):
     student.enrolled_in.append(instrument_name)
     return True
 
-def find_student(term):
-    term_lower = term.lower()
-    results = [ student for student in student_db if term_lower in student.name.lower()]
-    return results
+def find_student(term, k=20):
+    return student_index.search(term, k) # Best matches first: ID, name prefix, part of name, near-miss spelling
 
-def find_teacher(term):
-    term_lower = term.lower()
-    results = [ teacher for teacher in teacher_db if term_lower in teacher.name.lower() or term_lower in teacher.speciality.lower()]
-    return results
+def find_teacher(term, k=20):
+    return teacher_index.search(term, k) # Same ranking, over names and specialities
 
 def front_desk_register(name, instrument):
     student = add_student(name)
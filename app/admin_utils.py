@@ -1,11 +1,64 @@
+import atexit
+import copy
 import logging
-from logging.handlers import RotatingFileHandler
-from datetime import datetime
-from pathlib import Path
-import shutil
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime, timezone
+import threading
+from typing import Optional
 
-def init_logger(log_file: str = "msms.log") -> None:
-    """Initialize application-wide logging (idempotent)."""
+from app.backups import run_backup, start_backup
+from app.serialization import dumps
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg (+ exc, + any `extra=` fields)."""
+
+    _RESERVED = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in self._RESERVED:
+                line[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            line["exc"] = self.formatException(record.exc_info)
+        return dumps(line).decode("utf-8")
+
+
+class _RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener. The stock prepare()
+    formats in the calling thread, folds the traceback into msg and drops
+    exc_info, so JsonFormatter could never fill its "exc" field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()    # capture the arguments as they are now
+        record.args = None
+        return record
+
+
+def init_logger(log_file: str = "msms.log", async_mode: bool = False, json_lines: bool = False) -> None:
+    """
+    Initialize application-wide logging (idempotent).
+
+    async_mode=True puts a QueueHandler on the root logger and moves the
+    console/file handlers onto a QueueListener thread: a log call only merges
+    the message arguments into a copy of the record and queues it, while
+    formatting and disk I/O happen on the listener. json_lines=True writes the
+    file as structured JSON lines. The queue is drained at exit (or on an
+    explicit shutdown_logger()).
+    """
+    global _listener
     root = logging.getLogger()
     if root.handlers:
         return
@@ -18,21 +71,43 @@ def init_logger(log_file: str = "msms.log") -> None:
 
     fh = RotatingFileHandler(log_file, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
     fh.setLevel(logging.INFO)
-    fh.setFormatter(fmt)
+    fh.setFormatter(JsonFormatter() if json_lines else fmt)
+
+    if async_mode:
+        q: queue.SimpleQueue = queue.SimpleQueue()
+        root.addHandler(_RecordQueueHandler(q))
+        _listener = QueueListener(q, ch, fh, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logger)
+    else:
+        root.addHandler(ch)
+        root.addHandler(fh)
+    logging.info("Logger initialized (%s).", "async" if async_mode else "sync")
 
-    root.addHandler(ch)
-    root.addHandler(fh)
-    logging.info("Logger initialized.")
+
+def shutdown_logger() -> None:
+    """Flush queued records, stop the listener thread and close every handler."""
+    global _listener
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()        # processes everything still queued before returning
+        for h in _listener.handlers:
+            h.close()
+        _listener = None
+    for h in list(root.handlers):
+        root.removeHandler(h)
+        h.close()
 
 def backup_data(data_path: str = "msms.json", backup_dir: str = "backups") -> str:
-    """Copy data file to a timestamped backup in backup_dir; returns backup path or ''."""
-    src = Path(data_path)
-    Path(backup_dir).mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    dst = Path(backup_dir) / f"{src.stem}_{ts}{src.suffix}"
-    if src.exists():
-        shutil.copy2(src, dst)
-        logging.info(f"Data backup created: {dst}")
-        return str(dst)
-    logging.warning(f"No data file to back up at {src.resolve()}")
-    return ""
+    """
+    Incremental, deduplicated snapshot of the data file (app/backups.py),
+    then hourly/daily/weekly pruning; returns the snapshot id or ''.
+    Nothing new is written when the file is unchanged since the last run.
+    Restore with `python -m app.backups restore <backup_dir> <out.json> [id]`.
+    """
+    return run_backup(data_path, backup_dir) or ""
+
+
+def backup_data_in_background(data_path: str = "msms.json", backup_dir: str = "backups") -> threading.Thread:
+    """backup_data on a daemon thread, so launch does not wait for it."""
+    return start_backup(data_path, backup_dir)
@@ -0,0 +1,97 @@
+import bisect
+from typing import Any, Dict, List, Optional, Set
+
+Row = Dict[str, Any]
+
+STATUSES = ("present", "late", "absent")
+
+
+def attended(row: Row) -> bool:
+    """Rows written before statuses existed count as present."""
+    return row.get("status", "present") != "absent"
+
+
+def _insert_by_time(rows: List[Row], row: Row) -> None:
+    if not rows or rows[-1]["timestamp"] <= row["timestamp"]:
+        rows.append(row)    # check-ins normally arrive in time order
+    else:
+        bisect.insort(rows, row, key=lambda r: r["timestamp"])
+
+
+def _slice_by_time(rows: List[Row], lo: Optional[str], hi: Optional[str]) -> List[Row]:
+    i = 0 if lo is None else bisect.bisect_left(rows, lo, key=lambda r: r["timestamp"])
+    j = len(rows) if hi is None else bisect.bisect_left(rows, hi, key=lambda r: r["timestamp"])
+    return rows[i:j]
+
+
+class AttendanceIndex:
+    """
+    Secondary index over the attendance log: rows bucketed by day ("YYYY-MM-DD")
+    and listed per course and per student, each in timestamp order, plus running
+    per-course aggregates. The log itself stays the manager's plain list.
+    """
+
+    def __init__(self):
+        self._days: Dict[str, List[Row]] = {}
+        self._day_keys: List[str] = []      # sorted bucket keys
+        self._by_course: Dict[int, List[Row]] = {}
+        self._by_student: Dict[int, List[Row]] = {}
+        self._course_checkins: Dict[int, int] = {}
+        self._course_absences: Dict[int, int] = {}
+        self._course_sessions: Dict[int, Set[str]] = {}
+        self._course_students: Dict[int, Set[int]] = {}
+
+    def add(self, row: Row) -> None:
+        day = row["timestamp"][:10]
+        bucket = self._days.get(day)
+        if bucket is None:
+            bucket = self._days[day] = []
+            bisect.insort(self._day_keys, day)
+        _insert_by_time(bucket, row)
+        cid, sid = row.get("course_id"), row.get("student_id")
+        _insert_by_time(self._by_course.setdefault(cid, []), row)
+        _insert_by_time(self._by_student.setdefault(sid, []), row)
+        self._course_sessions.setdefault(cid, set()).add(day)
+        if attended(row):
+            self._course_checkins[cid] = self._course_checkins.get(cid, 0) + 1
+            self._course_students.setdefault(cid, set()).add(sid)
+        else:
+            self._course_checkins.setdefault(cid, 0)
+            self._course_absences[cid] = self._course_absences.get(cid, 0) + 1
+
+    def between(self, lo: Optional[str], hi: Optional[str], course_id: Optional[int] = None,
+                student_id: Optional[int] = None) -> List[Row]:
+        """Rows with lo <= timestamp < hi (None = unbounded), oldest first."""
+        if course_id is not None or student_id is not None:
+            # walk the shorter of the per-course / per-student lists
+            candidates = [lst for lst in (
+                self._by_course.get(course_id, []) if course_id is not None else None,
+                self._by_student.get(student_id, []) if student_id is not None else None,
+            ) if lst is not None]
+            rows = _slice_by_time(min(candidates, key=len), lo, hi)
+            return [r for r in rows
+                    if (course_id is None or r.get("course_id") == course_id)
+                    and (student_id is None or r.get("student_id") == student_id)]
+        first = 0 if lo is None else bisect.bisect_left(self._day_keys, lo[:10])
+        out: List[Row] = []
+        for day in self._day_keys[first:]:
+            if hi is not None and day > hi[:10]:
+                break
+            out.extend(_slice_by_time(self._days[day], lo, hi))
+        return out
+
+    def course_stats(self, course_id: int) -> Dict[str, Any]:
+        """
+        Aggregates for one course. rate = check-ins / (sessions x distinct attendees),
+        i.e. how full an average session is relative to the students who ever attend.
+        Rows marked absent count as absences, not check-ins.
+        """
+        checkins = self._course_checkins.get(course_id, 0)
+        sessions = len(self._course_sessions.get(course_id, ()))
+        students = len(self._course_students.get(course_id, ()))
+        rate = checkins / (sessions * students) if sessions and students else 0.0
+        return {"course_id": course_id, "checkins": checkins, "absences": self._course_absences.get(course_id, 0),
+                "sessions": sessions, "students": students, "rate": round(rate, 4)}
+
+    def course_ids(self) -> List[Any]:
+        return list(self._course_checkins)
@@ -0,0 +1,219 @@
+"""
+Content-addressed, deduplicated backups of a data file.
+
+    backups/
+        chunks/3f/3fa1...    zlib-compressed chunk, named by the sha256 of its raw bytes
+        snapshots/20250301_101500_000000.json
+                             {"created", "source", "size", "sha256", "stamp", "chunks": [...]}
+
+A snapshot splits the file into chunks at content-defined boundaries (the
+end of a JSON record or a line, at least MIN_CHUNK apart), so an edit only
+changes the chunks around it. Only chunks the store has not seen are
+written. If the file's (mtime, size) or its hash matches the latest
+snapshot, nothing is written at all. prune() keeps the last few snapshots
+and the newest per hour/day/week bucket, and deletes chunks that no
+snapshot references. Snapshots and prunes hold a file lock on the store
+("store.lock"), so a prune in one process never deletes chunks that another
+process's backup has written but not yet listed in its manifest.
+"""
+import hashlib
+import logging
+import re
+import threading
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from app.locking import FileLock
+from app.persistence import PathLike, atomic_write_bytes, file_stamp
+from app.serialization import dumps, loads
+
+MIN_CHUNK = 64 * 1024
+MAX_CHUNK = 1024 * 1024
+# a record or line ends here; cutting just after it keeps boundaries stable under edits
+_BOUNDARY = re.compile(rb"\}[,\]]|\n")
+_STAMP_FORMAT = "%Y%m%d_%H%M%S_%f"
+
+
+def iter_chunks(data: bytes, min_size: int = MIN_CHUNK, max_size: int = MAX_CHUNK) -> Iterator[bytes]:
+    """Split data at the first boundary past min_size, or at max_size if there is none."""
+    start, n = 0, len(data)
+    while start < n:
+        if n - start <= min_size:
+            yield data[start:]
+            return
+        m = _BOUNDARY.search(data, start + min_size, min(n, start + max_size))
+        end = m.end() if m else min(n, start + max_size)
+        yield data[start:end]
+        start = end
+
+
+class BackupStore:
+    """A directory of deduplicated snapshots; see the module docstring for the layout."""
+
+    def __init__(self, root: PathLike = "backups"):
+        self.root = Path(root)
+        self.chunk_dir = self.root / "chunks"
+        self.snapshot_dir = self.root / "snapshots"
+        self._lock = threading.Lock()
+        self._store_lock = self.root / "store"      # FileLock -> store.lock, shared by every process
+
+    # ---------- chunks ----------
+    def _chunk_path(self, digest: str) -> Path:
+        return self.chunk_dir / digest[:2] / digest
+
+    def _put_chunk(self, chunk: bytes) -> str:
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self._chunk_path(digest)
+        if not path.exists():
+            atomic_write_bytes(path, zlib.compress(chunk, 6), keep_previous=False)
+        return digest
+
+    def _get_chunk(self, digest: str) -> bytes:
+        chunk = zlib.decompress(self._chunk_path(digest).read_bytes())
+        if hashlib.sha256(chunk).hexdigest() != digest:
+            raise ValueError(f"Backup chunk {digest} is corrupt.")
+        return chunk
+
+    # ---------- snapshots ----------
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """Every snapshot manifest, oldest first (each with its "id")."""
+        out = []
+        for p in sorted(self.snapshot_dir.glob("*.json")):
+            manifest = loads(p.read_bytes())
+            manifest["id"] = p.stem
+            out.append(manifest)
+        return out
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        names = sorted(self.snapshot_dir.glob("*.json"))
+        if not names:
+            return None
+        manifest = loads(names[-1].read_bytes())
+        manifest["id"] = names[-1].stem
+        return manifest
+
+    def snapshot(self, source: PathLike, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        Back up `source`; returns the snapshot id, the latest id if the file is
+        unchanged since then, or None if the file does not exist.
+        """
+        with self._lock, FileLock(self._store_lock):
+            stamp = file_stamp(source)
+            if stamp is None:
+                return None
+            last = self.latest()
+            if last and tuple(last.get("stamp") or ()) == stamp:
+                return last["id"]
+            data = Path(source).read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if last and last["sha256"] == digest:
+                return last["id"]
+            chunks = [self._put_chunk(c) for c in iter_chunks(data)]
+            created = now or datetime.now()
+            snap_id = created.strftime(_STAMP_FORMAT)
+            manifest = {"created": created.isoformat(timespec="seconds"), "source": str(source),
+                        "size": len(data), "sha256": digest, "stamp": list(stamp), "chunks": chunks}
+            atomic_write_bytes(self.snapshot_dir / f"{snap_id}.json", dumps(manifest), keep_previous=False)
+            return snap_id
+
+    def find(self, at: Union[str, datetime, None] = None) -> Dict[str, Any]:
+        """The snapshot with that id, or the latest taken at or before a datetime (latest if None)."""
+        snaps = self.snapshots()
+        if isinstance(at, str):
+            for s in snaps:
+                if s["id"] == at:
+                    return s
+            raise ValueError(f"No backup snapshot {at!r}.")
+        if at is not None:
+            snaps = [s for s in snaps if datetime.strptime(s["id"], _STAMP_FORMAT) <= at]
+        if not snaps:
+            raise ValueError("No backup snapshot at or before that time.")
+        return snaps[-1]
+
+    def read(self, at: Union[str, datetime, None] = None) -> bytes:
+        manifest = self.find(at)
+        data = b"".join(self._get_chunk(d) for d in manifest["chunks"])
+        if hashlib.sha256(data).hexdigest() != manifest["sha256"]:
+            raise ValueError(f"Backup snapshot {manifest['id']} does not reassemble cleanly.")
+        return data
+
+    def restore(self, out_path: PathLike, at: Union[str, datetime, None] = None) -> str:
+        """Write the chosen snapshot to out_path (the current file is kept as its .prev); returns its id."""
+        manifest = self.find(at)
+        atomic_write_bytes(out_path, self.read(manifest["id"]))
+        return manifest["id"]
+
+    # ---------- retention ----------
+    def prune(self, last: int = 10, hourly: int = 24, daily: int = 7, weekly: int = 4,
+              now: Optional[datetime] = None) -> List[str]:
+        """
+        Keep the `last` newest snapshots, plus the newest one in each of the
+        last `hourly` hours, `daily` days and `weekly` ISO weeks; delete the
+        rest and any chunk no remaining snapshot uses. Returns the deleted ids.
+        """
+        now = now or datetime.now()
+        with self._lock, FileLock(self._store_lock):
+            snaps = self.snapshots()
+            keep = {s["id"] for s in snaps[-max(1, last):]}
+            policies = (
+                (hourly, timedelta(hours=hourly), lambda t: t.strftime("%Y%m%d%H")),
+                (daily, timedelta(days=daily), lambda t: t.date()),
+                (weekly, timedelta(weeks=weekly), lambda t: t.isocalendar()[:2]),
+            )
+            for count, window, bucket in policies:
+                newest: Dict[Any, str] = {}
+                for s in snaps:
+                    taken = datetime.strptime(s["id"], _STAMP_FORMAT)
+                    if count and now - taken < window:
+                        newest[bucket(taken)] = s["id"]      # snaps are oldest first
+                keep.update(newest.values())
+
+            dropped = [s["id"] for s in snaps if s["id"] not in keep]
+            for snap_id in dropped:
+                (self.snapshot_dir / f"{snap_id}.json").unlink()
+            if dropped:
+                used = {d for s in snaps if s["id"] in keep for d in s["chunks"]}
+                for path in self.chunk_dir.glob("*/*"):
+                    if path.name not in used:
+                        path.unlink()
+            return dropped
+
+
+def run_backup(data_path: PathLike, backup_dir: PathLike, **retention: int) -> Optional[str]:
+    """Snapshot then prune; errors are logged, not raised (backups must not stop the app)."""
+    store = BackupStore(backup_dir)
+    try:
+        snap_id = store.snapshot(data_path)
+        if snap_id is None:
+            logging.warning("No data file to back up at %s", Path(data_path).resolve())
+            return None
+        dropped = store.prune(**retention)
+        logging.info("Backup snapshot %s of %s (%d expired)", snap_id, data_path, len(dropped))
+        return snap_id
+    except (OSError, ValueError):
+        logging.exception("Backup of %s failed", data_path)
+        return None
+
+
+def start_backup(data_path: PathLike, backup_dir: PathLike, **retention: int) -> threading.Thread:
+    """run_backup on a daemon thread so startup does not wait for it."""
+    t = threading.Thread(target=run_backup, args=(data_path, backup_dir), kwargs=retention,
+                         name="msms-backup", daemon=True)
+    t.start()
+    return t
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3 or sys.argv[1] not in ("list", "restore"):
+        print("usage: python -m app.backups list <backup_dir>\n"
+              "       python -m app.backups restore <backup_dir> <out.json> [snapshot-id]")
+        sys.exit(2)
+    store = BackupStore(sys.argv[2])
+    if sys.argv[1] == "list":
+        for s in store.snapshots():
+            print(f"{s['id']}  {s['size']:>12,} B  {len(s['chunks']):>5} chunks  {s['source']}")
+    else:
+        print("Restored", store.restore(sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None))
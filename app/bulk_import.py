@@ -0,0 +1,57 @@
+import csv
+import json
+from pathlib import Path
+from typing import Any, Container, Dict, Iterable, List, Optional, Union
+
+from app.ids import IdAllocator
+
+# A source is a path to a .csv / .jsonl file, or any iterable of row dicts.
+RowSource = Union[str, Path, Iterable[Dict[str, Any]]]
+
+
+def read_rows(source: Optional[RowSource]) -> List[Dict[str, Any]]:
+    """Materialize a bulk-import source into a list of row dicts."""
+    if source is None:
+        return []
+    if isinstance(source, (str, Path)):
+        p = Path(source)
+        with p.open("r", encoding="utf-8", newline="") as f:
+            if p.suffix.lower() == ".csv":
+                return [dict(r) for r in csv.DictReader(f)]
+            return [json.loads(line) for line in f if line.strip()]
+    return [dict(r) for r in source]
+
+
+def as_int(row: Dict[str, Any], key: str, what: str, lineno: int) -> int:
+    value = row.get(key)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{what} row {lineno}: '{key}' must be an integer, got {value!r}.") from None
+
+
+def assign_ids(rows: List[Dict[str, Any]], kind: str, existing: Container[int],
+               ids: IdAllocator) -> List[int]:
+    """
+    Give every row an id: explicit ids are validated against `existing` and the
+    batch itself and claimed through `ids` (which refuses ids another process may
+    hold, see SharedIdAllocator.claim); the rest come from one reserved block.
+    Returns ids in row order.
+    Counters move here; run it inside IdAllocator.batch() so a later failure puts them back.
+    """
+    out: List[Optional[int]] = []
+    seen = set()
+    missing = 0
+    for n, r in enumerate(rows, 1):
+        if r.get("id") in (None, ""):
+            out.append(None)
+            missing += 1
+            continue
+        rid = as_int(r, "id", kind, n)
+        if rid in existing or rid in seen:
+            raise ValueError(f"{kind} row {n}: id {rid} already exists.")
+        seen.add(rid)
+        out.append(rid)
+    ids.claim(kind, seen)
+    block = iter(ids.reserve(kind, missing))
+    return [rid if rid is not None else next(block) for rid in out]
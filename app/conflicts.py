@@ -0,0 +1,113 @@
+import bisect
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_LESSON_MINUTES = 60
+
+# one booked lesson: (start, end, course id, lesson start as written)
+Booking = Tuple[int, int, int, str]
+
+
+def to_minutes(t: Any) -> Optional[int]:
+    """"16:30" -> 990; None for anything that is not H:MM."""
+    try:
+        h, m = str(t).split(":")[:2]
+        h, m = int(h), int(m)
+    except (ValueError, AttributeError):
+        return None
+    if not (0 <= h < 24 and 0 <= m < 60):
+        return None
+    return h * 60 + m
+
+
+def lesson_span(lesson: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """[start, end) in minutes; uses end_time or duration when given, else one hour."""
+    start = to_minutes(lesson.get("start_time") or lesson.get("time"))
+    if start is None:
+        return None
+    end = to_minutes(lesson.get("end_time")) if lesson.get("end_time") else None
+    if end is None or end <= start:
+        end = start + int(lesson.get("duration") or DEFAULT_LESSON_MINUTES)
+    return start, end
+
+
+class ConflictIndex:
+    """
+    Room and teacher bookings, one sorted list per (day, room) and per
+    (day, teacher). A lesson starting at s can only overlap bookings that
+    start in [s - longest, e), so a check is two bisects plus the handful of
+    bookings in that window. audit() sweeps every list once.
+    """
+
+    def __init__(self):
+        self._lists: Dict[Tuple[str, str, Any], List[Booking]] = {}
+        self._longest: Dict[Tuple[str, str, Any], int] = {}
+        self._course_keys: Dict[int, List[Tuple[Tuple[str, str, Any], Booking]]] = {}
+
+    @staticmethod
+    def _keys(day: str, room: Any, teacher_id: Any) -> List[Tuple[str, str, Any]]:
+        keys = [("teacher", day, teacher_id)] if teacher_id is not None else []
+        if room:
+            keys.append(("room", day, room))
+        return keys
+
+    def index_course(self, course_id: int, teacher_id: Any, lessons: Iterable[Dict[str, Any]]) -> None:
+        """(Re)book all lessons of one course; lessons without a valid time are ignored."""
+        self.drop_course(course_id)
+        entries = []
+        for ls in lessons:
+            span = lesson_span(ls)
+            if span is None:
+                continue
+            b: Booking = (span[0], span[1], course_id, str(ls.get("start_time") or ls.get("time")))
+            for key in self._keys(ls.get("day"), ls.get("room"), teacher_id):
+                bisect.insort(self._lists.setdefault(key, []), b)
+                self._longest[key] = max(self._longest.get(key, 0), b[1] - b[0])
+                entries.append((key, b))
+        self._course_keys[course_id] = entries
+
+    def drop_course(self, course_id: int) -> None:
+        for key, b in self._course_keys.pop(course_id, ()):
+            bookings = self._lists[key]
+            del bookings[bisect.bisect_left(bookings, b)]
+            # _longest may now be stale (too large); that only widens the window
+
+    def check(self, day: str, lesson: Dict[str, Any], room: Any = None, teacher_id: Any = None,
+              ignore_course: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Conflicts a new lesson would cause; empty list means it can be booked."""
+        span = lesson_span(lesson)
+        if span is None:
+            return []
+        start, end = span
+        found = []
+        for key in self._keys(day, room, teacher_id):
+            bookings = self._lists.get(key, ())
+            lo = bisect.bisect_left(bookings, (start - self._longest.get(key, 0),))
+            hi = bisect.bisect_left(bookings, (end,))
+            for b in bookings[lo:hi]:
+                if b[1] > start and b[2] != ignore_course:
+                    found.append(self._report(key, b, None, lesson))
+        return found
+
+    def audit(self) -> List[Dict[str, Any]]:
+        """Every overlapping pair in the school, one sweep per list."""
+        found = []
+        for key, bookings in self._lists.items():
+            active: List[Booking] = []
+            for b in bookings:
+                active = [a for a in active if a[1] > b[0]]
+                found.extend(self._report(key, a, b) for a in active)
+                active.append(b)
+        return found
+
+    @staticmethod
+    def _report(key, a: Booking, b: Optional[Booking], lesson: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        kind, day, resource = key
+        return {
+            "kind": kind,
+            "day": day,
+            "resource": resource,
+            "course_id": a[2],
+            "start_time": a[3],
+            "other_course_id": b[2] if b else None,
+            "other_start_time": b[3] if b else str(lesson.get("start_time") or lesson.get("time")),
+        }
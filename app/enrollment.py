@@ -0,0 +1,62 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class Enrollments:
+    """
+    The student <-> course relation, indexed both ways with sets so
+    membership tests, enroll/unenroll and cascades are O(1) per link.
+    Managers keep the per-record id lists (what msms.json stores) in step
+    with it; this is the copy they answer questions from.
+    """
+
+    def __init__(self, links: Iterable[Tuple[int, int]] = ()):
+        self._by_student: Dict[int, Set[int]] = {}
+        self._by_course: Dict[int, Set[int]] = {}
+        for sid, cid in links:
+            self.add(sid, cid)
+
+    def __len__(self) -> int:
+        return sum(len(c) for c in self._by_student.values())
+
+    def has(self, student_id: int, course_id: int) -> bool:
+        return course_id in self._by_student.get(student_id, ())
+
+    def add(self, student_id: int, course_id: int) -> bool:
+        """Link a student to a course; False if they were already linked."""
+        courses = self._by_student.setdefault(student_id, set())
+        if course_id in courses:
+            return False
+        courses.add(course_id)
+        self._by_course.setdefault(course_id, set()).add(student_id)
+        return True
+
+    def remove(self, student_id: int, course_id: int) -> bool:
+        courses = self._by_student.get(student_id)
+        if not courses or course_id not in courses:
+            return False
+        courses.discard(course_id)
+        self._by_course[course_id].discard(student_id)
+        return True
+
+    def courses_of(self, student_id: int) -> List[int]:
+        return sorted(self._by_student.get(student_id, ()))
+
+    def students_of(self, course_id: int) -> List[int]:
+        return sorted(self._by_course.get(course_id, ()))
+
+    def count_students(self, course_id: int) -> int:
+        return len(self._by_course.get(course_id, ()))
+
+    def drop_student(self, student_id: int) -> List[int]:
+        """Remove every link of a student; returns the courses that lost them."""
+        courses = self._by_student.pop(student_id, set())
+        for cid in courses:
+            self._by_course[cid].discard(student_id)
+        return sorted(courses)
+
+    def drop_course(self, course_id: int) -> List[int]:
+        """Remove every link of a course; returns the students that lost it."""
+        students = self._by_course.pop(course_id, set())
+        for sid in students:
+            self._by_student[sid].discard(course_id)
+        return sorted(students)
@@ -0,0 +1,153 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from app.locking import FileLock
+from app.persistence import PathLike
+from app.serialization import dumps, loads
+
+
+class IdAllocator:
+    """
+    Monotonic per-entity id counters, persisted as next_<kind>_id fields
+    (the same layout pst2_main.py and the PST3 JSON already use).
+    Ids are never handed out twice, even after the newest record is deleted.
+    """
+
+    KINDS = ("student", "teacher", "course", "lesson")
+
+    def __init__(self):
+        self._next: Dict[str, int] = {k: 1 for k in self.KINDS}
+
+    def load(self, data: Dict[str, Any], existing: Dict[str, Iterable[int]]) -> None:
+        """Restore counters from a document; never below max(existing id) + 1."""
+        for kind in self.KINDS:
+            stored = int(data.get(f"next_{kind}_id", 1) or 1)
+            seen = max(existing.get(kind, ()), default=0) + 1
+            self._next[kind] = max(stored, seen)
+
+    def allocate(self, kind: str) -> int:
+        new_id = self._next[kind]
+        self._next[kind] = new_id + 1
+        return new_id
+
+    def reserve(self, kind: str, count: int) -> range:
+        """Reserve a contiguous block of ids for a batch insert."""
+        if count < 0:
+            raise ValueError("count must be non-negative.")
+        start = self._next[kind]
+        self._next[kind] = start + count
+        return range(start, start + count)
+
+    def claim(self, kind: str, explicit: Iterable[int]) -> None:
+        """Take ids chosen by the caller (bulk import rows); later allocations skip past them."""
+        for used_id in explicit:
+            self.observe(kind, used_id)
+
+    def observe(self, kind: str, used_id: int) -> None:
+        """Account for an id assigned elsewhere (journal replay, explicit ids)."""
+        if used_id >= self._next[kind]:
+            self._next[kind] = used_id + 1
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Counters moved inside the block are put back if it raises (e.g. a bulk import failing validation)."""
+        saved = dict(self._next)
+        try:
+            yield
+        except BaseException:
+            self._next = saved
+            raise
+
+    def peek(self, kind: str) -> int:
+        return self._next[kind]
+
+    def to_dict(self) -> Dict[str, int]:
+        return {f"next_{kind}_id": n for kind, n in self._next.items()}
+
+
+class SharedIdAllocator(IdAllocator):
+    """
+    IdAllocator for a data file that several processes save. Every id is
+    reserved in a small "<data file>.ids" counter file, under a file lock,
+    before it is handed out, so no two processes give out the same id and an
+    id never has to change once a caller has seen it. The counter file is
+    updated in place (no fsync): ids are cheap, and a lost update only costs
+    ids whose records were never saved either.
+    """
+
+    def __init__(self, data_path: PathLike):
+        super().__init__()
+        self.path = Path(f"{data_path}.ids")
+        self._batch_starts: Optional[Dict[str, int]] = None     # kind -> first id reserved in the open batch()
+
+    def reserve(self, kind: str, count: int) -> range:
+        if count < 0:
+            raise ValueError("count must be non-negative.")
+        key = f"next_{kind}_id"
+        with FileLock(self.path), open(self.path, "a+b") as f:
+            stored = self._read(f)
+            start = max(int(stored.get(key, 1)), self._next[kind])
+            stored[key] = start + count
+            self._write(f, stored)
+        if self._batch_starts is not None:
+            self._batch_starts.setdefault(kind, start)
+        self._next[kind] = start + count
+        return range(start, start + count)
+
+    def allocate(self, kind: str) -> int:
+        return self.reserve(kind, 1).start
+
+    def claim(self, kind: str, explicit: Iterable[int]) -> None:
+        """
+        Record explicit ids in the counter file too, so no other process can
+        reserve them before we save. An id below the shared counter may already
+        belong to another process's unsaved record, so it is refused (ValueError).
+        """
+        explicit = sorted(explicit)
+        if not explicit:
+            return
+        key = f"next_{kind}_id"
+        with FileLock(self.path), open(self.path, "a+b") as f:
+            stored = self._read(f)
+            floor = max(int(stored.get(key, 1)), self._next[kind])
+            if explicit[0] < floor:
+                raise ValueError(f"{kind} id {explicit[0]} is already reserved (new ids start at {floor}).")
+            stored[key] = explicit[-1] + 1
+            self._write(f, stored)
+        if self._batch_starts is not None:
+            self._batch_starts.setdefault(kind, floor)
+        self._next[kind] = explicit[-1] + 1
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """As IdAllocator.batch(); reservations are handed back too unless another process reserved after us."""
+        saved, self._batch_starts = dict(self._next), {}
+        try:
+            yield
+        except BaseException:
+            with FileLock(self.path), open(self.path, "a+b") as f:
+                stored = self._read(f)
+                for kind, start in self._batch_starts.items():
+                    if stored.get(f"next_{kind}_id") == self._next[kind]:
+                        stored[f"next_{kind}_id"] = start
+                self._write(f, stored)
+            self._next = saved
+            raise
+        finally:
+            self._batch_starts = None
+
+    @staticmethod
+    def _read(f: Any) -> Dict[str, int]:
+        f.seek(0)
+        raw = f.read()
+        try:
+            return loads(raw) if raw.strip() else {}
+        except ValueError:      # torn by a crash; the data file's counters still hold
+            return {}
+
+    @staticmethod
+    def _write(f: Any, stored: Dict[str, int]) -> None:
+        f.seek(0)
+        f.truncate()
+        f.write(dumps(stored))      # "a+" appends, and the file is empty now
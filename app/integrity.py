@@ -0,0 +1,107 @@
+import logging
+from typing import Any, Dict, List
+
+from app.locking import FileLock
+from app.persistence import PathLike, atomic_write_json, load_json
+
+
+def _ids(records: List[Dict[str, Any]], what: str, problems: List[str]) -> set:
+    seen = set()
+    for r in records:
+        if r.get("id") in seen:
+            problems.append(f"{what} id {r.get('id')} is used more than once")
+        seen.add(r.get("id"))
+    return seen
+
+
+def _clean(owner: str, ids: Any, valid: set, what: str, problems: List[str]) -> Dict[int, None]:
+    """Valid ids in their original order, without repeats (a dict used as an ordered set)."""
+    keep: Dict[int, None] = {}
+    for i in ids or []:
+        if i not in valid:
+            problems.append(f"{owner} lists unknown {what} {i}")
+        elif i in keep:
+            problems.append(f"{owner} lists {what} {i} twice")
+        else:
+            keep[i] = None
+    return keep
+
+
+def audit_document(doc: Dict[str, Any], fix: bool = False) -> List[str]:
+    """
+    One O(n) pass over an msms.json document. Returns a line per problem.
+
+    Enrollments are checked in both directions: unknown ids and repeats are
+    dropped, and a link present on only one side is added to the other.
+    (Course-side lists are only kept when the file has them, as PST4 does.)
+    With fix=True those repairs are written into `doc`. Dangling teacher
+    ids and attendance/payment rows for unknown records are reported only.
+    """
+    students, courses = doc.get("students", []), doc.get("courses", [])
+    problems: List[str] = []
+    sids = _ids(students, "student", problems)
+    cids = _ids(courses, "course", problems)
+    tids = {t.get("id") for t in doc.get("teachers", [])}
+
+    s_side = {s["id"]: _clean(f"student {s['id']}", s.get("enrolled_course_ids"), cids, "course", problems)
+              for s in students}
+    two_sided = any("enrolled_student_ids" in c for c in courses)
+    c_side = {c["id"]: _clean(f"course {c['id']}", c.get("enrolled_student_ids"), sids, "student", problems)
+              for c in courses} if two_sided else {}
+    for c in courses:
+        if c.get("teacher_id") not in tids:
+            problems.append(f"course {c['id']} has unknown teacher {c.get('teacher_id')}")
+
+    if two_sided:
+        for sid, linked in s_side.items():
+            for cid in linked:
+                if sid not in c_side[cid]:
+                    problems.append(f"course {cid} is missing student {sid}")
+                    c_side[cid][sid] = None
+        for cid, linked in c_side.items():
+            for sid in linked:
+                if cid not in s_side[sid]:
+                    problems.append(f"student {sid} is missing course {cid}")
+                    s_side[sid][cid] = None
+
+    for table in ("attendance", "finance_log"):
+        orphans = sum(1 for r in doc.get(table, []) if r.get("student_id") not in sids)
+        if orphans:
+            problems.append(f"{orphans} {table} row(s) refer to unknown students")
+
+    if fix:
+        for s in students:
+            s["enrolled_course_ids"] = list(s_side[s["id"]])
+        for c in courses if two_sided else ():
+            c["enrolled_student_ids"] = list(c_side[c["id"]])
+    return problems
+
+
+def repair_file(path: PathLike, dry_run: bool = False) -> List[str]:
+    """
+    Audit a JSON data file and, unless dry_run, rewrite it repaired (previous
+    generation kept). The rewrite holds the managers' file lock and bumps the
+    "version", so a running manager merges the repair instead of saving over it.
+    """
+    with FileLock(path):
+        doc = load_json(path)
+        if doc is None:
+            raise FileNotFoundError(path)
+        problems = audit_document(doc, fix=not dry_run)
+        if problems and not dry_run:
+            # "version" goes first so stored_version() finds it in the file's first bytes
+            doc = {"version": int(doc.pop("version", 0) or 0) + 1, **doc}
+            atomic_write_json(path, doc)
+            logging.warning("Repaired %s: %d problem(s)", path, len(problems))
+    return problems
+
+
+if __name__ == "__main__":
+    import sys
+    args = [a for a in sys.argv[1:] if a != "--fix"]
+    if len(args) != 1:
+        print("usage: python -m app.integrity <msms.json> [--fix]")
+        sys.exit(2)
+    found = repair_file(args[0], dry_run="--fix" not in sys.argv)
+    print("\n".join(found) or "No problems found.")
+    sys.exit(1 if found and "--fix" not in sys.argv else 0)
@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Journal:
+    """
+    Append-only write-ahead log stored next to a JSON snapshot.
+    Each mutation is one compact JSON line: {"seq": n, "op": "...", "row": {...}}.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = Path(path)
+        self.fsync = fsync
+        self.seq = 0          # last sequence number written or replayed
+        self.pending = 0      # records appended since the last compaction
+        self._fh = None
+
+    def append(self, op: str, row: Dict[str, Any]) -> int:
+        return self.append_many(op, [row])
+
+    def append_many(self, op: str, rows: List[Dict[str, Any]]) -> int:
+        """Append one record per row with a single write (and fsync); returns the last seq."""
+        if self._fh is None:
+            self._fh = self.path.open("a", encoding="utf-8")
+        lines = []
+        for row in rows:
+            self.seq += 1
+            lines.append(json.dumps({"seq": self.seq, "op": op, "row": row}, separators=(",", ":")) + "\n")
+        self._fh.write("".join(lines))
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+        self.pending += len(rows)
+        return self.seq
+
+    def replay(self, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Yield records with seq > after_seq. A torn trailing line (a crash
+        mid-write) ends the replay and is cut off the file, so later appends
+        start on a clean line.
+        """
+        self.seq = after_seq
+        self.pending = 0
+        if not self.path.exists():
+            return
+        good = 0        # byte offset just past the last intact line
+        torn = None
+        with self.path.open("rb") as f:
+            for lineno, line in enumerate(f, 1):
+                if not line.strip():
+                    good += len(line)
+                    continue
+                try:
+                    rec = json.loads(line) if line.endswith(b"\n") else None
+                except json.JSONDecodeError:
+                    rec = None
+                if rec is None:
+                    torn = lineno
+                    break
+                good += len(line)
+                if rec.get("seq", 0) <= after_seq:
+                    continue
+                self.seq = rec["seq"]
+                self.pending += 1
+                yield rec
+        if torn is not None:
+            logging.warning("Journal %s: dropping torn record at line %d", self.path, torn)
+            with self.path.open("r+b") as f:
+                f.truncate(good)
+
+    def truncate(self) -> None:
+        """Drop all records; call only after the snapshot holding them is on disk."""
+        self.close()
+        self.path.open("w", encoding="utf-8").close()
+        self.pending = 0
+
+    def close(self) -> None:
+        fh: Optional[Any] = self._fh
+        self._fh = None
+        if fh is not None:
+            fh.close()
@@ -0,0 +1,90 @@
+"""
+Advisory inter-process lock for a data file.
+
+    with FileLock("msms.json"):
+        ...   # read-compare-write the file; other processes using FileLock wait
+
+The lock lives on a sidecar "<path>.lock" file (the data file itself is
+replaced by rename on every save, so it cannot carry the lock). fcntl.flock
+is used on POSIX and msvcrt.locking on Windows. The lock is per process and
+not re-entrant; threads inside one process are expected to serialize on
+their own lock first.
+
+With timeout=None the wait is a blocking flock, which the kernel hands over
+as soon as the holder lets go; with a timeout the lock is polled, and a
+process that saves back to back can keep winning the race for it.
+"""
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.persistence import PathLike
+
+try:
+    import fcntl
+    HAVE_FCNTL = True
+except ImportError:  # Windows
+    import msvcrt
+    HAVE_FCNTL = False
+
+
+def lock_path(path: PathLike) -> Path:
+    p = Path(path)
+    return p.with_name(p.name + ".lock")
+
+
+class FileLock:
+    def __init__(self, path: PathLike, timeout: Optional[float] = None):
+        self.path = lock_path(path)
+        self.timeout = timeout
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        """Block until the lock is ours; TimeoutError after `timeout` seconds (None waits forever)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if HAVE_FCNTL and self.timeout is None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except OSError:
+                os.close(fd)
+                raise
+            self._fd = fd
+            return
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        delay = 0.001
+        while True:
+            try:
+                if HAVE_FCNTL:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                self._fd = fd
+                return
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Timed out waiting for {self.path}")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+
+    def release(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if HAVE_FCNTL:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
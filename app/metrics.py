@@ -0,0 +1,174 @@
+"""
+Per-operation call counts and latency histograms for the managers.
+
+    @timed("schedule.check_in")
+    def check_in(self, ...): ...
+
+    METRICS.snapshot()          # {"schedule.check_in": {"calls": .., "p95_ms": .., ...}, ...}
+    METRICS.prometheus_text()   # text exposition format for a scrape endpoint or a file
+
+Every call is counted; latency is measured on one call in `sample_every`
+(perf_counter_ns, no allocation) and dropped into fixed histogram buckets,
+so the cost on hot paths is a counter bump and, when sampled, two clock
+reads. Quantiles are estimated from the buckets.
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.persistence import atomic_write_bytes
+
+# histogram bucket upper bounds in milliseconds (last bucket is +Inf)
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0)
+
+
+class OpStats:
+    """Counters and a latency histogram for one operation."""
+
+    __slots__ = ("calls", "errors", "sampled", "buckets", "total_ns", "max_ns", "lock")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.sampled = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def observe(self, ns: int) -> None:
+        with self.lock:
+            self.sampled += 1
+            self.buckets[bisect.bisect_left(BUCKETS_MS, ns / 1e6)] += 1
+            self.total_ns += ns
+            if ns > self.max_ns:
+                self.max_ns = ns
+
+    def quantile(self, q: float) -> float:
+        """Bucket upper bound below which a fraction q of the samples fall (capped at the max), in ms."""
+        if not self.sampled:
+            return 0.0
+        rank, seen = q * self.sampled, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                break
+        return min(BUCKETS_MS[i] if i < len(BUCKETS_MS) else float("inf"), round(self.max_ns / 1e6, 4))
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "sampled": self.sampled,
+                "mean_ms": round(self.total_ns / self.sampled / 1e6, 4) if self.sampled else 0.0,
+                "p50_ms": self.quantile(0.5),
+                "p95_ms": self.quantile(0.95),
+                "p99_ms": self.quantile(0.99),
+                "max_ms": round(self.max_ns / 1e6, 4),
+            }
+
+
+class Metrics:
+    """A registry of OpStats keyed by operation name ("<manager>.<method>")."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._ops: Dict[str, OpStats] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def op(self, name: str) -> OpStats:
+        stats = self._ops.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self._ops.setdefault(name, OpStats())
+        return stats
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record one externally timed call."""
+        stats = self.op(name)
+        with stats.lock:
+            stats.calls += 1
+        stats.observe(int(seconds * 1e9))
+
+    def timed(self, name: str, sample_every: int = 1) -> Callable:
+        """Decorator counting every call and timing one in `sample_every`."""
+        def decorate(fn: Callable) -> Callable:
+            stats = self.op(name)
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with stats.lock:
+                    stats.calls += 1
+                    sample = stats.calls % sample_every == 0
+                start = time.perf_counter_ns() if sample else 0
+                try:
+                    return fn(*args, **kwargs)
+                except Exception:
+                    with stats.lock:
+                        stats.errors += 1
+                    raise
+                finally:
+                    if sample:
+                        stats.observe(time.perf_counter_ns() - start)
+            return wrapper
+        return decorate
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Point-in-time summary per operation that has been called."""
+        return {name: stats.summary() for name, stats in sorted(self._ops.items()) if stats.calls}
+
+    def reset(self) -> None:
+        # cleared in place: decorated methods hold on to their OpStats
+        for stats in list(self._ops.values()):
+            with stats.lock:
+                stats.clear()
+        self.started = time.time()
+
+    def prometheus_text(self, prefix: str = "msms") -> str:
+        """Counters and histograms in the Prometheus text exposition format."""
+        calls, errors, hist = [], [], []
+        for name, stats in sorted(self._ops.items()):
+            with stats.lock:
+                buckets, sampled, total_ns = list(stats.buckets), stats.sampled, stats.total_ns
+                n_calls, n_errors = stats.calls, stats.errors
+            label = f'op="{name}"'
+            calls.append(f"{prefix}_operation_calls_total{{{label}}} {n_calls}")
+            errors.append(f"{prefix}_operation_errors_total{{{label}}} {n_errors}")
+            cumulative = 0
+            for bound, n in zip(BUCKETS_MS + (None,), buckets):
+                cumulative += n
+                le = "+Inf" if bound is None else repr(bound / 1000)
+                hist.append(f'{prefix}_operation_latency_seconds_bucket{{{label},le="{le}"}} {cumulative}')
+            hist.append(f"{prefix}_operation_latency_seconds_sum{{{label}}} {total_ns / 1e9}")
+            hist.append(f"{prefix}_operation_latency_seconds_count{{{label}}} {sampled}")
+        lines: List[str] = [
+            f"# HELP {prefix}_operation_calls_total Manager operation calls.",
+            f"# TYPE {prefix}_operation_calls_total counter", *calls,
+            f"# HELP {prefix}_operation_errors_total Manager operation calls that raised.",
+            f"# TYPE {prefix}_operation_errors_total counter", *errors,
+            f"# HELP {prefix}_operation_latency_seconds Sampled manager operation latency.",
+            f"# TYPE {prefix}_operation_latency_seconds histogram", *hist,
+        ]
+        return "\n".join(lines) + "\n"
+
+
+# process-wide registry the managers report to
+METRICS = Metrics()
+
+
+def timed(name: str, sample_every: int = 1) -> Callable:
+    return METRICS.timed(name, sample_every)
+
+
+def write_prometheus(path: str, registry: Optional[Metrics] = None) -> None:
+    """Dump the registry for a node-exporter style textfile collector."""
+    atomic_write_bytes(path, (registry or METRICS).prometheus_text().encode("utf-8"), keep_previous=False)
@@ -0,0 +1,92 @@
+from typing import List, Optional, Sequence
+
+
+class Student:
+    """Slotted student record. The enrollment list is created on first use."""
+
+    __slots__ = ("id", "name", "_course_ids")
+
+    def __init__(self, _id: int, name: str, enrolled_course_ids: Optional[List[int]] = None):
+        self.id = _id
+        self.name = name
+        # None until somebody needs the list: most loaded records are never edited
+        self._course_ids = enrolled_course_ids or None
+
+    @property
+    def enrolled_course_ids(self) -> List[int]:
+        if self._course_ids is None:
+            self._course_ids = []
+        return self._course_ids
+
+    @enrolled_course_ids.setter
+    def enrolled_course_ids(self, value: List[int]) -> None:
+        self._course_ids = value
+
+    def course_ids(self) -> Sequence[int]:
+        """Read-only view of the enrollments that does not create the list."""
+        return self._course_ids or ()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "enrolled_course_ids": self._course_ids or [],
+        }
+
+
+class Course:
+    """Slotted course record; enrollment and lesson lists are created on first use."""
+
+    __slots__ = ("id", "name", "instrument", "teacher_id", "_student_ids", "_lessons")
+
+    def __init__(self, _id: int, name: str, instrument: str, teacher_id: int,
+                 enrolled_student_ids: Optional[List[int]] = None, lessons: Optional[List[dict]] = None):
+        self.id = _id
+        self.name = name
+        self.instrument = instrument
+        self.teacher_id = teacher_id
+        self._student_ids = enrolled_student_ids or None
+        # lessons: list of {"day": "...", "time": "...", "room": "..."} (room optional)
+        self._lessons = lessons or None
+
+    @property
+    def enrolled_student_ids(self) -> List[int]:
+        if self._student_ids is None:
+            self._student_ids = []
+        return self._student_ids
+
+    @enrolled_student_ids.setter
+    def enrolled_student_ids(self, value: List[int]) -> None:
+        self._student_ids = value
+
+    @property
+    def lessons(self) -> List[dict]:
+        if self._lessons is None:
+            self._lessons = []
+        return self._lessons
+
+    @lessons.setter
+    def lessons(self, value: List[dict]) -> None:
+        self._lessons = value
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "instrument": self.instrument,
+            "teacher_id": self.teacher_id,
+            "enrolled_student_ids": self._student_ids or [],
+            "lessons": self._lessons or [],
+        }
+
+
+class Teacher:
+    __slots__ = ("id", "name", "speciality")
+
+    def __init__(self, _id: int, name: str, speciality: str):
+        self.id = _id
+        self.name = name
+        self.speciality = speciality
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "speciality": self.speciality}
@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from app.serialization import dumps, load_file
+
+PathLike = Union[str, Path]
+
+
+def file_stamp(path: PathLike) -> Optional[tuple]:
+    """Cheap change detector for a file: (mtime_ns, size), or None if missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+_VERSION_HEAD = re.compile(rb'\A\s*\{\s*"version"\s*:\s*(\d+)')
+
+
+def stored_version(path: PathLike) -> Optional[int]:
+    """
+    The "version" counter a data file was saved with, read from its first
+    bytes (savers write it as the first key). None if the file is missing or
+    does not start with one.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(64)
+    except FileNotFoundError:
+        return None
+    m = _VERSION_HEAD.match(head)
+    return int(m.group(1)) if m else None
+
+
+def previous_generation(path: PathLike) -> Path:
+    """Where the last good copy of `path` is kept (msms.json -> msms.json.prev)."""
+    p = Path(path)
+    return p.with_name(p.name + ".prev")
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return      # e.g. Windows cannot open directories; rename is still atomic
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: PathLike, data: bytes, keep_previous: bool = True) -> None:
+    """
+    Crash-safe replacement of `path`: write a temp file in the same directory,
+    fsync it, keep the current file as the previous generation, then rename
+    over the original. Readers see either the old or the new file, never a
+    truncated one. Callers serialize first, so the file is opened only for
+    one write.
+    """
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=f".{p.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if p.exists():
+            os.chmod(tmp, p.stat().st_mode & 0o777)
+            if keep_previous:
+                prev = previous_generation(p)
+                if prev.exists():
+                    prev.unlink()
+                # hard link: the live name is never missing while we rotate
+                try:
+                    os.link(p, prev)
+                except OSError:
+                    shutil.copy2(p, prev)
+        else:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, p)
+        _fsync_dir(p.parent)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write_json(path: PathLike, doc: Any, pretty: bool = False) -> None:
+    atomic_write_bytes(path, dumps(doc, pretty=pretty))
+
+
+def load_json(path: PathLike) -> Optional[Any]:
+    """
+    Load `path`, falling back to the previous generation if the live file is
+    missing or cannot be decoded. Returns None when neither exists; re-raises
+    the decode error if both are unreadable.
+    """
+    p = Path(path)
+    prev = previous_generation(p)
+    try:
+        return load_file(p)
+    except FileNotFoundError:
+        if not prev.exists():
+            return None
+        logging.warning("%s is missing; loading previous generation %s", p, prev)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        if not prev.exists():
+            raise
+        logging.error("%s is corrupt (%s); loading previous generation %s", p, e, prev)
+    return load_file(prev)
@@ -1,122 +1,150 @@
 # app/pst4_manager.py
 from __future__ import annotations
-import json
+import logging
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict
+
+from app.bulk_import import RowSource, as_int, assign_ids, read_rows
+from app.conflicts import ConflictIndex
+from app.enrollment import Enrollments
+from app.ids import IdAllocator, SharedIdAllocator
+from app.integrity import audit_document
+from app.locking import FileLock
+from app.metrics import timed
+from app.models import Course, Student, Teacher
+from app.persistence import atomic_write_bytes, atomic_write_json, file_stamp, load_json, stored_version
+from app.search import SearchIndex
+from app.serialization import dumps
+from app.storage import SqliteStorage, is_sqlite_path
+from app.timetable import WEEKDAYS, TimetableIndex, lesson_time, time_key
+from app.timetable_solver import Window, solve_timetable
+from app.versions import History, Version, diff, frozen, merge_into
 
 DATA_FILE = Path("data/msms.json")
 
 
-class Student:
-    def __init__(self, _id: int, name: str):
-        self.id = _id
-        self.name = name
-        self.enrolled_course_ids: List[int] = []
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "enrolled_course_ids": self.enrolled_course_ids,
-        }
-
-
-class Course:
-    def __init__(self, _id: int, name: str, instrument: str, teacher_id: int):
-        self.id = _id
-        self.name = name
-        self.instrument = instrument
-        self.teacher_id = teacher_id
-        self.enrolled_student_ids: List[int] = []
-        # lessons: list of {"day": "...", "time": "..."}
-        self.lessons: List[dict] = []
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "instrument": self.instrument,
-            "teacher_id": self.teacher_id,
-            "enrolled_student_ids": self.enrolled_student_ids,
-            "lessons": self.lessons,
-        }
-
-
-class Teacher:
-    def __init__(self, _id: int, name: str, speciality: str):
-        self.id = _id
-        self.name = name
-        self.speciality = speciality
-
-    def to_dict(self):
-        return {"id": self.id, "name": self.name, "speciality": self.speciality}
-
-
 class ScheduleManager:
     """
     Minimal, PST4-friendly manager with the exact methods the GUI calls.
     Self-contained and safe: does not modify your PST3 code.
+    A .db/.sqlite data_path stores rows in SQLite and writes only what changed.
+    A JSON data_path may be shared by several processes: ids are reserved
+    across them, and a save that finds another process's newer "version" on
+    disk merges our changes since the last save into it (undo history then
+    restarts from the merged data).
     """
 
-    def __init__(self, data_path: str | None = None):
+    # methods that change state; shared views (app/shared.py) run them under the write lock
+    MUTATORS = frozenset({
+        "register_new_student", "enroll_student_in_course", "rename_student", "remove_student",
+        "bulk_import", "reset_demo_data", "_save", "add_lesson", "remove_lesson", "update_teacher",
+        "auto_schedule", "unenroll_student", "remove_course", "undo", "redo",
+    })
+    # undo patches indexes record by record; past this many changed records it rebuilds them
+    _REBUILD_AFTER = 500
+
+    def __init__(self, data_path: str | None = None, compact: bool = True, undo_limit: int = 50):
         self.data_path = Path(data_path) if data_path else DATA_FILE
+        self.compact = compact
         self.students: List[Student] = []
         self.teachers: List[Teacher] = []
         self.courses:  List[Course]  = []
+        # lookup indexes, rebuilt on load and kept in sync by every mutation
+        self._students_by_id: Dict[int, Student] = {}
+        self._students_by_name: Dict[str, Student] = {}
+        self._teachers_by_id: Dict[int, Teacher] = {}
+        self._courses_by_id: Dict[int, Course] = {}
+        self._student_search = SearchIndex()
+        self._teacher_search = SearchIndex()
+        self._timetable = TimetableIndex()
+        self._conflicts = ConflictIndex()
+        self._enrollments = Enrollments()
+        self._db: Optional[SqliteStorage] = SqliteStorage(str(self.data_path)) if is_sqlite_path(self.data_path) else None
+        self._ids = IdAllocator() if self._db is not None else SharedIdAllocator(self.data_path)
+        self._disk_stamp = None
+        self._version = 0                           # the JSON file's "version" as of our last load/save
+        self._history: Optional[History] = None
+        self._saved: Optional[Version] = None       # history version as of our last load/save
+        self._undo_limit = undo_limit
         self._load_or_seed()
 
     # ------------- persistence -------------
-    def _load_or_seed(self):
-        if not self.data_path.exists():
-            # --- Custom demo seed (students / teachers / courses / lessons) ---
-            self.students = [
-                Student(1, "Alice Johnson"),
-                Student(2, "Liam Patel"),
-                Student(3, "Maya Singh"),
-            ]
-
-            self.teachers = [
-                Teacher(1, "Mr. Taylor", "Piano"),
-                Teacher(2, "Ms. Chen", "Guitar"),
-                Teacher(3, "Dr. Rossi", "Violin"),
-            ]
-
-            self.courses = [
-                # id, name, instrument, teacher_id
-                Course(101, "Piano 101", "Piano", 1),
-                Course(102, "Guitar Basics", "Guitar", 2),
-                Course(201, "Violin Ensemble", "Violin", 3),
-            ]
-
-            # lessons for each course (shown on Daily Roster page)
-            self.courses[0].lessons = [
-                {"day": "Monday", "time": "16:00"},
-                {"day": "Wednesday", "time": "17:00"},
-            ]
-            self.courses[1].lessons = [
-                {"day": "Monday", "time": "16:30"},
-                {"day": "Tuesday", "time": "15:30"},
-            ]
-            self.courses[2].lessons = [
-                {"day": "Thursday", "time": "18:00"},
-            ]
-
-            # example enrolments (optional)
-            self.courses[0].enrolled_student_ids = [1]  # Alice in Piano 101
-            self.courses[1].enrolled_student_ids = [2]  # Liam in Guitar Basics
-            self.students[0].enrolled_course_ids = [101]
-            self.students[1].enrolled_course_ids = [102]
+    def _has_data(self) -> bool:
+        if self._db is not None:
+            return not self._db.is_empty()
+        return self.data_path.exists()
 
+    @timed("pst4.load")
+    def _load_or_seed(self):
+        if not self._has_data():
+            self._seed_demo()
             self._save()
+            self._history = History(self._record_tables(), self._undo_limit)
+            self._saved = self._history.current
             return
 
         # load existing JSON
-        data = json.loads(self.data_path.read_text())
+        data = self._db.load() if self._db is not None else load_json(self.data_path)
+        problems = audit_document(data, fix=True)
+        if problems:
+            # repaired in memory; the next save writes the fixed links back
+            logging.warning("Repaired %d integrity problem(s) in %s: %s", len(problems), self.data_path, problems[:5])
+        self._load_records(data)
+        self._rebuild_indexes()
+        self._sync_ids(data)
+        self._version = int(data.get("version", 0) or 0)
+        self._history = History(self._record_tables(), self._undo_limit)
+        self._saved = self._history.current
+        self._disk_stamp = self.storage_stamp()
+
+    def _seed_demo(self):
+        """Replace the in-memory state with the built-in demo data (not saved)."""
+        # --- Custom demo seed (students / teachers / courses / lessons) ---
+        self.students = [
+            Student(1, "Alice Johnson"),
+            Student(2, "Liam Patel"),
+            Student(3, "Maya Singh"),
+        ]
+
+        self.teachers = [
+            Teacher(1, "Mr. Taylor", "Piano"),
+            Teacher(2, "Ms. Chen", "Guitar"),
+            Teacher(3, "Dr. Rossi", "Violin"),
+        ]
+
+        self.courses = [
+            # id, name, instrument, teacher_id
+            Course(101, "Piano 101", "Piano", 1),
+            Course(102, "Guitar Basics", "Guitar", 2),
+            Course(201, "Violin Ensemble", "Violin", 3),
+        ]
+
+        # lessons for each course (shown on Daily Roster page)
+        self.courses[0].lessons = [
+            {"day": "Monday", "time": "16:00"},
+            {"day": "Wednesday", "time": "17:00"},
+        ]
+        self.courses[1].lessons = [
+            {"day": "Monday", "time": "16:30"},
+            {"day": "Tuesday", "time": "15:30"},
+        ]
+        self.courses[2].lessons = [
+            {"day": "Thursday", "time": "18:00"},
+        ]
+
+        # example enrolments (optional)
+        self.courses[0].enrolled_student_ids = [1]  # Alice in Piano 101
+        self.courses[1].enrolled_student_ids = [2]  # Liam in Guitar Basics
+        self.students[0].enrolled_course_ids = [101]
+        self.students[1].enrolled_course_ids = [102]
+
+        self._rebuild_indexes()
+        self._sync_ids({})
+
+    def _load_records(self, data: dict):
         self.students = []
         for s in data.get("students", []):
-            st = Student(int(s["id"]), s["name"])
-            st.enrolled_course_ids = s.get("enrolled_course_ids", [])
-            self.students.append(st)
+            self.students.append(Student(int(s["id"]), s["name"], s.get("enrolled_course_ids")))
 
         self.teachers = [
             Teacher(int(t["id"]), t["name"], t.get("speciality", ""))
@@ -125,33 +153,222 @@ class ScheduleManager:
 
         self.courses = []
         for c in data.get("courses", []):
-            cr = Course(int(c["id"]), c["name"], c.get("instrument", ""), int(c["teacher_id"]))
-            cr.enrolled_student_ids = c.get("enrolled_student_ids", [])
-            cr.lessons = c.get("lessons", [])
-            self.courses.append(cr)
-
-    def _save(self):
-        self.data_path.parent.mkdir(parents=True, exist_ok=True)
-        self.data_path.write_text(json.dumps({
+            self.courses.append(Course(int(c["id"]), c["name"], c.get("instrument", ""), int(c["teacher_id"]),
+                                       c.get("enrolled_student_ids"), c.get("lessons")))
+
+    def _sync_ids(self, data: dict):
+        self._ids.load(data, {
+            "student": self._students_by_id,
+            "teacher": self._teachers_by_id,
+            "course": self._courses_by_id,
+        })
+
+    def _document(self) -> dict:
+        return {
             "students": [s.to_dict() for s in self.students],
             "teachers": [t.to_dict() for t in self.teachers],
             "courses":  [c.to_dict() for c in self.courses],
-        }, indent=2))
+        }
+
+    @timed("pst4.save")
+    def _save(self, merge: bool = True):
+        """
+        Write everything. For JSON the file is locked, and if another process
+        saved since we did, our changes are merged into its data first
+        (merge=False overwrites it, e.g. for a reset).
+        """
+        if self._db is not None:
+            self._db.save({**self._document(), **self._ids.to_dict()})
+            self._disk_stamp = self.storage_stamp()
+            return
+        with FileLock(self.data_path):
+            on_disk = stored_version(self.data_path)
+            if on_disk is not None:
+                changed = on_disk != self._version
+            else:   # no version header (older file): fall back to the stamp
+                changed = self.storage_stamp() != self._disk_stamp
+            if changed and merge:
+                self._merge_from_disk()
+            self._version = max(self._version, on_disk or 0) + 1
+            # "version" goes first so stored_version() finds it in the file's first bytes
+            doc = {"version": self._version, **self._document(), **self._ids.to_dict()}
+            atomic_write_json(self.data_path, doc, pretty=not self.compact)
+            self._disk_stamp = self.storage_stamp()
+        if self._history is not None:
+            self._saved = self._history.current
+
+    def _merge_from_disk(self):
+        """Load what another process saved and lay our changes since our last save over it."""
+        data = load_json(self.data_path)
+        if data is None or self._saved is None:     # gone, or we are still seeding: nothing to merge
+            return
+        merge_into(data, diff(self._saved, self._history.current))
+        audit_document(data, fix=True)      # e.g. an enrolment in a course the other process removed
+        self._load_records(data)
+        self._rebuild_indexes()
+        self._sync_ids(data)
+        self._version = int(data.get("version", 0) or 0)
+        self._history = History(self._record_tables(), self._undo_limit)
+        logging.info("Merged changes saved meanwhile by another process into %s", self.data_path)
+
+    def export_json(self, out_path: str | Path) -> None:
+        """Pretty-printed copy of the current data for people to read or diff."""
+        atomic_write_bytes(out_path, dumps(self._document(), pretty=True), keep_previous=False)
+
+    def storage_stamp(self):
+        """Token that changes when the stored data changes (used to spot outside writers)."""
+        if self._db is not None:
+            return self._db.data_version()
+        return file_stamp(self.data_path), stored_version(self.data_path)
+
+    def has_unsaved_changes(self) -> bool:
+        return False
+
+    def _persist(self, label: str, students=(), teachers=(), courses=(), removed_students=(), removed_courses=(),
+                 removed_teachers=(), record: bool = True):
+        """
+        Write just the touched records (SQLite) or fall back to a full save
+        (JSON), and add them to the undo history as one step called `label`.
+        """
+        students, teachers, courses = list(students), list(teachers), list(courses)
+        if record:
+            self._history.commit(label, {
+                "students": {**{s.id: frozen(s.to_dict()) for s in students}, **dict.fromkeys(removed_students)},
+                "teachers": {**{t.id: frozen(t.to_dict()) for t in teachers}, **dict.fromkeys(removed_teachers)},
+                "courses": {**{c.id: frozen(c.to_dict()) for c in courses}, **dict.fromkeys(removed_courses)},
+            })
+        if self._db is None:
+            self._save()
+            return
+        self._db.commit(
+            upsert={"students": [s.to_dict() for s in students],
+                    "teachers": [t.to_dict() for t in teachers],
+                    "courses": [c.to_dict() for c in courses]},
+            delete={"students": list(removed_students), "teachers": list(removed_teachers),
+                    "courses": list(removed_courses)},
+            meta=self._ids.to_dict(),
+        )
+        self._disk_stamp = self.storage_stamp()
+
+    # ------------- indexes -------------
+    def _rebuild_indexes(self):
+        self._students_by_id = {}
+        self._students_by_name = {}
+        self._student_search = SearchIndex()
+        for s in self.students:
+            self._index_student(s)
+        self._teachers_by_id = {}
+        self._teacher_search = SearchIndex()
+        for t in self.teachers:
+            self._index_teacher(t)
+        self._courses_by_id = {c.id: c for c in self.courses}
+        self._enrollments = Enrollments((s.id, cid) for s in self.students for cid in s.course_ids())
+        self._timetable = TimetableIndex()
+        self._conflicts = ConflictIndex()
+        for c in self.courses:
+            self._index_lessons(c)
+
+    def _index_lessons(self, c: Course):
+        t = self._get_teacher_by_id(c.teacher_id)
+        self._timetable.index_course(c, t.name if t else "?")
+        self._conflicts.index_course(c.id, c.teacher_id, c.lessons)
+
+    def _index_student(self, s: Student):
+        self._students_by_id[s.id] = s
+        # first student wins on duplicate names, like the old linear scan
+        self._students_by_name.setdefault(s.name.lower(), s)
+        self._student_search.add(s.id, s.name, record_id=s.id)
+
+    def _index_teacher(self, t: Teacher):
+        self._teachers_by_id[t.id] = t
+        self._teacher_search.add(t.id, t.name, t.speciality, record_id=t.id)
+
+    def _unindex_student(self, s: Student):
+        self._students_by_id.pop(s.id, None)
+        self._student_search.remove(s.id)
+        key = s.name.lower()
+        if self._students_by_name.get(key) is s:
+            del self._students_by_name[key]
+            dup = next((o for o in self.students if o is not s and o.name.lower() == key), None)
+            if dup:
+                self._students_by_name[key] = dup
 
     # ------------- helpers -------------
     def _next_student_id(self) -> int:
-        return max((s.id for s in self.students), default=0) + 1
+        return self._ids.allocate("student")
 
     def _get_student_by_id(self, sid: int) -> Optional[Student]:
-        return next((s for s in self.students if s.id == sid), None)
+        return self._students_by_id.get(sid)
+
+    def _get_teacher_by_id(self, tid: int) -> Optional[Teacher]:
+        return self._teachers_by_id.get(tid)
 
     def _get_course_by_id(self, cid: int) -> Optional[Course]:
-        return next((c for c in self.courses if c.id == cid), None)
+        return self._courses_by_id.get(cid)
 
     # ------------- GUI API (what Streamlit calls) -------------
+    def get_student(self, sid: int) -> Optional[Student]:
+        return self._students_by_id.get(sid)
+
+    def get_teacher(self, tid: int) -> Optional[Teacher]:
+        return self._teachers_by_id.get(tid)
+
+    def get_course(self, cid: int) -> Optional[Course]:
+        return self._courses_by_id.get(cid)
+
     def get_student_by_name(self, name: str) -> Optional[Student]:
         n = (name or "").strip().lower()
-        return next((s for s in self.students if s.name.lower() == n), None)
+        return self._students_by_name.get(n)
+
+    @timed("pst4.search_students", sample_every=10)
+    def search_students(self, query: str, k: int = 10) -> List[Student]:
+        """Ranked top-k students by id, name prefix/substring, or a near-miss spelling."""
+        return [self._students_by_id[i] for i in self._student_search.search(query, k)]
+
+    def search_teachers(self, query: str, k: int = 10) -> List[Teacher]:
+        """Ranked top-k teachers by id, name or speciality."""
+        return [self._teachers_by_id[i] for i in self._teacher_search.search(query, k)]
+
+    def rename_student(self, student_id: int, new_name: str) -> Tuple[bool, str]:
+        s = self._get_student_by_id(student_id)
+        if not s or not new_name.strip():
+            return False, "Invalid student or name."
+        self._unindex_student(s)
+        s.name = new_name.strip()
+        self._index_student(s)
+        self._persist("Rename student", students=[s])
+        return True, "Student renamed."
+
+    def remove_student(self, student_id: int) -> Tuple[bool, str]:
+        s = self._get_student_by_id(student_id)
+        if not s:
+            return False, "Student not found."
+        touched = []
+        for cid in self._enrollments.drop_student(student_id):
+            c = self._courses_by_id[cid]
+            c.enrolled_student_ids.remove(student_id)
+            touched.append(c)
+        self.students.remove(s)
+        self._unindex_student(s)
+        self._persist("Remove student", courses=touched, removed_students=[student_id])
+        return True, "Student removed."
+
+    def remove_course(self, course_id: int) -> Tuple[bool, str]:
+        """Delete a course and unenroll its students (their records are kept)."""
+        c = self._get_course_by_id(course_id)
+        if not c:
+            return False, "Course not found."
+        touched = []
+        for sid in self._enrollments.drop_course(course_id):
+            st = self._students_by_id[sid]
+            st.enrolled_course_ids.remove(course_id)
+            touched.append(st)
+        self.courses.remove(c)
+        del self._courses_by_id[course_id]
+        self._timetable.drop_course(course_id)
+        self._conflicts.drop_course(course_id)
+        self._persist("Remove course", students=touched, removed_courses=[course_id])
+        return True, "Course removed."
 
     def register_new_student(self, name: str, instrument: str) -> Tuple[bool, str, Optional[int]]:
         if not name.strip() or not instrument.strip():
@@ -160,48 +377,320 @@ class ScheduleManager:
             return False, "A student with that name already exists.", None
         st = Student(self._next_student_id(), name.strip())
         self.students.append(st)
-        self._save()
+        self._index_student(st)
+        self._persist("Register student", students=[st])
         return True, f"Registered {name} for {instrument}.", st.id
 
+    def bulk_import(self, students: Optional[RowSource] = None, teachers: Optional[RowSource] = None,
+                    courses: Optional[RowSource] = None, enrollments: Optional[RowSource] = None) -> Dict[str, int]:
+        """
+        Term onboarding: import students, teachers, courses and enrollments from
+        CSV/JSON-lines files or iterables in one validated batch and one save.
+        Raises ValueError on the first bad row; nothing is applied in that case.
+        """
+        t_rows, c_rows = read_rows(teachers), read_rows(courses)
+        s_rows, e_rows = read_rows(students), read_rows(enrollments)
+
+        with self._ids.batch():     # a failed validation leaves the counters untouched
+            new_teachers: Dict[int, Teacher] = {}
+            for tid, r in zip(assign_ids(t_rows, "teacher", self._teachers_by_id, self._ids), t_rows):
+                new_teachers[tid] = Teacher(tid, str(r.get("name", "")).strip(), str(r.get("speciality", "")).strip())
+
+            new_courses: Dict[int, Course] = {}
+            c_ids = assign_ids(c_rows, "course", self._courses_by_id, self._ids)
+            for n, (cid, r) in enumerate(zip(c_ids, c_rows), 1):
+                tid = as_int(r, "teacher_id", "course", n)
+                if tid not in self._teachers_by_id and tid not in new_teachers:
+                    raise ValueError(f"course row {n}: teacher {tid} does not exist.")
+                new_courses[cid] = Course(cid, str(r.get("name", "")).strip(), str(r.get("instrument", "")).strip(), tid)
+
+            new_students: Dict[int, Student] = {}
+            names = set()
+            for n, (sid, r) in enumerate(zip(assign_ids(s_rows, "student", self._students_by_id, self._ids), s_rows), 1):
+                name = str(r.get("name", "")).strip()
+                key = name.lower()
+                if not name or key in self._students_by_name or key in names:
+                    raise ValueError(f"student row {n}: missing or duplicate name {name!r}.")
+                names.add(key)
+                new_students[sid] = Student(sid, name)
+
+            links = []
+            for n, r in enumerate(e_rows, 1):
+                sid = as_int(r, "student_id", "enrollment", n)
+                cid = as_int(r, "course_id", "enrollment", n)
+                s = new_students.get(sid) or self._get_student_by_id(sid)
+                c = new_courses.get(cid) or self._get_course_by_id(cid)
+                if not s or not c:
+                    raise ValueError(f"enrollment row {n}: invalid student {sid} or course {cid}.")
+                links.append((s, c))
+
+        for t in new_teachers.values():
+            self.teachers.append(t)
+            self._index_teacher(t)
+        self.courses.extend(new_courses.values())
+        self._courses_by_id.update(new_courses)
+        for c in new_courses.values():
+            self._index_lessons(c)
+        for st in new_students.values():
+            self.students.append(st)
+            self._index_student(st)
+        for s, c in links:
+            self._link(s, c)
+        self._persist(
+            "Bulk import",
+            students={**{s.id: s for s, _ in links}, **new_students}.values(),
+            teachers=new_teachers.values(),
+            courses={**{c.id: c for _, c in links}, **new_courses}.values(),
+        )
+        return {"students": len(new_students), "teachers": len(new_teachers),
+                "courses": len(new_courses), "enrollments": len(links)}
+
+    def _link(self, s: Student, c: Course) -> bool:
+        if not self._enrollments.add(s.id, c.id):
+            return False
+        s.enrolled_course_ids.append(c.id)
+        c.enrolled_student_ids.append(s.id)
+        return True
+
     def enroll_student_in_course(self, student_id: int, course_id: int) -> Tuple[bool, str]:
         s = self._get_student_by_id(student_id)
         c = self._get_course_by_id(course_id)
         if not s or not c:
             return False, "Invalid student or course."
-        if student_id in c.enrolled_student_ids:
+        if not self._link(s, c):
             return False, "Student already enrolled in this course."
-        c.enrolled_student_ids.append(student_id)
-        if course_id not in s.enrolled_course_ids:
-            s.enrolled_course_ids.append(course_id)
-        self._save()
+        self._persist("Enroll student", students=[s], courses=[c])
         return True, "Enrollment successful."
 
+    def unenroll_student(self, student_id: int, course_id: int) -> Tuple[bool, str]:
+        if not self._enrollments.remove(student_id, course_id):
+            return False, "Student is not enrolled in this course."
+        s, c = self._students_by_id[student_id], self._courses_by_id[course_id]
+        s.enrolled_course_ids.remove(course_id)
+        c.enrolled_student_ids.remove(student_id)
+        self._persist("Unenroll student", students=[s], courses=[c])
+        return True, "Student unenrolled."
+
+    @timed("pst4.check_in")
     def check_in(self, student_id: int, course_id: int) -> Tuple[bool, str]:
         c = self._get_course_by_id(course_id)
         if not c:
             return False, "Course not found."
-        if student_id not in c.enrolled_student_ids:
+        if not self._enrollments.has(student_id, course_id):
             return False, "Student is not enrolled in this course."
         return True, "Check-in recorded."
 
-    def roster_for_day(self, day: str) -> List[dict]:
-        rows: List[dict] = []
-        for c in self.courses:
-            for ls in c.lessons:
-                if ls.get("day") == day:
-                    tname = next((t.name for t in self.teachers if t.id == c.teacher_id), "?")
-                    rows.append({
-                        "Course": c.name,
-                        "Instrument": c.instrument,
-                        "Teacher": tname,
-                        "Day": ls.get("day"),
-                        "Time": ls.get("time"),
-                        "Course ID": c.id,
-                    })
-        return rows
+    @timed("pst4.roster_for_day", sample_every=10)
+    def roster_for_day(self, day: str, room: Optional[str] = None, teacher_id: Optional[int] = None) -> List[dict]:
+        """Lessons on `day` sorted by time, optionally only one room or teacher."""
+        return self._timetable.day(day, room=room, teacher_id=teacher_id)
+
+    @timed("pst4.roster_for_range", sample_every=10)
+    def roster_for_range(self, start_day: str, end_day: str, room: Optional[str] = None,
+                         teacher_id: Optional[int] = None) -> List[dict]:
+        """Lessons from start_day to end_day inclusive, in week order (wraps past Sunday)."""
+        if start_day not in WEEKDAYS or end_day not in WEEKDAYS:
+            return []
+        return self._timetable.days(start_day, end_day, room=room, teacher_id=teacher_id)
+
+    def rooms(self) -> List[str]:
+        return sorted({ls["room"] for c in self.courses for ls in c.lessons if ls.get("room")})
+
+    def add_lesson(self, course_id: int, day: str, time: str, room: str = "") -> Tuple[bool, str]:
+        c = self._get_course_by_id(course_id)
+        if not c:
+            return False, "Course not found."
+        if day not in WEEKDAYS or time_key(time) == (99, 99):
+            return False, "Invalid day or time."
+        lesson = {"day": day, "time": time.strip()}
+        if room.strip():
+            lesson["room"] = room.strip()
+        clashes = self._conflicts.check(day, lesson, room=lesson.get("room"), teacher_id=c.teacher_id)
+        if clashes:
+            first = clashes[0]
+            return False, (f"{first['kind'].title()} {first['resource']} is already booked on "
+                           f"{day} at {first['start_time']} (course {first['course_id']}).")
+        c.lessons.append(lesson)
+        self._index_lessons(c)
+        self._persist("Add lesson", courses=[c])
+        return True, "Lesson added."
+
+    def audit_conflicts(self) -> List[dict]:
+        """Every overlapping pair of lessons sharing a room or a teacher."""
+        return self._conflicts.audit()
+
+    def remove_lesson(self, course_id: int, day: str, time: str) -> Tuple[bool, str]:
+        c = self._get_course_by_id(course_id)
+        if not c:
+            return False, "Course not found."
+        keep = [ls for ls in c.lessons if not (ls.get("day") == day and time_key(lesson_time(ls)) == time_key(time))]
+        if len(keep) == len(c.lessons):
+            return False, "Lesson not found."
+        c.lessons = keep
+        self._index_lessons(c)
+        self._persist("Remove lesson", courses=[c])
+        return True, "Lesson removed."
+
+    def auto_schedule(self, rooms: Dict[str, int], availability: Optional[Dict[int, List[Window]]] = None,
+                      course_ids: Optional[List[int]] = None, **options) -> Tuple[bool, str]:
+        """
+        Re-plan the lessons of `course_ids` (default: every course) with the
+        timetable solver; other courses keep their lessons. Nothing changes
+        unless the solver finds a clash-free timetable.
+        """
+        chosen = set(course_ids) if course_ids is not None else set(self._courses_by_id)
+        if not chosen <= set(self._courses_by_id):
+            return False, "Unknown course id."
+        try:
+            plan = solve_timetable(
+                [c for c in self.courses if c.id in chosen], rooms, availability,
+                fixed=[c for c in self.courses if c.id not in chosen], **options,
+            )
+        except ValueError as e:
+            return False, str(e)
+        if plan["clashes"]:
+            return False, f"No clash-free timetable found ({plan['clashes']} lessons still clash)."
+        touched = []
+        for cid, lessons in plan["lessons"].items():
+            c = self._courses_by_id[cid]
+            c.lessons = lessons
+            self._index_lessons(c)
+            touched.append(c)
+        self._persist("Auto-schedule", courses=touched)
+        return True, f"Scheduled {sum(len(c.lessons) for c in touched)} lessons."
+
+    def update_teacher(self, teacher_id: int, name: Optional[str] = None,
+                       speciality: Optional[str] = None) -> Tuple[bool, str]:
+        t = self._get_teacher_by_id(teacher_id)
+        if not t or (name is not None and not name.strip()):
+            return False, "Invalid teacher or name."
+        if name is not None:
+            t.name = name.strip()
+        if speciality is not None:
+            t.speciality = speciality.strip()
+        self._index_teacher(t)
+        # only this teacher's courses carry the resolved name
+        for cid in self._timetable.courses_for_teacher(teacher_id):
+            self._index_lessons(self._courses_by_id[cid])
+        self._persist("Update teacher", teachers=[t])
+        return True, "Teacher updated."
 
     def reset_demo_data(self):
-        """Delete JSON and re-seed with the built-in demo data."""
-        if self.data_path.exists():
-            self.data_path.unlink()
-        self._load_or_seed()
+        """Replace everything with the built-in demo data; one undo step brings the old data back."""
+        self._seed_demo()
+        self._history.replace("Re-seed demo data", self._record_tables())
+        self._save(merge=False)
+
+    # ------------- history (undo / redo / snapshots) -------------
+    def _record_tables(self) -> dict:
+        return {
+            "students": ((s.id, frozen(s.to_dict())) for s in self.students),
+            "teachers": ((t.id, frozen(t.to_dict())) for t in self.teachers),
+            "courses": ((c.id, frozen(c.to_dict())) for c in self.courses),
+        }
+
+    def snapshot(self) -> Version:
+        """The current state as an immutable version (O(1); later changes never touch it)."""
+        return self._history.current
+
+    def changes_between(self, old: Version, new: Version) -> dict:
+        """{table: [(id, record in old, record in new), ...]} for every record that differs."""
+        return diff(old, new)
+
+    def undo_label(self) -> Optional[str]:
+        return self._history.undo_label()
+
+    def redo_label(self) -> Optional[str]:
+        return self._history.redo_label()
+
+    def undo(self) -> Tuple[bool, str]:
+        step = self._history.undo()
+        if step is None:
+            return False, "Nothing to undo."
+        self._restore(*step)
+        return True, f"Undid: {step[0].label}."
+
+    def redo(self) -> Tuple[bool, str]:
+        step = self._history.redo()
+        if step is None:
+            return False, "Nothing to redo."
+        self._restore(*step)
+        return True, f"Redid: {step[1].label}."
+
+    def _restore(self, current: Version, target: Version):
+        """Bring the live records from `current` to `target`, touching only what differs."""
+        changes = diff(current, target)
+        if sum(len(rows) for rows in changes.values()) > self._REBUILD_AFTER:
+            self._load_records({name: sorted((frozen(r) for r in table.values()), key=lambda r: r["id"])
+                                for name, table in target.tables.items()})
+            self._rebuild_indexes()
+            self._sync_ids(self._ids.to_dict())
+            self._save()
+            return
+
+        # teachers first: timetable rows carry the teacher's name
+        teachers, courses, students = [], [], []
+        gone = {"students": set(), "teachers": set(), "courses": set()}
+        for tid, _, new in changes.get("teachers", []):
+            t = self._teachers_by_id.get(tid)
+            if new is None:
+                gone["teachers"].add(tid)
+                del self._teachers_by_id[tid]
+                self._teacher_search.remove(tid)
+                continue
+            if t is None:
+                t = Teacher(tid, new["name"], new.get("speciality", ""))
+                self.teachers.append(t)
+                self._ids.observe("teacher", tid)
+            else:
+                t.name, t.speciality = new["name"], new.get("speciality", "")
+            self._index_teacher(t)
+            teachers.append(t)
+        for cid, _, new in changes.get("courses", []):
+            c = self._courses_by_id.get(cid)
+            if new is None:
+                gone["courses"].add(cid)
+                del self._courses_by_id[cid]
+                self._enrollments.drop_course(cid)
+                self._timetable.drop_course(cid)
+                self._conflicts.drop_course(cid)
+                continue
+            new = frozen(new)
+            if c is None:
+                c = Course(cid, new["name"], new.get("instrument", ""), new["teacher_id"])
+                self.courses.append(c)
+                self._courses_by_id[cid] = c
+                self._ids.observe("course", cid)
+            c.name, c.instrument, c.teacher_id = new["name"], new.get("instrument", ""), new["teacher_id"]
+            c.enrolled_student_ids, c.lessons = new["enrolled_student_ids"], new["lessons"]
+            courses.append(c)
+        for sid, _, new in changes.get("students", []):
+            s = self._students_by_id.get(sid)
+            self._enrollments.drop_student(sid)     # both sides of every link are in the diff
+            if s is not None:
+                self._unindex_student(s)
+            if new is None:
+                gone["students"].add(sid)
+                continue
+            if s is None:
+                s = Student(sid, new["name"])
+                self.students.append(s)
+                self._ids.observe("student", sid)
+            s.name, s.enrolled_course_ids = new["name"], list(new["enrolled_course_ids"])
+            self._index_student(s)
+            for cid in s.course_ids():
+                self._enrollments.add(sid, cid)
+            students.append(s)
+
+        # one pass per list for removals, however many records went
+        if gone["students"]:
+            self.students = [s for s in self.students if s.id not in gone["students"]]
+        if gone["teachers"]:
+            self.teachers = [t for t in self.teachers if t.id not in gone["teachers"]]
+        if gone["courses"]:
+            self.courses = [c for c in self.courses if c.id not in gone["courses"]]
+        renamed = {cid for t in teachers for cid in self._timetable.courses_for_teacher(t.id)}
+        for c in {*courses, *(self._courses_by_id[cid] for cid in renamed if cid in self._courses_by_id)}:
+            self._index_lessons(c)
+        self._persist("", students, teachers, courses, gone["students"], gone["courses"], gone["teachers"],
+                      record=False)
@@ -1,115 +1,756 @@
-import json
+import bisect
 import csv
+import functools
+import gzip
+import io
 import logging
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
+
+from app.attendance import STATUSES, AttendanceIndex
+from app.bulk_import import RowSource, as_int, assign_ids, read_rows
+from app.conflicts import ConflictIndex, lesson_span
+from app.enrollment import Enrollments
+from app.ids import IdAllocator, SharedIdAllocator
+from app.integrity import audit_document
+from app.journal import Journal
+from app.locking import FileLock
+from app.metrics import timed
+from app.persistence import atomic_write_bytes, atomic_write_json, file_stamp, load_json, stored_version
+from app.search import SearchIndex
+from app.serialization import dumps
+from app.storage import ENTITY_TABLES, SqliteStorage, is_sqlite_path
+from app.write_behind import WriteBehind
+
+Bound = Union[str, date, datetime, None]
+
+
+def _iso_bound(value: Bound) -> Optional[str]:
+    """Normalize a date-range bound to an ISO string comparable with stored timestamps."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _locked(method):
+    """
+    Run a mutator under the manager lock so background saves see a consistent
+    state. A save it asked for (_save_soon) runs once the outermost locked call
+    has let go of the lock: _save_data takes _io_lock before _lock.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        tls = self._tls
+        depth = getattr(tls, "depth", 0)
+        tls.depth = depth + 1
+        try:
+            with self._lock:
+                return method(self, *args, **kwargs)
+        finally:
+            tls.depth = depth
+            if not depth and getattr(tls, "save_due", False):
+                tls.save_due = False
+                self._save_data()
+    return wrapper
+
+
+@contextmanager
+def _text_sink(out: Union[str, Path, Any], compress: bool) -> Iterator[Any]:
+    """Yield a text stream over a path or file-like object, optionally gzip-compressed."""
+    if isinstance(out, (str, Path)):
+        opener = gzip.open if compress else open
+        with opener(out, "wt", newline="", encoding="utf-8") as f:
+            yield f
+        return
+    if not compress and isinstance(out, io.TextIOBase):
+        yield out
+        return
+    raw = gzip.GzipFile(fileobj=out, mode="wb") if compress else out
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    try:
+        yield text
+    finally:
+        # leave the caller's object open (e.g. a BytesIO handed to st.download_button)
+        text.flush()
+        text.detach()
+        if compress:
+            raw.close()
+
 
 class ScheduleManager:
     """
     Core in-memory data manager with JSON persistence + finance logging + CSV export.
     Keeps data as lists of dicts for simplicity and easy Streamlit display.
+
+    With journal=True each mutation appends one record to "<data_path>.journal"
+    instead of rewriting the whole file; the journal is folded back into the
+    snapshot every `compact_every` records (or on an explicit _save_data()).
+
+    A data_path ending in .db/.sqlite/.sqlite3 selects the SQLite backend
+    (app/storage.py): each mutation becomes one row-level transaction.
+
+    With write_behind=True mutations only mark the manager dirty; a background
+    thread saves once per `save_interval_ms` burst or every `save_every`
+    mutations. Call flush() (also run at exit) to force pending changes out.
+
+    JSON files are written compact (orjson when installed); pass
+    compact=False for an indented file, or use export_json() for a
+    pretty-printed copy.
+
+    Plain JSON snapshots are safe to share between processes. Ids are
+    reserved across processes before they are handed out (SharedIdAllocator),
+    so they never change. Saves take a file lock and compare the file's
+    "version" with the one we loaded; if another process saved in between,
+    its data is loaded and our unsaved operations are replayed on top before
+    writing, and the version goes up by one.
     """
 
-    def __init__(self, data_path: str = "msms.json"):
+    # methods that change state; shared views (app/shared.py) run them under the write lock
+    MUTATORS = frozenset({
+        "add_student", "add_teacher", "add_course", "add_lesson", "enroll_student", "bulk_import", "check_in", "check_in_many",
+        "record_payment", "_save_data", "flush", "close",
+    })
+
+    # journal op -> list the record is appended to
+    _APPEND_OPS = {
+        "add_student": "students",
+        "add_teacher": "teachers",
+        "add_course": "courses",
+        "check_in": "attendance",
+        "record_payment": "finance_log",
+    }
+    # journal ops that modify existing student/course rows in place
+    _UPDATE_OPS = frozenset({"add_lesson", "enroll"})
+    # table -> IdAllocator kind
+    _ID_KINDS = {"students": "student", "teachers": "teacher", "courses": "course"}
+
+    def __init__(self, data_path: str = "msms.json", journal: bool = False, compact_every: int = 1000,
+                 write_behind: bool = False, save_interval_ms: int = 500, save_every: int = 100,
+                 compact: bool = True):
         self.data_path = data_path
+        self.compact = compact
         self.students: List[Dict[str, Any]] = []
         self.teachers: List[Dict[str, Any]] = []
         self.courses:  List[Dict[str, Any]] = []
         self.attendance: List[Dict[str, Any]] = []
         self.finance_log: List[Dict[str, Any]] = []     # <-- PST5 new
+        # id -> record indexes; rebuilt on load, kept in sync by every mutation
+        self._students_by_id: Dict[int, Dict[str, Any]] = {}
+        self._teachers_by_id: Dict[int, Dict[str, Any]] = {}
+        self._courses_by_id:  Dict[int, Dict[str, Any]] = {}
+        # finance: per-student payments in timestamp order + running totals
+        self._payments_by_student: Dict[int, List[Dict[str, Any]]] = {}
+        self._paid_by_student: Dict[int, float] = {}
+        self._paid_by_method: Dict[str, float] = {}
+        self._attendance_index = AttendanceIndex()
+        self._conflicts = ConflictIndex()
+        self._enrollments = Enrollments()
+        self._student_search = SearchIndex()
+        self._teacher_search = SearchIndex()
+        self.compact_every = compact_every
+        self._db: Optional[SqliteStorage] = SqliteStorage(data_path) if is_sqlite_path(data_path) else None
+        if self._db and journal:
+            raise ValueError("journal mode only applies to JSON storage.")
+        self._journal: Optional[Journal] = Journal(f"{data_path}.journal") if journal else None
+        # plain JSON snapshots may be shared between processes: reserve ids across them
+        self._ids = IdAllocator() if self._db or journal else SharedIdAllocator(data_path)
+        if write_behind and (journal or self._db):
+            raise ValueError("write_behind only applies to plain JSON storage.")
+        self._lock = threading.RLock()      # guards in-memory state
+        self._io_lock = threading.Lock()    # orders snapshot writes; always taken before _lock
+        self._tls = threading.local()       # per-thread _locked depth and deferred save (see _locked)
+        self._disk_stamp: Any = None        # storage_stamp() as of our last load/save
+        self._version = 0                   # the file's "version" as of our last load/save
+        # ops not yet in a snapshot on disk; replayed onto another process's save (JSON snapshots only)
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._saver: Optional[WriteBehind] = (
+            WriteBehind(self._save_data, save_interval_ms, save_every) if write_behind else None
+        )
         self._load_data()
 
     # ---------- Persistence ----------
+    def _read_document(self) -> Optional[Dict[str, Any]]:
+        if self._db is not None:
+            return None if self._db.is_empty() else self._db.load()
+        return load_json(self.data_path)
+
+    def _install(self, d: Dict[str, Any]) -> None:
+        """Replace the in-memory state with a loaded document."""
+        problems = audit_document(d, fix=True)
+        if problems:
+            # repaired in memory; the next save writes the fixed links back
+            logging.warning("Repaired %d integrity problem(s) in %s: %s", len(problems), self.data_path, problems[:5])
+        self.students    = d.get("students", [])
+        self.teachers    = d.get("teachers", [])
+        self.courses     = d.get("courses", [])
+        self.attendance  = d.get("attendance", [])
+        self.finance_log = d.get("finance_log", [])
+        self._version = int(d.get("version", 0) or 0)
+        self._rebuild_indexes()
+        self._ids.load(d, {
+            "student": self._students_by_id,
+            "teacher": self._teachers_by_id,
+            "course": self._courses_by_id,
+            "lesson": [ls.get("lesson_id") or 0 for c in self.courses for ls in c.get("lessons", [])],
+        })
+
+    @timed("schedule.load")
     def _load_data(self) -> None:
-        p = Path(self.data_path)
-        if p.exists():
-            with p.open("r", encoding="utf-8") as f:
-                d = json.load(f)
-            self.students    = d.get("students", [])
-            self.teachers    = d.get("teachers", [])
-            self.courses     = d.get("courses", [])
-            self.attendance  = d.get("attendance", [])
-            self.finance_log = d.get("finance_log", [])
-            logging.info(f"Loaded data from {self.data_path}")
+        d = self._read_document()
+        if d is not None:
+            self._install(d)
+            logging.info("Loaded data from %s", self.data_path)
+            if self._journal:
+                self._replay_journal(d.get("journal_seq", 0))
+            self._disk_stamp = self.storage_stamp()
         else:
+            self._rebuild_indexes()
             self._save_data()
-            logging.info(f"Created new data file at {self.data_path}")
+            logging.info("Created new data file at %s", self.data_path)
 
-    def _save_data(self) -> None:
-        d = {
+    def _replay_journal(self, after_seq: int) -> None:
+        replayed = 0
+        for rec in self._journal.replay(after_seq):
+            self._apply(rec["op"], rec["row"])
+            replayed += 1
+        if replayed:
+            logging.info("Replayed %d journal record(s) from %s", replayed, self._journal.path)
+        if self._journal.pending >= self.compact_every:
+            self._save_data()
+
+    def _apply(self, op: str, row: Dict[str, Any]) -> None:
+        if op == "add_lesson":
+            c = self._courses_by_id[row["course_id"]]
+            c.setdefault("lessons", []).append(row["lesson"])
+            self._index_row("courses", c)
+            self._ids.observe("lesson", row["lesson"]["lesson_id"])
+            return
+        if op == "enroll":
+            self._link(row["student_id"], row["course_id"])
+            return
+        table = self._APPEND_OPS[op]
+        getattr(self, table).append(row)
+        self._index_row(table, row)
+        if table in self._ID_KINDS:
+            self._ids.observe(self._ID_KINDS[table], row["id"])
+
+    def _commit(self, op: str, row: Dict[str, Any]) -> None:
+        """Persist one already-applied mutation (row write, journal append or full save)."""
+        if self._db is not None:
+            if op in self._UPDATE_OPS:
+                upsert = {"courses": [self._courses_by_id[row["course_id"]]]}
+                if "student_id" in row:
+                    upsert["students"] = [self._students_by_id[row["student_id"]]]
+                self._db.commit(upsert=upsert, meta=self._ids.to_dict())
+                self._disk_stamp = self.storage_stamp()
+                return
+            table = self._APPEND_OPS[op]
+            kind = "upsert" if table in ENTITY_TABLES else "append"
+            self._db.commit(**{kind: {table: [row]}}, meta=self._ids.to_dict())
+            self._disk_stamp = self.storage_stamp()
+            return
+        if self._journal is None:
+            # kept until a snapshot holding it is on disk, in case it must be replayed (see _merge_from_disk)
+            self._pending.append((op, row))
+            self._save_soon()
+            return
+        self._journal.append(op, row)
+        if self._journal.pending >= self.compact_every:
+            self._save_soon()
+        self._disk_stamp = self.storage_stamp()
+
+    def _commit_many(self, op: str, rows: List[Dict[str, Any]]) -> None:
+        """Persist a batch of already-applied appends with one write."""
+        if self._db is not None:
+            self._db.commit(append={self._APPEND_OPS[op]: rows}, meta=self._ids.to_dict())
+            self._disk_stamp = self.storage_stamp()
+        elif self._journal is None:
+            self._pending.extend((op, r) for r in rows)
+            self._save_soon()
+        else:
+            self._journal.append_many(op, rows)
+            if self._journal.pending >= self.compact_every:
+                self._save_soon()
+            self._disk_stamp = self.storage_stamp()
+
+    def _save_soon(self) -> None:
+        """Queue a snapshot save: in the background with write_behind, else when the locked call returns."""
+        if self._saver is not None:
+            self._saver.mark_dirty()
+        elif getattr(self._tls, "depth", 0):
+            self._tls.save_due = True
+        else:
+            self._save_data()
+
+    def _document(self) -> Dict[str, Any]:
+        return {
             "students": self.students,
             "teachers": self.teachers,
             "courses": self.courses,
             "attendance": self.attendance,
             "finance_log": self.finance_log,
         }
-        with Path(self.data_path).open("w", encoding="utf-8") as f:
-            json.dump(d, f, indent=2)
+
+    @timed("schedule.save")
+    def _save_data(self) -> None:
+        with self._io_lock:
+            if self._db is None and self._journal is None:
+                self._compare_and_swap()
+            else:
+                with self._lock:
+                    d = {**self._document(), **self._ids.to_dict()}
+                    if self._db is not None:
+                        self._db.save(d)
+                    else:
+                        d["journal_seq"] = self._journal.seq
+                        atomic_write_json(self.data_path, d, pretty=not self.compact)
+                        # snapshot now holds every journaled record; start a fresh log
+                        self._journal.truncate()
+                self._disk_stamp = self.storage_stamp()
         logging.info("Data saved.")
 
+    def _compare_and_swap(self) -> None:
+        """Write the JSON snapshot under the file lock, merging first if another process saved since we did."""
+        with FileLock(self.data_path):
+            on_disk = stored_version(self.data_path)
+            with self._lock:
+                if on_disk is not None:
+                    changed = on_disk != self._version
+                else:       # no version header (older file, or written by another tool): fall back to the stamp
+                    changed = self.storage_stamp() != self._disk_stamp
+                if changed:
+                    self._merge_from_disk()
+                self._version += 1
+                # "version" goes first so stored_version() finds it in the file's first bytes
+                d = {"version": self._version, **self._document(), **self._ids.to_dict()}
+                data = dumps(d, pretty=not self.compact)
+                saved = len(self._pending)
+            # only serialization blocks mutators; the disk write happens outside the lock
+            atomic_write_bytes(self.data_path, data)
+            self._disk_stamp = self.storage_stamp()
+        with self._lock:
+            del self._pending[:saved]
+
+    def _merge_from_disk(self) -> None:
+        """Load what another process saved and replay our pending ops on top of it."""
+        d = self._read_document()
+        if d is None:
+            return
+        pending, self._pending = self._pending, []
+        self._install(d)
+        for op, row in pending:
+            row = self._rebase(op, row)
+            if row is not None:
+                self._apply(op, row)
+                self._pending.append((op, row))
+        logging.info("Merged %d pending change(s) onto version %d of %s saved by another process",
+                     len(self._pending), self._version, self.data_path)
+
+    def _rebase(self, op: str, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Fit one pending op onto a freshly merged state; None drops it (a lesson
+        that now clashes, or an op on a record that is gone). Ids were reserved
+        across processes, so nothing is renumbered; new records are replayed
+        as copies with their links cleared, as enrollments and lessons replay
+        as their own "enroll"/"add_lesson" ops.
+        """
+        row = dict(row)
+        if op == "add_student":
+            row["enrolled_course_ids"] = []
+        elif op == "add_course":
+            row.pop("enrolled_student_ids", None)
+            row.pop("lessons", None)
+        if op in ("add_student", "add_teacher", "add_course"):
+            return row
+        if "student_id" in row and row["student_id"] not in self._students_by_id:
+            return None
+        c = self._courses_by_id.get(row["course_id"]) if "course_id" in row else None
+        if "course_id" in row and c is None:
+            return None
+        if op == "add_lesson":
+            lesson = row["lesson"]
+            if self._conflicts.check(lesson["day"], lesson, room=lesson.get("room"), teacher_id=c.get("teacher_id")):
+                logging.warning("Dropped lesson %s of course %s: another process booked that slot first",
+                                lesson, row["course_id"])
+                return None
+        return row
+
+    def export_json(self, out_path: Union[str, Path]) -> None:
+        """Pretty-printed copy of the current data for people to read or diff."""
+        with self._lock:
+            data = dumps(self._document(), pretty=True)
+        atomic_write_bytes(out_path, data, keep_previous=False)
+
+    def storage_stamp(self) -> Any:
+        """Token that changes when the stored data changes (used to spot outside writers)."""
+        if self._db is not None:
+            return self._db.data_version()
+        journal = file_stamp(self._journal.path) if self._journal else None
+        return file_stamp(self.data_path), stored_version(self.data_path), journal
+
+    def has_unsaved_changes(self) -> bool:
+        return self._saver is not None and self._saver.pending > 0
+
+    def flush(self) -> None:
+        """Write out changes still waiting in the write-behind queue; raises if that save fails."""
+        if self._saver is not None:
+            self._saver.flush()
+
+    def close(self) -> None:
+        """Final save and release of files; re-raises a failed write-behind save."""
+        try:
+            if self._saver is not None:
+                self._saver.close()
+        finally:
+            if self._journal is not None:
+                self._journal.close()
+            if self._db is not None:
+                self._db.close()
+
+    # ---------- Indexes ----------
+    def _rebuild_indexes(self) -> None:
+        self._students_by_id = {s["id"]: s for s in self.students}
+        self._teachers_by_id = {t["id"]: t for t in self.teachers}
+        self._courses_by_id  = {c["id"]: c for c in self.courses}
+        self._enrollments = Enrollments((s["id"], cid) for s in self.students for cid in s.get("enrolled_course_ids", []))
+        self._conflicts = ConflictIndex()
+        for c in self.courses:
+            self._conflicts.index_course(c["id"], c.get("teacher_id"), c.get("lessons", []))
+        self._student_search = SearchIndex()
+        for st in self.students:
+            self._student_search.add(st["id"], st.get("name"), st.get("email"), record_id=st["id"])
+        self._teacher_search = SearchIndex()
+        for t in self.teachers:
+            self._teacher_search.add(t["id"], t.get("name"), t.get("speciality"), record_id=t["id"])
+        self._payments_by_student = {}
+        self._paid_by_student = {}
+        self._paid_by_method = {}
+        for p in self.finance_log:
+            self._index_payment(p)
+        self._attendance_index = AttendanceIndex()
+        for a in self.attendance:
+            self._attendance_index.add(a)
+
+    def _index_row(self, table: str, row: Dict[str, Any]) -> None:
+        if table == "students":
+            self._students_by_id[row["id"]] = row
+            for cid in row.get("enrolled_course_ids", []):
+                self._enrollments.add(row["id"], cid)
+            self._student_search.add(row["id"], row.get("name"), row.get("email"), record_id=row["id"])
+        elif table == "teachers":
+            self._teachers_by_id[row["id"]] = row
+            self._teacher_search.add(row["id"], row.get("name"), row.get("speciality"), record_id=row["id"])
+        elif table == "courses":
+            self._courses_by_id[row["id"]] = row
+            self._conflicts.index_course(row["id"], row.get("teacher_id"), row.get("lessons", []))
+        elif table == "finance_log":
+            self._index_payment(row)
+        elif table == "attendance":
+            self._attendance_index.add(row)
+
+    def _index_payment(self, p: Dict[str, Any]) -> None:
+        sid = p.get("student_id")
+        history = self._payments_by_student.setdefault(sid, [])
+        if not history or history[-1]["timestamp"] <= p["timestamp"]:
+            history.append(p)    # the common case: payments arrive in time order
+        else:
+            bisect.insort(history, p, key=lambda x: x["timestamp"])
+        amount = float(p.get("amount", 0.0))
+        self._paid_by_student[sid] = self._paid_by_student.get(sid, 0.0) + amount
+        method = p.get("method", "Unspecified")
+        self._paid_by_method[method] = self._paid_by_method.get(method, 0.0) + amount
+
     # ---------- Helpers ----------
     def _student_by_id(self, student_id: int) -> Optional[Dict[str, Any]]:
-        return next((s for s in self.students if s.get("id") == student_id), None)
+        return self._students_by_id.get(student_id)
+
+    def _teacher_by_id(self, teacher_id: int) -> Optional[Dict[str, Any]]:
+        return self._teachers_by_id.get(teacher_id)
 
     def _course_by_id(self, course_id: int) -> Optional[Dict[str, Any]]:
-        return next((c for c in self.courses if c.get("id") == course_id), None)
+        return self._courses_by_id.get(course_id)
+
+    # ---------- Lookups ----------
+    def get_student(self, student_id: int) -> Optional[Dict[str, Any]]:
+        return self._students_by_id.get(student_id)
+
+    def get_teacher(self, teacher_id: int) -> Optional[Dict[str, Any]]:
+        return self._teachers_by_id.get(teacher_id)
+
+    def get_course(self, course_id: int) -> Optional[Dict[str, Any]]:
+        return self._courses_by_id.get(course_id)
+
+    # ---------- Search ----------
+    @timed("schedule.search_students", sample_every=10)
+    def search_students(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Ranked top-k students by id, name/email prefix, substring or near-miss spelling."""
+        return [self._students_by_id[i] for i in self._student_search.search(query, k)]
+
+    def search_teachers(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        return [self._teachers_by_id[i] for i in self._teacher_search.search(query, k)]
 
     # ---------- CRUD (examples kept minimal) ----------
+    @_locked
     def add_student(self, name: str, email: str, enrolled_course_ids: Optional[List[int]] = None) -> Dict[str, Any]:
-        new_id = (max([s["id"] for s in self.students], default=0) + 1)
-        s = {"id": new_id, "name": name.strip(), "email": email.strip(), "enrolled_course_ids": enrolled_course_ids or []}
+        for cid in enrolled_course_ids or []:
+            if self._course_by_id(cid) is None:
+                raise ValueError("Course does not exist.")
+        new_id = self._ids.allocate("student")
+        s = {"id": new_id, "name": name.strip(), "email": email.strip(), "enrolled_course_ids": []}
         self.students.append(s)
-        self._save_data()
-        logging.info(f"Added student: {s}")
+        self._index_row("students", s)
+        self._commit("add_student", s)
+        logging.info("Added student: %s", s)
+        for cid in enrolled_course_ids or []:
+            self.enroll_student(new_id, cid)
         return s
 
+    @_locked
     def add_teacher(self, name: str, email: str) -> Dict[str, Any]:
-        new_id = (max([t["id"] for t in self.teachers], default=0) + 1)
+        new_id = self._ids.allocate("teacher")
         t = {"id": new_id, "name": name.strip(), "email": email.strip()}
         self.teachers.append(t)
-        self._save_data()
-        logging.info(f"Added teacher: {t}")
+        self._index_row("teachers", t)
+        self._commit("add_teacher", t)
+        logging.info("Added teacher: %s", t)
         return t
 
+    @_locked
     def add_course(self, title: str, teacher_id: int) -> Dict[str, Any]:
-        if not any(t["id"] == teacher_id for t in self.teachers):
+        if self._teacher_by_id(teacher_id) is None:
             raise ValueError("Teacher does not exist.")
-        new_id = (max([c["id"] for c in self.courses], default=0) + 1)
+        new_id = self._ids.allocate("course")
         c = {"id": new_id, "title": title.strip(), "teacher_id": teacher_id}
         self.courses.append(c)
-        self._save_data()
-        logging.info(f"Added course: {c}")
+        self._index_row("courses", c)
+        self._commit("add_course", c)
+        logging.info("Added course: %s", c)
         return c
 
+    # ---------- Enrollments ----------
+    def _link(self, student_id: int, course_id: int) -> bool:
+        """Add one enrollment to the relation and to both records' id lists."""
+        if not self._enrollments.add(student_id, course_id):
+            return False
+        self._students_by_id[student_id].setdefault("enrolled_course_ids", []).append(course_id)
+        self._courses_by_id[course_id].setdefault("enrolled_student_ids", []).append(student_id)
+        return True
+
+    @_locked
+    def enroll_student(self, student_id: int, course_id: int) -> bool:
+        """Enroll a student in a course; False if already enrolled."""
+        if self._student_by_id(student_id) is None or self._course_by_id(course_id) is None:
+            raise ValueError("Student or course does not exist.")
+        if not self._link(student_id, course_id):
+            return False
+        self._commit("enroll", {"student_id": student_id, "course_id": course_id})
+        logging.info("Enrolled student %s in course %s", student_id, course_id)
+        return True
+
+    @timed("schedule.students_in_course", sample_every=10)
+    def students_in_course(self, course_id: int) -> List[Dict[str, Any]]:
+        return [self._students_by_id[sid] for sid in self._enrollments.students_of(course_id)]
+
+    # ---------- Lessons & conflicts ----------
+    def find_conflicts(self, course_id: int, day: str, start_time: str, room: Optional[str] = None,
+                       duration: Optional[int] = None, end_time: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Room/teacher double-bookings a lesson for `course_id` would cause (empty = free)."""
+        c = self._course_by_id(course_id)
+        if c is None:
+            raise ValueError("Course does not exist.")
+        lesson = {"start_time": start_time, "duration": duration, "end_time": end_time}
+        return self._conflicts.check(day, lesson, room=room, teacher_id=c.get("teacher_id"))
+
+    def audit_conflicts(self) -> List[Dict[str, Any]]:
+        """Every overlapping pair of lessons in the school (same room or same teacher)."""
+        return self._conflicts.audit()
+
+    @_locked
+    def add_lesson(self, course_id: int, day: str, start_time: str, room: str = "",
+                   duration: Optional[int] = None) -> Dict[str, Any]:
+        c = self._course_by_id(course_id)
+        if c is None:
+            raise ValueError("Course does not exist.")
+        lesson = {"day": day, "start_time": start_time.strip(), "room": room.strip()}
+        if duration:
+            lesson["duration"] = int(duration)
+        if not day or lesson_span(lesson) is None:
+            raise ValueError("Invalid day or start time.")
+        clashes = self.find_conflicts(course_id, day, lesson["start_time"], room=lesson["room"], duration=duration)
+        if clashes:
+            first = clashes[0]
+            raise ValueError(f"{first['kind'].title()} {first['resource']} is already booked on "
+                             f"{day} at {first['start_time']} (course {first['course_id']}).")
+        lesson = {"lesson_id": self._ids.allocate("lesson"), **lesson}
+        c.setdefault("lessons", []).append(lesson)
+        self._index_row("courses", c)
+        self._commit("add_lesson", {"course_id": course_id, "lesson": lesson})
+        logging.info("Added lesson to course %s: %s", course_id, lesson)
+        return lesson
+
+    # ---------- Bulk import ----------
+    @_locked
+    def bulk_import(self, students: Optional[RowSource] = None, teachers: Optional[RowSource] = None,
+                    courses: Optional[RowSource] = None, enrollments: Optional[RowSource] = None) -> Dict[str, int]:
+        """
+        Import many records at once from CSV/JSON-lines files or iterables of dicts.
+        Rows may carry an explicit "id" (so enrollments can reference new students);
+        other ids are allocated as one block. Every row is validated before anything
+        is applied, and the result is committed with a single save.
+        Raises ValueError on the first invalid row; the manager is left unchanged.
+        """
+        t_rows = read_rows(teachers)
+        c_rows = read_rows(courses)
+        s_rows = read_rows(students)
+        e_rows = read_rows(enrollments)
+
+        with self._ids.batch():     # a failed validation leaves the counters untouched
+            t_ids = assign_ids(t_rows, "teacher", self._teachers_by_id, self._ids)
+            new_teachers = {
+                tid: {"id": tid, "name": str(r.get("name", "")).strip(), "email": str(r.get("email", "")).strip()}
+                for tid, r in zip(t_ids, t_rows)
+            }
+
+            c_ids = assign_ids(c_rows, "course", self._courses_by_id, self._ids)
+            new_courses = {}
+            for n, (cid, r) in enumerate(zip(c_ids, c_rows), 1):
+                tid = as_int(r, "teacher_id", "course", n)
+                if tid not in self._teachers_by_id and tid not in new_teachers:
+                    raise ValueError(f"course row {n}: teacher {tid} does not exist.")
+                new_courses[cid] = {"id": cid, "title": str(r.get("title", "")).strip(), "teacher_id": tid}
+
+            s_ids = assign_ids(s_rows, "student", self._students_by_id, self._ids)
+            new_students = {
+                sid: {"id": sid, "name": str(r.get("name", "")).strip(), "email": str(r.get("email", "")).strip(),
+                      "enrolled_course_ids": []}
+                for sid, r in zip(s_ids, s_rows)
+            }
+
+            links = []
+            for n, r in enumerate(e_rows, 1):
+                sid = as_int(r, "student_id", "enrollment", n)
+                cid = as_int(r, "course_id", "enrollment", n)
+                student = new_students.get(sid) or self._students_by_id.get(sid)
+                if student is None:
+                    raise ValueError(f"enrollment row {n}: student {sid} does not exist.")
+                if cid not in self._courses_by_id and cid not in new_courses:
+                    raise ValueError(f"enrollment row {n}: course {cid} does not exist.")
+                links.append((student, cid))
+
+        # everything validated -> apply and persist once
+        for table, rows in (("teachers", new_teachers), ("courses", new_courses), ("students", new_students)):
+            getattr(self, table).extend(rows.values())
+            for row in rows.values():
+                self._index_row(table, row)
+        for student, cid in links:
+            self._link(student["id"], cid)
+        if self._db is not None:
+            touched = {**{st["id"]: st for st, _ in links}, **new_students}
+            courses = {**{cid: self._courses_by_id[cid] for _, cid in links}, **new_courses}
+            self._db.commit(upsert={"teachers": new_teachers.values(), "courses": courses.values(),
+                                    "students": touched.values()}, meta=self._ids.to_dict())
+        else:
+            if self._journal is None:
+                self._pending.extend([("add_teacher", t) for t in new_teachers.values()]
+                                     + [("add_course", c) for c in new_courses.values()]
+                                     + [("add_student", st) for st in new_students.values()]
+                                     + [("enroll", {"student_id": st["id"], "course_id": cid}) for st, cid in links])
+            self._save_soon()
+
+        counts = {"students": len(new_students), "teachers": len(new_teachers),
+                  "courses": len(new_courses), "enrollments": len(links)}
+        logging.info("Bulk import committed: %s", counts)
+        return counts
+
     # ---------- Attendance / Roster ----------
-    def check_in(self, student_id: int, course_id: int) -> bool:
+    @timed("schedule.check_in")
+    @_locked
+    def check_in(self, student_id: int, course_id: int, status: str = "present") -> bool:
         student = self._student_by_id(student_id)
         course = self._course_by_id(course_id)
         if not student or not course:
             logging.warning("Check-in failed: invalid student or course.")
             return False
-        if course_id not in student.get("enrolled_course_ids", []):
+        if status not in STATUSES:
+            logging.warning("Check-in failed: unknown status %r.", status)
+            return False
+        if not self._enrollments.has(student_id, course_id):
             logging.warning("Check-in failed: student not enrolled in course.")
             return False
         entry = {
             "student_id": student_id,
             "course_id": course_id,
             "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "status": status,
         }
         self.attendance.append(entry)
-        self._save_data()
-        logging.info(f"Check-in OK: {entry}")
+        self._attendance_index.add(entry)
+        self._commit("check_in", entry)
+        logging.info("Check-in OK: %s", entry)
         return True
 
+    @timed("schedule.check_in_many")
+    @_locked
+    def check_in_many(self, course_id: int, marks: List[Tuple[int, str]], timestamp: Bound = None) -> int:
+        """
+        Record attendance for a whole class at once: one (student_id, status)
+        pair per student, all stamped with `timestamp` (default: now). Every
+        mark is checked against the indexes first; a bad one raises ValueError
+        and nothing is recorded. Returns the number of records, saved with a
+        single write.
+        """
+        if self._course_by_id(course_id) is None:
+            raise ValueError("Course does not exist.")
+        ts = _iso_bound(timestamp) or datetime.now().isoformat(timespec="seconds")
+        seen = set()
+        for sid, status in marks:
+            if status not in STATUSES:
+                raise ValueError(f"Unknown status {status!r} for student {sid}.")
+            if not self._enrollments.has(sid, course_id):
+                raise ValueError(f"Student {sid} is not enrolled in course {course_id}.")
+            if sid in seen:
+                raise ValueError(f"Student {sid} is marked twice.")
+            seen.add(sid)
+        entries = [{"student_id": sid, "course_id": course_id, "timestamp": ts, "status": status}
+                   for sid, status in marks]
+        if not entries:
+            return 0
+        self.attendance.extend(entries)
+        for e in entries:
+            self._attendance_index.add(e)
+        self._commit_many("check_in", entries)
+        logging.info("Checked in %d student(s) for course %s at %s", len(entries), course_id, ts)
+        return len(entries)
+
+    @timed("schedule.attendance_between", sample_every=10)
+    def attendance_between(self, start: Bound = None, end: Bound = None, course_id: Optional[int] = None,
+                           student_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Check-ins with start <= timestamp < end, oldest first, optionally for one course/student."""
+        return self._attendance_index.between(_iso_bound(start), _iso_bound(end), course_id, student_id)
+
+    @timed("schedule.course_attendance_stats", sample_every=10)
+    def course_attendance_stats(self, course_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Incrementally maintained per-course attendance aggregates (all courses if None)."""
+        ids = [course_id] if course_id is not None else self._attendance_index.course_ids()
+        return [self._attendance_index.course_stats(cid) for cid in ids]
+
     # ---------- FINANCE (new for PST5) ----------
+    @timed("schedule.record_payment")
+    @_locked
     def record_payment(self, student_id: int, amount: float, method: str) -> bool:
         student = self._student_by_id(student_id)
         if not student:
-            logging.error(f"record_payment failed: no student with id={student_id}")
+            logging.error("record_payment failed: no student with id=%s", student_id)
             return False
         if amount <= 0:
-            logging.error(f"record_payment failed: non-positive amount={amount}")
+            logging.error("record_payment failed: non-positive amount=%s", amount)
             return False
         payment = {
             "student_id": student_id,
@@ -118,33 +759,84 @@ class ScheduleManager:
             "timestamp": datetime.now().isoformat(timespec="seconds"),
         }
         self.finance_log.append(payment)
-        self._save_data()
-        logging.info(f"Payment recorded: {payment}")
+        self._index_payment(payment)
+        self._commit("record_payment", payment)
+        logging.info("Payment recorded: %s", payment)
         return True
 
     def get_payment_history(self, student_id: int) -> List[Dict[str, Any]]:
-        history = [p for p in self.finance_log if p.get("student_id") == student_id]
-        return sorted(history, key=lambda x: x["timestamp"], reverse=True)
+        """Payments for one student, newest first; O(k) in that student's payments."""
+        return self._payments_by_student.get(student_id, [])[::-1]
+
+    def get_balance(self, student_id: int) -> float:
+        """Total amount paid by a student so far."""
+        return self._paid_by_student.get(student_id, 0.0)
 
-    def export_report(self, kind: str, out_path: str) -> bool:
+    def get_totals_by_method(self) -> Dict[str, float]:
+        return dict(self._paid_by_method)
+
+    # ---------- Reports ----------
+    REPORT_HEADERS = {
+        "payments": ["student_id", "amount", "method", "timestamp"],
+        "attendance": ["student_id", "course_id", "timestamp", "status"],
+    }
+
+    def iter_report_rows(self, kind: str, start: Bound = None, end: Bound = None,
+                         student_id: Optional[int] = None, course_id: Optional[int] = None,
+                         method: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield report rows matching the filters. The date range is half-open,
+        start <= timestamp < end, so end=date(2025, 3, 1) covers all of February.
+        `method` matches case-insensitively and only filters payments; `course_id`
+        only filters attendance (the other kind has no such field and ignores it).
+        """
         kind = (kind or "").lower().strip()
+        if kind not in self.REPORT_HEADERS:
+            raise ValueError(f"Unknown report kind: {kind}")
         if kind == "payments":
-            rows = self.finance_log
-            headers = ["student_id", "amount", "method", "timestamp"]
-        elif kind == "attendance":
-            rows = self.attendance
-            headers = ["student_id", "course_id", "timestamp"]
+            rows, course_id = self.finance_log, None
         else:
-            logging.error(f"Unknown report kind: {kind}")
+            rows, method = self.attendance, None
+        lo, hi = _iso_bound(start), _iso_bound(end)
+        want_method = method.strip().lower() if method else None
+        for r in rows:
+            ts = r.get("timestamp", "")
+            if lo is not None and ts < lo:
+                continue
+            if hi is not None and ts >= hi:
+                continue
+            if student_id is not None and r.get("student_id") != student_id:
+                continue
+            if course_id is not None and r.get("course_id") != course_id:
+                continue
+            if want_method is not None and str(r.get("method", "")).lower() != want_method:
+                continue
+            yield r
+
+    @timed("schedule.export_report")
+    def export_report(self, kind: str, out_path: Union[str, Path, Any], start: Bound = None, end: Bound = None,
+                      student_id: Optional[int] = None, course_id: Optional[int] = None,
+                      method: Optional[str] = None, compress: Optional[bool] = None) -> bool:
+        """
+        Stream a filtered CSV report to a path or any writable file-like object
+        (text or binary). Rows are written as they are produced, so memory stays
+        flat. compress=None gzips when out_path ends in ".gz".
+        """
+        kind = (kind or "").lower().strip()
+        if kind not in self.REPORT_HEADERS:
+            logging.error("Unknown report kind: %s", kind)
             return False
+        headers = self.REPORT_HEADERS[kind]
+        if compress is None:
+            compress = isinstance(out_path, (str, Path)) and str(out_path).endswith(".gz")
+        rows = self.iter_report_rows(kind, start, end, student_id, course_id, method)
         try:
-            with open(out_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=headers)
+            with _text_sink(out_path, compress) as f:
+                writer = csv.DictWriter(f, fieldnames=headers, extrasaction="ignore", restval="")
                 writer.writeheader()
-                for r in rows:
-                    writer.writerow({h: r.get(h, "") for h in headers})
-            logging.info(f"Exported {kind} report to {out_path}")
+                writer.writerows(rows)
+            logging.info("Exported %s report to %s", kind, out_path)
             return True
         except Exception as e:
-            logging.exception(f"Failed to export report: {e}")
+            logging.exception("Failed to export report: %s", e)
             return False
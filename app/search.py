@@ -0,0 +1,168 @@
+import bisect
+import heapq
+from typing import Any, Dict, Hashable, List, Set
+
+# match levels for one query word against one record token
+EXACT, PREFIX, SUBSTRING, TYPO = 4.0, 3.0, 2.0, 1.0
+ID_MATCH = 5.0
+MIN_TYPO_LEN = 4     # shorter words/tokens are too ambiguous for typo matching
+
+
+def _norm(text: Any) -> str:
+    return " ".join(str(text or "").lower().split())
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _deletes(token: str) -> Set[str]:
+    """Deletion neighbourhood (edit distance 1) used for typo lookups, SymSpell-style."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class SearchIndex:
+    """
+    Incremental search over names / IDs / specialities.
+
+    Records are split into lowercase tokens. Per distinct token we keep:
+    a sorted list (prefix lookups by bisect), a trigram index (substrings)
+    and a deletion-neighbourhood index (one-typo matches). Every query word
+    must match some token of a record; results are ranked
+    exact id > exact word > prefix > substring > typo. The scan stops as soon
+    as k records reach the best score still possible, so popular names stay
+    cheap. add()/remove() are incremental; nothing is ever rebuilt.
+    """
+
+    def __init__(self):
+        self._docs: Dict[Hashable, str] = {}                 # key -> normalized text
+        self._ids: Dict[str, Set[Hashable]] = {}              # str(record id) -> keys
+        self._key_id: Dict[Hashable, str] = {}
+        self._token_keys: Dict[str, Set[Hashable]] = {}       # token -> keys
+        self._sorted_tokens: List[str] = []
+        self._grams: Dict[str, Set[str]] = {}                 # trigram -> tokens
+        self._typos: Dict[str, Set[str]] = {}                 # deletion variant -> tokens
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ---------- maintenance ----------
+    def add(self, key: Hashable, *fields: Any, record_id: Any = None) -> None:
+        """Index (or re-index) a record under `key`; `fields` are its searchable texts."""
+        if key in self._docs:
+            self.remove(key)
+        text = _norm(" ".join(str(f) for f in fields if f is not None))
+        self._docs[key] = text
+        for tok in set(text.split()):
+            keys = self._token_keys.get(tok)
+            if keys is None:
+                keys = self._token_keys[tok] = set()
+                self._add_token(tok)
+            keys.add(key)
+        if record_id is not None:
+            rid = str(record_id)
+            self._key_id[key] = rid
+            self._ids.setdefault(rid, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        text = self._docs.pop(key, None)
+        if text is None:
+            return
+        for tok in set(text.split()):
+            keys = self._token_keys[tok]
+            keys.discard(key)
+            if not keys:
+                del self._token_keys[tok]
+                self._drop_token(tok)
+        rid = self._key_id.pop(key, None)
+        if rid is not None:
+            self._ids[rid].discard(key)
+            if not self._ids[rid]:
+                del self._ids[rid]
+
+    def _add_token(self, tok: str) -> None:
+        bisect.insort(self._sorted_tokens, tok)
+        for g in _trigrams(tok):
+            self._grams.setdefault(g, set()).add(tok)
+        if len(tok) >= MIN_TYPO_LEN:
+            for v in _deletes(tok) | {tok}:
+                self._typos.setdefault(v, set()).add(tok)
+
+    def _drop_token(self, tok: str) -> None:
+        i = bisect.bisect_left(self._sorted_tokens, tok)
+        del self._sorted_tokens[i]
+        for index, variants in ((self._grams, _trigrams(tok)),
+                                (self._typos, _deletes(tok) | {tok} if len(tok) >= MIN_TYPO_LEN else ())):
+            for v in variants:
+                toks = index.get(v)
+                if toks is not None:
+                    toks.discard(tok)
+                    if not toks:
+                        del index[v]
+
+    # ---------- queries ----------
+    def _word_tokens(self, word: str, fuzzy: bool) -> Dict[str, float]:
+        """Tokens matching one query word, with their match level."""
+        out: Dict[str, float] = {}
+        toks = self._sorted_tokens
+        i = bisect.bisect_left(toks, word)
+        while i < len(toks) and toks[i].startswith(word):
+            out[toks[i]] = EXACT if toks[i] == word else PREFIX
+            i += 1
+        if len(word) >= 3:
+            postings = sorted((self._grams.get(g, set()) for g in _trigrams(word)), key=len)
+            for tok in postings[0].intersection(*postings[1:]):
+                if tok not in out and word in tok:
+                    out[tok] = SUBSTRING
+        if fuzzy and len(word) >= MIN_TYPO_LEN:
+            for v in _deletes(word) | {word}:
+                for tok in self._typos.get(v, ()):
+                    out.setdefault(tok, TYPO)
+        return out
+
+    def search(self, query: str, k: int = 10, fuzzy: bool = True) -> List[Hashable]:
+        """Return up to k keys, best match first."""
+        q = _norm(query)
+        if not q or k <= 0:
+            return []
+        scores: Dict[Hashable, float] = {key: ID_MATCH for key in self._ids.get(q, ())}
+
+        per_word = [self._word_tokens(w, fuzzy) for w in q.split()]
+        if not all(per_word):
+            return self._rank(scores, k)
+        # drive from the word with the fewest matching records, check the rest per record
+        per_word.sort(key=lambda m: sum(len(self._token_keys[t]) for t in m))
+        driver, rest = per_word[0], per_word[1:]
+        n_words = len(per_word)
+        rest_max = sum(max(m.values()) for m in rest)
+        for tok, level in sorted(driver.items(), key=lambda tl: (-tl[1], tl[0])):
+            # no later record can beat `bound`; once k records reach it we are done
+            bound = (level + rest_max) / n_words
+            strong = sum(1 for v in scores.values() if v >= bound)
+            if strong >= k:
+                break
+            for key in self._token_keys[tok]:
+                total = level
+                if rest:
+                    doc_toks = self._docs[key].split()
+                    for m in rest:
+                        best = max((m.get(t, 0.0) for t in doc_toks), default=0.0)
+                        if not best:
+                            total = 0.0
+                            break
+                        total += best
+                    total /= n_words
+                old = scores.get(key, 0.0)
+                if total > old:
+                    scores[key] = total
+                    if old < bound <= total:
+                        strong += 1
+                        if strong >= k:
+                            break
+            if strong >= k:
+                break
+        return self._rank(scores, k)
+
+    def _rank(self, scores: Dict[Hashable, float], k: int) -> List[Hashable]:
+        best_k = heapq.nsmallest(k, scores.items(), key=lambda kv: (-kv[1], self._docs[kv[0]]))
+        return [key for key, _ in best_k]
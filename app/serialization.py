@@ -0,0 +1,148 @@
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator, Union
+
+try:
+    import orjson        # optional: several times faster than the stdlib for big files
+except ImportError:
+    orjson = None
+
+PathLike = Union[str, Path]
+
+HAVE_ORJSON = orjson is not None
+_WS = re.compile(r"\s*")
+_STRUCT = re.compile(r'["{}\[\]]')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+
+
+def dumps(doc: Any, pretty: bool = False) -> bytes:
+    """Encode to UTF-8 JSON: compact by default, 2-space indented when pretty."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(doc, option=option)
+    if pretty:
+        return json.dumps(doc, indent=2).encode("utf-8")
+    return json.dumps(doc, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON; decode errors are json.JSONDecodeError with either backend."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_file(path: PathLike) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+class _Reader:
+    """Text buffer over a file that refills on demand (used by iter_section)."""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.more():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise json.JSONDecodeError(f"Expecting {ch!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self, decoder: json.JSONDecoder) -> Any:
+        """Decode one complete value, reading more text until it is whole."""
+        self.peek()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(self.buf, self.pos)
+                # a number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.more()
+
+    def skip(self) -> None:
+        """Step over one value without building it."""
+        ch = self.peek()
+        if ch not in "{[":
+            self.value(json.JSONDecoder())
+            return
+        depth = 0
+        while True:
+            m = _STRUCT.search(self.buf, self.pos)
+            if m is None:
+                self.pos = len(self.buf)
+                if not self.more():
+                    raise json.JSONDecodeError("Unterminated value", self.buf, self.pos)
+                continue
+            if m.group() == '"':
+                s = _STRING.match(self.buf, m.start())
+                if s is None:
+                    self.pos = m.start()
+                    if not self.more():
+                        raise json.JSONDecodeError("Unterminated string", self.buf, self.pos)
+                    continue
+                self.pos = s.end()
+                continue
+            depth += 1 if m.group() in "{[" else -1
+            self.pos = m.end()
+            if depth == 0:
+                return
+
+
+def iter_section(path: PathLike, key: str, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Yield the items of one top-level list (e.g. "attendance") without loading
+    the rest of the file; other sections are skipped, not decoded. Yields
+    nothing if the section is missing.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        r = _Reader(f, chunk_size)
+        r.expect("{")
+        if r.peek() == "}":
+            return
+        while True:
+            name = r.value(decoder)
+            r.expect(":")
+            if name != key:
+                r.skip()
+            elif r.peek() != "[":
+                raise ValueError(f"Section {key!r} is not a list.")
+            else:
+                r.pos += 1
+                if r.peek() == "]":
+                    return
+                while True:
+                    yield r.value(decoder)
+                    if r.peek() == "]":
+                        return
+                    r.expect(",")
+            if r.peek() == "}":
+                return
+            r.expect(",")
@@ -0,0 +1,111 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+class RWLock:
+    """Readers-writer lock; waiting writers block new readers so saves are not starved."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class SharedManager:
+    """
+    One ScheduleManager per process, shared by every Streamlit session.
+    Sessions talk to it through view(); calls listed in the manager's MUTATORS
+    take the write lock, everything else the read lock. If another process
+    rewrites the data file, the next view() reloads it (storage_stamp check).
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self.lock = RWLock()
+        self.manager = factory()
+        self.reloads = 0
+
+    def refresh(self) -> bool:
+        """Reload if the stored data changed under us; returns True on reload."""
+        with self.lock.write():
+            m = self.manager
+            if m.storage_stamp() == m._disk_stamp:
+                return False
+            if m.has_unsaved_changes():
+                logging.warning("Data file changed on disk while we hold unsaved changes; keeping ours.")
+                return False
+            if hasattr(m, "close"):
+                m.close()
+            self.manager = self._factory()
+            self.reloads += 1
+            logging.info("Shared manager reloaded after an outside change.")
+            return True
+
+    def view(self) -> "ManagerView":
+        self.refresh()
+        return ManagerView(self)
+
+    @contextmanager
+    def read(self) -> Iterator[Any]:
+        with self.lock.read():
+            yield self.manager
+
+    @contextmanager
+    def write(self) -> Iterator[Any]:
+        with self.lock.write():
+            yield self.manager
+
+
+class ManagerView:
+    """Per-session proxy over a SharedManager; looks like the manager itself to the GUI."""
+
+    def __init__(self, shared: SharedManager):
+        object.__setattr__(self, "_shared", shared)
+
+    def __getattr__(self, name: str) -> Any:
+        shared = self._shared
+        attr = getattr(shared.manager, name)
+        if not callable(attr):
+            return attr
+        lock = shared.lock.write if name in shared.manager.MUTATORS else shared.lock.read
+
+        def call(*args, **kwargs):
+            with lock():
+                # re-resolve: the manager may have been reloaded while we waited
+                return getattr(shared.manager, name)(*args, **kwargs)
+        return call
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ManagerView is read-only; use manager methods to change data.")
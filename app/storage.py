@@ -0,0 +1,156 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+ENTITY_TABLES = ("students", "teachers", "courses")
+LOG_TABLES = ("attendance", "finance_log")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (id INTEGER PRIMARY KEY, name TEXT NOT NULL DEFAULT '', body TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS teachers (id INTEGER PRIMARY KEY, name TEXT NOT NULL DEFAULT '', body TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS courses  (id INTEGER PRIMARY KEY, teacher_id INTEGER, body TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS attendance (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INTEGER, course_id INTEGER, timestamp TEXT, body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS finance_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INTEGER, method TEXT, timestamp TEXT, body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_students_name ON students (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS ix_courses_teacher ON courses (teacher_id);
+CREATE INDEX IF NOT EXISTS ix_attendance_student ON attendance (student_id, timestamp);
+CREATE INDEX IF NOT EXISTS ix_attendance_course ON attendance (course_id, timestamp);
+CREATE INDEX IF NOT EXISTS ix_attendance_ts ON attendance (timestamp);
+CREATE INDEX IF NOT EXISTS ix_finance_student ON finance_log (student_id, timestamp);
+CREATE INDEX IF NOT EXISTS ix_finance_ts ON finance_log (timestamp);
+"""
+
+
+def is_sqlite_path(path: Any) -> bool:
+    return str(path).lower().endswith(SQLITE_SUFFIXES)
+
+
+def _dump(row: Dict[str, Any]) -> str:
+    return json.dumps(row, separators=(",", ":"))
+
+
+class SqliteStorage:
+    """
+    SQLite (WAL mode) backend for both ScheduleManager flavours.
+    Records are stored whole as JSON in `body`, with the columns we query or
+    index on pulled out beside them. Every commit() is one transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def data_version(self) -> int:
+        """Changes whenever *another* connection commits (PRAGMA data_version)."""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # ---------- whole-document view ----------
+    def is_empty(self) -> bool:
+        return not any(
+            self.conn.execute(f"SELECT 1 FROM {t} LIMIT 1").fetchone()
+            for t in ENTITY_TABLES + LOG_TABLES + ("meta",)
+        )
+
+    def load(self) -> Dict[str, Any]:
+        """Return the same shape as msms.json: table lists plus meta fields."""
+        d: Dict[str, Any] = {}
+        for t in ENTITY_TABLES:
+            d[t] = [json.loads(b) for (b,) in self.conn.execute(f"SELECT body FROM {t} ORDER BY id")]
+        for t in LOG_TABLES:
+            d[t] = [json.loads(b) for (b,) in self.conn.execute(f"SELECT body FROM {t} ORDER BY seq")]
+        for key, value in self.conn.execute("SELECT key, value FROM meta"):
+            d[key] = json.loads(value)
+        return d
+
+    def save(self, doc: Dict[str, Any]) -> None:
+        """Replace everything with `doc` in a single transaction."""
+        with self.conn:
+            for t in ENTITY_TABLES + LOG_TABLES + ("meta",):
+                self.conn.execute(f"DELETE FROM {t}")
+            meta = {k: v for k, v in doc.items() if k not in ENTITY_TABLES + LOG_TABLES}
+            self._write(
+                upsert={t: doc.get(t, []) for t in ENTITY_TABLES},
+                append={t: doc.get(t, []) for t in LOG_TABLES},
+                meta=meta,
+            )
+
+    def clear(self) -> None:
+        self.save({})
+
+    # ---------- incremental writes ----------
+    def commit(self, upsert: Optional[Dict[str, Iterable[Dict[str, Any]]]] = None,
+               delete: Optional[Dict[str, Iterable[int]]] = None,
+               append: Optional[Dict[str, Iterable[Dict[str, Any]]]] = None,
+               meta: Optional[Dict[str, Any]] = None) -> None:
+        """Apply row-level changes atomically; only the touched rows are written."""
+        with self.conn:
+            self._write(upsert, delete, append, meta)
+
+    def _write(self, upsert=None, delete=None, append=None, meta=None) -> None:
+        c = self.conn
+        for t, rows in (upsert or {}).items():
+            if t == "courses":
+                c.executemany("INSERT OR REPLACE INTO courses (id, teacher_id, body) VALUES (?, ?, ?)",
+                              ((r["id"], r.get("teacher_id"), _dump(r)) for r in rows))
+            else:
+                c.executemany(f"INSERT OR REPLACE INTO {self._entity(t)} (id, name, body) VALUES (?, ?, ?)",
+                              ((r["id"], r.get("name", ""), _dump(r)) for r in rows))
+        for t, ids in (delete or {}).items():
+            c.executemany(f"DELETE FROM {self._entity(t)} WHERE id = ?", ((i,) for i in ids))
+        for t, rows in (append or {}).items():
+            if t == "attendance":
+                c.executemany("INSERT INTO attendance (student_id, course_id, timestamp, body) VALUES (?, ?, ?, ?)",
+                              ((r.get("student_id"), r.get("course_id"), r.get("timestamp"), _dump(r)) for r in rows))
+            elif t == "finance_log":
+                c.executemany("INSERT INTO finance_log (student_id, method, timestamp, body) VALUES (?, ?, ?, ?)",
+                              ((r.get("student_id"), r.get("method"), r.get("timestamp"), _dump(r)) for r in rows))
+            else:
+                raise ValueError(f"Unknown log table: {t}")
+        if meta:
+            c.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                          ((k, json.dumps(v)) for k, v in meta.items()))
+
+    @staticmethod
+    def _entity(table: str) -> str:
+        if table not in ENTITY_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        return table
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> Dict[str, int]:
+    """One-shot import of an existing msms.json into a fresh SQLite database."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    store = SqliteStorage(db_path)
+    try:
+        if not store.is_empty():
+            raise ValueError(f"{db_path} already contains data; refusing to overwrite.")
+        store.save(doc)
+    finally:
+        store.close()
+    return {t: len(doc.get(t, [])) for t in ENTITY_TABLES + LOG_TABLES}
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        print("usage: python -m app.storage <msms.json> <msms.db>")
+        sys.exit(2)
+    print(migrate_json_to_sqlite(sys.argv[1], sys.argv[2]))
@@ -2,6 +2,7 @@ from app.user import User
 
 class StudentUser(User):
     """Represents a student, inheriting from the base User class."""
+    __slots__ = ("enrolled_course_ids",)
     def __init__(self, user_id, name):
         # TODO: Call the parent class's __init__ method using super().
         super().__init__(user_id, name)
@@ -2,6 +2,7 @@ from app.user import User
 
 class TeacherUser(User):
     """Represents a teacher."""
+    __slots__ = ("speciality",)
     # TODO: Implement the TeacherUser class, inheriting from User.
     # It should have an additional 'speciality' attribute in its __init__.
     def __init__(self, user_id, name, speciality):
@@ -10,6 +11,7 @@ class TeacherUser(User):
 
 class Course:
     """Represents a single course offered by the school, linked to a teacher."""
+    __slots__ = ("id", "name", "instrument", "teacher_id", "enrolled_student_ids", "lessons")
     def __init__(self, course_id, name, instrument, teacher_id):
         self.id = course_id
         self.name = name
@@ -0,0 +1,86 @@
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def lesson_time(lesson: Dict[str, Any]) -> str:
+    """Seeded lessons use "time", msms.json lessons use "start_time"."""
+    return lesson.get("time") or lesson.get("start_time") or ""
+
+
+def time_key(t: str) -> Tuple[int, int]:
+    """"9:05" -> (9, 5) so unpadded times still sort correctly; junk sorts last."""
+    try:
+        h, m = t.split(":")[:2]
+        return int(h), int(m)
+    except (ValueError, AttributeError):
+        return 99, 99
+
+
+# one timetable slot: (sort key, roster row, teacher id, room)
+Slot = Tuple[Tuple[Any, ...], Dict[str, Any], int, str]
+
+
+class TimetableIndex:
+    """
+    Weekly roster precomputed per day, each day already sorted by time, with
+    teacher names resolved. Courses are (re)indexed one at a time, so editing
+    a lesson or renaming a teacher only touches the affected courses' slots.
+    """
+
+    def __init__(self):
+        self._by_day: Dict[str, List[Slot]] = {}
+        self._course_slots: Dict[int, List[Slot]] = {}
+        self._teacher_courses: Dict[int, set] = {}
+        self._course_teacher: Dict[int, int] = {}     # course id -> teacher it is listed under
+
+    def index_course(self, course: Any, teacher_name: str) -> None:
+        self.drop_course(course.id)
+        slots: List[Slot] = []
+        for ls in course.lessons:
+            day, t, room = ls.get("day"), lesson_time(ls), ls.get("room", "")
+            row = {
+                "Course": course.name,
+                "Instrument": course.instrument,
+                "Teacher": teacher_name,
+                "Day": day,
+                "Time": t,
+                "Room": room,
+                "Course ID": course.id,
+            }
+            slot = ((time_key(t), course.name, course.id, room), row, course.teacher_id, room)
+            bisect.insort(self._by_day.setdefault(day, []), slot, key=lambda s: s[0])
+            slots.append(slot)
+        self._course_slots[course.id] = slots
+        self._teacher_courses.setdefault(course.teacher_id, set()).add(course.id)
+        self._course_teacher[course.id] = course.teacher_id
+
+    def drop_course(self, course_id: int) -> None:
+        for slot in self._course_slots.pop(course_id, ()):
+            day_slots = self._by_day[slot[1]["Day"]]
+            i = bisect.bisect_left(day_slots, slot[0], key=lambda s: s[0])
+            while day_slots[i] is not slot:
+                i += 1
+            del day_slots[i]
+        # looked up directly: a course without lessons has no slots to find its teacher through
+        courses = self._teacher_courses.get(self._course_teacher.pop(course_id, None))
+        if courses:
+            courses.discard(course_id)
+
+    def courses_for_teacher(self, teacher_id: int) -> List[int]:
+        return sorted(self._teacher_courses.get(teacher_id, ()))
+
+    # ---------- views (rows are copies; callers may edit them freely) ----------
+    def day(self, day: str, room: Optional[str] = None, teacher_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [dict(s[1]) for s in self._by_day.get(day, ())
+                if (room is None or s[3] == room) and (teacher_id is None or s[2] == teacher_id)]
+
+    def days(self, start_day: str, end_day: str, **filters: Any) -> List[Dict[str, Any]]:
+        """Inclusive range in week order; wraps past Sunday (e.g. Saturday..Monday)."""
+        i, j = WEEKDAYS.index(start_day), WEEKDAYS.index(end_day)
+        span = (j - i) % len(WEEKDAYS)
+        rows: List[Dict[str, Any]] = []
+        for step in range(span + 1):
+            rows.extend(self.day(WEEKDAYS[(i + step) % len(WEEKDAYS)], **filters))
+        return rows
@@ -0,0 +1,199 @@
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.conflicts import lesson_span, to_minutes
+from app.timetable import WEEKDAYS
+
+DEFAULT_DAYS = WEEKDAYS[:5]
+DEFAULT_TIMES = ["15:00", "16:00", "17:00", "18:00", "19:00", "20:00"]
+LESSON_MINUTES = 60
+CLASH = 1000        # one hard clash (room, teacher or student double-booked)
+SAME_DAY = 1        # soft: two lessons of one course on the same day
+WALK = 0.05         # chance a clashing lesson jumps to a random slot instead of the cheapest
+
+# (day, start, end) in "HH:MM"
+Window = Tuple[str, str, str]
+
+
+def _allowed_slots(slots: Sequence[Tuple[str, str]], windows: Optional[Iterable[Window]]) -> List[int]:
+    if windows is None:
+        return list(range(len(slots)))
+    spans = [(d, to_minutes(a), to_minutes(b)) for d, a, b in windows]
+    out = []
+    for i, (day, t) in enumerate(slots):
+        start = to_minutes(t)
+        if any(d == day and a <= start and start + LESSON_MINUTES <= b for d, a, b in spans):
+            out.append(i)
+    return out
+
+
+def solve_timetable(courses: Sequence[Any], rooms: Dict[str, int],
+                    availability: Optional[Dict[int, Iterable[Window]]] = None,
+                    lessons_per_course: Optional[Dict[int, int]] = None,
+                    fixed: Sequence[Any] = (),
+                    days: Sequence[str] = DEFAULT_DAYS, times: Sequence[str] = DEFAULT_TIMES,
+                    seed: int = 0, max_rounds: int = 200, time_limit: float = 10.0) -> Dict[str, Any]:
+    """
+    Place the weekly lessons of `courses` (pst4 Course objects) into rooms and
+    hourly slots so that no room, teacher or enrolled student is double-booked.
+
+    rooms maps room name -> capacity; a lesson only goes into a room that fits
+    its course's enrollment. availability maps teacher id -> (day, from, to)
+    windows; teachers without an entry can teach any slot. lessons_per_course
+    defaults to how many lessons a course has now (at least one). Lessons of
+    `fixed` courses are left where they are and block their slots.
+
+    Greedy seeding (hardest lessons first, best-fit room) is followed by a
+    min-conflicts local search that moves clashing lessons to their cheapest
+    slot, then a pass spreading each course's lessons over different days.
+
+    Returns {"lessons": {course_id: [lesson, ...]}, "clashes": lessons still
+    clashing, "penalty": same-day pairs, "rounds": search rounds used}.
+    Raises ValueError when a course cannot be placed at all (no room large
+    enough or no available slot).
+    """
+    rng = random.Random(seed)
+    slots = [(d, t) for d in days for t in times]
+    by_cap = sorted(rooms.items(), key=lambda rc: (rc[1], rc[0]))
+    availability = availability or {}
+
+    room_busy: Dict[Tuple[int, str], int] = {}
+    teacher_busy: Dict[Tuple[int, int], int] = {}
+    student_busy: Dict[Tuple[int, int], int] = {}
+    course_days: Dict[Tuple[int, str], int] = {}
+
+    def book(slot: int, room: str, c: Any, step: int) -> None:
+        for table, key in ((room_busy, (slot, room)), (teacher_busy, (slot, c.teacher_id)),
+                           (course_days, (c.id, slots[slot][0]))):
+            table[key] = table.get(key, 0) + step
+        for sid in c.enrolled_student_ids:
+            student_busy[(slot, sid)] = student_busy.get((slot, sid), 0) + step
+
+    for c in fixed:
+        for ls in c.lessons:
+            span = lesson_span(ls)
+            if span is None:
+                continue
+            # block every grid slot the fixed lesson overlaps, on-grid or not
+            for i, (day, t) in enumerate(slots):
+                start = to_minutes(t)
+                if day == ls.get("day") and start < span[1] and span[0] < start + LESSON_MINUTES:
+                    book(i, ls.get("room", ""), c, 1)
+
+    # one entry per lesson to place: [course, allowed slots, fitting rooms, slot, room]
+    lessons: List[list] = []
+    teacher_load: Dict[int, int] = {}
+    for c in courses:
+        size = len(c.enrolled_student_ids)
+        fits = [r for r, cap in by_cap if cap >= size]
+        if not fits:
+            raise ValueError(f"Course {c.id} has {size} students; no room is large enough.")
+        allowed = _allowed_slots(slots, availability.get(c.teacher_id))
+        if not allowed:
+            raise ValueError(f"Teacher {c.teacher_id} has no available slot for course {c.id}.")
+        n = (lessons_per_course or {}).get(c.id, max(1, len(c.lessons)))
+        lessons.extend([c, allowed, fits, None, None] for _ in range(n))
+        teacher_load[c.teacher_id] = teacher_load.get(c.teacher_id, 0) + n
+        if teacher_load[c.teacher_id] > len(allowed):
+            raise ValueError(f"Teacher {c.teacher_id} has more lessons than available slots.")
+
+    # pigeonhole: lessons of size >= n must fit in the room-slots of rooms holding n
+    sizes: Dict[int, int] = {}
+    for e in lessons:
+        n = len(e[0].enrolled_student_ids)
+        sizes[n] = sizes.get(n, 0) + 1
+    waiting = 0
+    for n in sorted(sizes, reverse=True):
+        waiting += sizes[n]
+        if waiting > sum(1 for cap in rooms.values() if cap >= n) * len(slots):
+            raise ValueError(f"Not enough room-slots for the {waiting} lessons with {n}+ students.")
+
+    def clashes(slot: int, room: str, c: Any) -> int:
+        n = room_busy.get((slot, room), 0) + teacher_busy.get((slot, c.teacher_id), 0)
+        for sid in c.enrolled_student_ids:
+            n += student_busy.get((slot, sid), 0)
+        return n
+
+    def best_move(entry: list) -> Tuple[int, int, str]:
+        c, allowed, fits = entry[0], entry[1], entry[2]
+        best: Tuple[int, float, int, str] = (0, 0.0, -1, "")
+        for slot in allowed:
+            people = teacher_busy.get((slot, c.teacher_id), 0)
+            for sid in c.enrolled_student_ids:
+                people += student_busy.get((slot, sid), 0)
+            if best[2] >= 0 and people * CLASH > best[0]:
+                continue
+            # best fit: the smallest free room that holds the class
+            room = next((r for r in fits if not room_busy.get((slot, r))), fits[0])
+            cost = (people + room_busy.get((slot, room), 0)) * CLASH
+            cost += course_days.get((c.id, slots[slot][0]), 0) * SAME_DAY
+            key = (cost, rng.random(), slot, room)
+            if best[2] < 0 or key < best:
+                best = key
+        return best[0], best[2], best[3]
+
+    # greedy seeding: most constrained lessons first
+    lessons.sort(key=lambda e: (len(e[1]), -len(e[0].enrolled_student_ids), len(e[2])))
+    for entry in lessons:
+        _, slot, room = best_move(entry)
+        entry[3], entry[4] = slot, room
+        book(slot, room, entry[0], 1)
+
+    def placed_clashes(entry: list) -> int:
+        # the lesson itself is booked, so anything above 1 per table is a clash
+        c, slot, room = entry[0], entry[3], entry[4]
+        return clashes(slot, room, c) - 2 - len(c.enrolled_student_ids)
+
+    def relocate(entry: list) -> None:
+        book(entry[3], entry[4], entry[0], -1)
+        _, slot, room = best_move(entry)
+        entry[3], entry[4] = slot, room
+        book(slot, room, entry[0], 1)
+
+    # local search: min-conflicts moves plus an occasional random walk; keep the best plan seen
+    deadline = time.monotonic() + time_limit
+    rounds = 0
+    best_plan = [(e[3], e[4]) for e in lessons]
+    best_bad = sum(1 for e in lessons if placed_clashes(e) > 0)
+    while best_bad and rounds < max_rounds and time.monotonic() < deadline:
+        bad = [e for e in lessons if placed_clashes(e) > 0]
+        if not bad:
+            break
+        rounds += 1
+        rng.shuffle(bad)
+        for entry in bad:
+            if placed_clashes(entry) <= 0:
+                continue
+            if rng.random() < WALK:
+                book(entry[3], entry[4], entry[0], -1)
+                entry[3] = rng.choice(entry[1])
+                entry[4] = next((r for r in entry[2] if not room_busy.get((entry[3], r))), entry[2][0])
+                book(entry[3], entry[4], entry[0], 1)
+            else:
+                relocate(entry)
+        n_bad = sum(1 for e in lessons if placed_clashes(e) > 0)
+        if n_bad < best_bad:
+            best_bad, best_plan = n_bad, [(e[3], e[4]) for e in lessons]
+    if best_bad != sum(1 for e in lessons if placed_clashes(e) > 0):
+        for e, (slot, room) in zip(lessons, best_plan):
+            book(e[3], e[4], e[0], -1)
+            e[3], e[4] = slot, room
+            book(slot, room, e[0], 1)
+
+    # soft pass: spread a course's lessons over different days where that is free
+    for entry in lessons:
+        if time.monotonic() >= deadline:
+            break
+        if course_days.get((entry[0].id, slots[entry[3]][0]), 0) > 1 and placed_clashes(entry) == 0:
+            relocate(entry)
+
+    result: Dict[int, List[Dict[str, str]]] = {c.id: [] for c in courses}
+    for c, _, _, slot, room in lessons:
+        day, t = slots[slot]
+        result[c.id].append({"day": day, "time": t, "room": room})
+    for ls in result.values():
+        ls.sort(key=lambda x: (WEEKDAYS.index(x["day"]), to_minutes(x["time"])))
+    clash_total = sum(1 for e in lessons if placed_clashes(e) > 0)
+    penalty = sum(n - 1 for n in course_days.values() if n > 1) * SAME_DAY
+    return {"lessons": result, "clashes": clash_total, "penalty": penalty, "rounds": rounds}
@@ -1,5 +1,6 @@
 class User:
     """A base class for all users in the system."""
+    __slots__ = ("id", "name")
     def __init__(self, user_id, name):
         self.id = user_id
         self.name = name
\ No newline at end of file
@@ -0,0 +1,384 @@
+"""
+Persistent (immutable) maps and a linear version history for undo/redo.
+
+PMap is a hash array mapped trie. set() and delete() copy only the path from
+the root to the changed entry (at most seven nodes of up to 32 slots); the
+rest of the trie is shared with the previous version. Keeping a version is
+therefore just keeping a reference. diff() skips every subtree two versions
+share, so comparing neighbouring versions costs O(changes), not O(size).
+
+History keeps one PMap per table ("students", "courses", ...) per version.
+Values are record dicts that are never mutated once stored; frozen() makes
+such a copy of a manager's live record.
+"""
+import time
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 35                     # 7 levels of 5 bits; equal 35-bit hashes share a collision node
+_HASH_MASK = (1 << _HASH_BITS) - 1
+_MISSING = object()
+
+Change = Tuple[Any, Optional[Any], Optional[Any]]       # (key, old value or None, new value or None)
+
+
+class _Node:
+    """Bitmap-indexed trie node; items are leaves (hash, key, value), _Nodes or _Collisions."""
+
+    __slots__ = ("bitmap", "items")
+
+    def __init__(self, bitmap: int, items: tuple):
+        self.bitmap = bitmap
+        self.items = items
+
+
+class _Collision:
+    __slots__ = ("hash", "pairs")
+
+    def __init__(self, h: int, pairs: tuple):
+        self.hash = h
+        self.pairs = pairs
+
+
+_EMPTY = _Node(0, ())
+
+
+def _hash(key: Any) -> int:
+    return hash(key) & _HASH_MASK
+
+
+def _slot(bitmap: int, bit: int) -> int:
+    return bin(bitmap & (bit - 1)).count("1")
+
+
+def _replace(items: tuple, i: int, item: Any) -> tuple:
+    return items[:i] + (item,) + items[i + 1:]
+
+
+def _merge(a: tuple, b: tuple, shift: int) -> Any:
+    """Subtree holding two leaves whose hashes agree below `shift`."""
+    if shift >= _HASH_BITS:
+        return _Collision(a[0], ((a[1], a[2]), (b[1], b[2])))
+    ia, ib = (a[0] >> shift) & _MASK, (b[0] >> shift) & _MASK
+    if ia == ib:
+        return _Node(1 << ia, (_merge(a, b, shift + _BITS),))
+    return _Node((1 << ia) | (1 << ib), (a, b) if ia < ib else (b, a))
+
+
+def _get(node: Any, h: int, key: Any) -> Any:
+    shift = 0
+    while True:
+        if isinstance(node, _Collision):
+            for k, v in node.pairs:
+                if k == key:
+                    return v
+            return _MISSING
+        bit = 1 << ((h >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return _MISSING
+        item = node.items[_slot(node.bitmap, bit)]
+        if isinstance(item, tuple):
+            return item[2] if item[0] == h and item[1] == key else _MISSING
+        node, shift = item, shift + _BITS
+
+
+def _assoc(node: Any, h: int, shift: int, key: Any, value: Any) -> Tuple[Any, bool]:
+    """(new subtree, whether the key is new); returns `node` itself when nothing changes."""
+    if isinstance(node, _Collision):
+        for i, (k, v) in enumerate(node.pairs):
+            if k == key:
+                if v is value:
+                    return node, False
+                return _Collision(h, _replace(node.pairs, i, (key, value))), False
+        return _Collision(h, node.pairs + ((key, value),)), True
+    bit = 1 << ((h >> shift) & _MASK)
+    i = _slot(node.bitmap, bit)
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, node.items[:i] + ((h, key, value),) + node.items[i:]), True
+    item = node.items[i]
+    if isinstance(item, tuple):
+        if item[0] == h and item[1] == key:
+            if item[2] is value:
+                return node, False
+            return _Node(node.bitmap, _replace(node.items, i, (h, key, value))), False
+        return _Node(node.bitmap, _replace(node.items, i, _merge(item, (h, key, value), shift + _BITS))), True
+    sub, added = _assoc(item, h, shift + _BITS, key, value)
+    if sub is item:
+        return node, False
+    return _Node(node.bitmap, _replace(node.items, i, sub)), added
+
+
+def _dissoc(node: Any, h: int, shift: int, key: Any) -> Any:
+    """Subtree without `key`: `node` itself if absent, None if now empty, a bare leaf if one is left."""
+    if isinstance(node, _Collision):
+        pairs = tuple(p for p in node.pairs if p[0] != key)
+        if len(pairs) == len(node.pairs):
+            return node
+        return (h, *pairs[0]) if len(pairs) == 1 else _Collision(h, pairs)
+    bit = 1 << ((h >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node
+    i = _slot(node.bitmap, bit)
+    item = node.items[i]
+    if isinstance(item, tuple):
+        if not (item[0] == h and item[1] == key):
+            return node
+        sub = None
+    else:
+        sub = _dissoc(item, h, shift + _BITS, key)
+        if sub is item:
+            return node
+    if sub is None:
+        bitmap, items = node.bitmap & ~bit, node.items[:i] + node.items[i + 1:]
+        if not items:
+            return None
+    else:
+        bitmap, items = node.bitmap, _replace(node.items, i, sub)
+    if shift and len(items) == 1 and isinstance(items[0], tuple):
+        return items[0]         # a lone leaf moves up to its parent
+    return _Node(bitmap, items)
+
+
+def _build(leaves: List[tuple], shift: int) -> Any:
+    """Trie over leaves with distinct keys, in one pass per level (bulk load)."""
+    if len(leaves) == 1 and shift:
+        return leaves[0]
+    if shift >= _HASH_BITS:
+        return _Collision(leaves[0][0], tuple((k, v) for _, k, v in leaves))
+    groups: Dict[int, List[tuple]] = {}
+    for leaf in leaves:
+        groups.setdefault((leaf[0] >> shift) & _MASK, []).append(leaf)
+    bitmap = 0
+    for i in groups:
+        bitmap |= 1 << i
+    return _Node(bitmap, tuple(_build(groups[i], shift + _BITS) for i in sorted(groups)))
+
+
+def _items(node: Any) -> Iterator[Tuple[Any, Any]]:
+    if node is None:
+        return
+    if isinstance(node, tuple):
+        yield node[1], node[2]
+    elif isinstance(node, _Collision):
+        yield from node.pairs
+    else:
+        for item in node.items:
+            yield from _items(item)
+
+
+def _diff(a: Any, b: Any, out: List[Change]) -> None:
+    if a is b:
+        return
+    if isinstance(a, _Node) and isinstance(b, _Node):
+        for n in range(1 << _BITS):
+            bit = 1 << n
+            if (a.bitmap | b.bitmap) & bit:
+                x = a.items[_slot(a.bitmap, bit)] if a.bitmap & bit else None
+                y = b.items[_slot(b.bitmap, bit)] if b.bitmap & bit else None
+                _diff(x, y, out)
+        return
+    # differently shaped (or leaf) subtrees are small: compare their contents directly
+    old, new = dict(_items(a)), dict(_items(b))
+    for key, v in old.items():
+        w = new.pop(key, None)
+        if v is not w and v != w:
+            out.append((key, v, w))
+    out.extend((key, None, w) for key, w in new.items())
+
+
+class PMap:
+    """Immutable mapping; set()/delete()/update() return a new PMap sharing structure with this one."""
+
+    __slots__ = ("_root", "_len")
+
+    def __init__(self, items: Iterable[Tuple[Any, Any]] = ()):
+        unique = dict(items)
+        self._root = _build([(_hash(k), k, v) for k, v in unique.items()], 0) if unique else _EMPTY
+        self._len = len(unique)
+
+    @classmethod
+    def _make(cls, root: Any, length: int) -> "PMap":
+        m = cls.__new__(cls)
+        m._root, m._len = root, length
+        return m
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, key: Any) -> bool:
+        return _get(self._root, _hash(key), key) is not _MISSING
+
+    def __getitem__(self, key: Any) -> Any:
+        v = _get(self._root, _hash(key), key)
+        if v is _MISSING:
+            raise KeyError(key)
+        return v
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        v = _get(self._root, _hash(key), key)
+        return default if v is _MISSING else v
+
+    def __iter__(self) -> Iterator[Any]:
+        return (k for k, _ in _items(self._root))
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        return _items(self._root)
+
+    def values(self) -> Iterator[Any]:
+        return (v for _, v in _items(self._root))
+
+    def set(self, key: Any, value: Any) -> "PMap":
+        root, added = _assoc(self._root, _hash(key), 0, key, value)
+        return self if root is self._root else PMap._make(root, self._len + added)
+
+    def delete(self, key: Any) -> "PMap":
+        root = _dissoc(self._root, _hash(key), 0, key)
+        if root is self._root:
+            return self
+        if root is None:
+            root = _EMPTY
+        elif isinstance(root, tuple):       # cannot happen at the root, kept for safety
+            root = _Node(1 << (root[0] & _MASK), (root,))
+        return PMap._make(root, self._len - 1)
+
+    def update(self, changes: Dict[Any, Any]) -> "PMap":
+        """Apply {key: value}; a value of None deletes the key."""
+        m = self
+        for key, value in changes.items():
+            m = m.delete(key) if value is None else m.set(key, value)
+        return m
+
+    def diff(self, other: "PMap") -> List[Change]:
+        """(key, value here, value in other) for every key that differs; None marks absence."""
+        out: List[Change] = []
+        _diff(self._root, other._root, out)
+        return out
+
+
+def frozen(record: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of a record dict that shares no lists (or lesson dicts) with the live one."""
+    out = dict(record)
+    for k, v in out.items():
+        if isinstance(v, list):
+            out[k] = [dict(x) if isinstance(x, dict) else x for x in v]
+    return out
+
+
+class Version(NamedTuple):
+    label: str
+    tables: Dict[str, PMap]         # never mutated once the version exists
+    created: float
+
+
+def diff(a: Version, b: Version) -> Dict[str, List[Change]]:
+    """Per-table (id, record in a, record in b) for everything that differs between a and b."""
+    out = {}
+    for name, table in b.tables.items():
+        changes = a.tables.get(name, PMap()).diff(table)
+        if changes:
+            out[name] = changes
+    return out
+
+
+def merge_record(base: Dict[str, Any], ours: Dict[str, Any], theirs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Three-way merge of one record another writer also saved: the fields we
+    changed since `base` win, the rest stay as `theirs` has them. List fields
+    (enrolments, lessons) merge item by item, so both writers' additions stay.
+    """
+    out = dict(theirs)
+    for key in {**base, **ours}:
+        was, mine = base.get(key, _MISSING), ours.get(key, _MISSING)
+        if mine == was:
+            continue
+        if mine is _MISSING:
+            out.pop(key, None)
+        elif isinstance(mine, list) and isinstance(was, list) and isinstance(out.get(key), list):
+            dropped = [x for x in was if x not in mine]
+            kept = [x for x in out[key] if x not in dropped]
+            out[key] = kept + [x for x in mine if x not in was and x not in kept]
+        else:
+            out[key] = mine
+    return out
+
+
+def merge_into(tables: Dict[str, List[Dict[str, Any]]], changes: Dict[str, List[Change]]) -> None:
+    """
+    Lay our diff() since the last save over another writer's document
+    ({table: [record, ...]}, changed in place). A record we edited that the
+    other writer deleted stays deleted.
+    """
+    for name, rows in changes.items():
+        records = tables.setdefault(name, [])
+        positions = {r["id"]: i for i, r in enumerate(records)}
+        gone = set()
+        for record_id, old, new in rows:
+            if new is None:
+                gone.add(record_id)
+            elif record_id in positions:
+                records[positions[record_id]] = merge_record(old or {}, frozen(new), records[positions[record_id]])
+            elif old is None:
+                records.append(frozen(new))
+        if gone:
+            tables[name] = [r for r in records if r["id"] not in gone]
+
+
+class History:
+    """
+    Linear undo/redo over versions of a set of tables. commit() records what
+    one operation changed; undo()/redo() move along the list and return the
+    pair of versions to go from/to. Committing after an undo drops the redo
+    tail. Only the newest `limit` operations stay undoable.
+    """
+
+    def __init__(self, tables: Dict[str, Iterable[Tuple[Any, Any]]], limit: int = 50, label: str = "loaded"):
+        self.limit = limit
+        self._versions: List[Version] = [Version(label, {n: PMap(rows) for n, rows in tables.items()}, time.time())]
+        self._pos = 0
+
+    @property
+    def current(self) -> Version:
+        return self._versions[self._pos]
+
+    def commit(self, label: str, changes: Dict[str, Dict[Any, Optional[Any]]]) -> Version:
+        """New version from {table: {id: record, or None if deleted}} applied to the current one."""
+        tables = dict(self.current.tables)
+        for name, rows in changes.items():
+            tables[name] = tables[name].update(rows)
+        return self._push(Version(label, tables, time.time()))
+
+    def replace(self, label: str, tables: Dict[str, Iterable[Tuple[Any, Any]]]) -> Version:
+        """New version with whole tables rebuilt (e.g. after a reset)."""
+        return self._push(Version(label, {n: PMap(rows) for n, rows in tables.items()}, time.time()))
+
+    def _push(self, version: Version) -> Version:
+        del self._versions[self._pos + 1:]
+        self._versions.append(version)
+        if len(self._versions) > self.limit + 1:
+            del self._versions[0]
+        self._pos = len(self._versions) - 1
+        return version
+
+    def undo_label(self) -> Optional[str]:
+        return self._versions[self._pos].label if self._pos > 0 else None
+
+    def redo_label(self) -> Optional[str]:
+        return self._versions[self._pos + 1].label if self._pos + 1 < len(self._versions) else None
+
+    def undo(self) -> Optional[Tuple[Version, Version]]:
+        """(version being left, version to restore), or None if there is nothing to undo."""
+        if self._pos == 0:
+            return None
+        self._pos -= 1
+        return self._versions[self._pos + 1], self._versions[self._pos]
+
+    def redo(self) -> Optional[Tuple[Version, Version]]:
+        if self._pos + 1 >= len(self._versions):
+            return None
+        self._pos += 1
+        return self._versions[self._pos - 1], self._versions[self._pos]
+
+    def versions(self) -> List[Version]:
+        """Every retained version, oldest first."""
+        return list(self._versions)
@@ -0,0 +1,94 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+
+class WriteBehind:
+    """
+    Coalesces bursts of "please save" requests into one background save.
+    A save runs `interval_ms` after the first unsaved change, or as soon as
+    `max_pending` changes have piled up, whichever comes first. flush() saves
+    synchronously; close() (also run at interpreter shutdown) does a final one.
+    A failed background save is logged and retried; flush() and close()
+    re-raise the error so callers know their changes did not reach disk.
+    """
+
+    def __init__(self, save_fn: Callable[[], None], interval_ms: int = 500, max_pending: int = 100):
+        self._save_fn = save_fn
+        self.interval = interval_ms / 1000.0
+        self.max_pending = max_pending
+        self._cond = threading.Condition()
+        self._save_lock = threading.Lock()      # one save at a time
+        self._pending = 0
+        self._dirty_since = 0.0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.saves = 0                          # completed saves, handy for tests/metrics
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def mark_dirty(self) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehind is closed.")
+            if self._pending == 0:
+                self._dirty_since = time.monotonic()
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="msms-write-behind", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self) -> None:
+        """Save now if anything is pending; returns once it is on disk, else raises (changes stay pending)."""
+        self._save_pending(raise_errors=True)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        try:
+            self._save_pending(raise_errors=True)
+        finally:
+            atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending == 0 and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return          # close() does the final flush
+                while self._pending < self.max_pending and not self._closed:
+                    remaining = self._dirty_since + self.interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            self._save_pending()
+
+    def _save_pending(self, raise_errors: bool = False) -> None:
+        with self._save_lock:
+            with self._cond:
+                taken = self._pending
+                self._pending = 0
+            if not taken:
+                return
+            try:
+                self._save_fn()
+                self.saves += 1
+            except Exception:
+                with self._cond:
+                    self._dirty_since = time.monotonic()   # back off one interval
+                    self._pending += taken
+                if raise_errors:
+                    raise
+                logging.exception("Background save failed; will retry.")
@@ -0,0 +1,104 @@
+"""
+Per-record memory of loaded students/courses: old dict-backed classes vs the
+slotted, lazily hydrated models in app/models.py (and plain dict records, as
+app/schedule.py keeps them, for reference).
+
+    python -m benchmarks.bench_memory [--records 100000]
+"""
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from typing import Callable, List
+
+from app.models import Course, Student
+
+
+class _PlainStudent:
+    """The pre-slots Student: instance __dict__ and an eager list."""
+
+    def __init__(self, _id, name):
+        self.id = _id
+        self.name = name
+        self.enrolled_course_ids = []
+
+
+class _PlainCourse:
+    def __init__(self, _id, name, instrument, teacher_id):
+        self.id = _id
+        self.name = name
+        self.instrument = instrument
+        self.teacher_id = teacher_id
+        self.enrolled_student_ids = []
+        self.lessons = []
+
+
+def make_document(n: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    n_courses = max(1, n // 10)
+    students = [{"id": i, "name": f"Student {i}",
+                 "enrolled_course_ids": rng.sample(range(1, n_courses + 1), rng.choice([0, 0, 1, 1, 2]))}
+                for i in range(1, n + 1)]
+    courses = [{"id": i, "name": f"Course {i}", "instrument": "Piano", "teacher_id": 1,
+                "enrolled_student_ids": [], "lessons": [{"day": "Monday", "time": "16:00"}] * rng.choice([0, 1, 2])}
+               for i in range(1, n_courses + 1)]
+    return json.dumps({"students": students, "courses": courses})
+
+
+def load_plain(doc: dict) -> List[object]:
+    out: List[object] = []
+    for s in doc["students"]:
+        st = _PlainStudent(int(s["id"]), s["name"])
+        st.enrolled_course_ids = s.get("enrolled_course_ids", [])
+        out.append(st)
+    for c in doc["courses"]:
+        cr = _PlainCourse(int(c["id"]), c["name"], c.get("instrument", ""), int(c["teacher_id"]))
+        cr.enrolled_student_ids = c.get("enrolled_student_ids", [])
+        cr.lessons = c.get("lessons", [])
+        out.append(cr)
+    return out
+
+
+def load_slotted(doc: dict) -> List[object]:
+    out: List[object] = [Student(int(s["id"]), s["name"], s.get("enrolled_course_ids")) for s in doc["students"]]
+    out.extend(Course(int(c["id"]), c["name"], c.get("instrument", ""), int(c["teacher_id"]),
+                      c.get("enrolled_student_ids"), c.get("lessons")) for c in doc["courses"])
+    return out
+
+
+def load_dicts(doc: dict) -> List[object]:
+    return doc["students"] + doc["courses"]
+
+
+def retained_bytes(text: str, loader: Callable[[dict], List[object]]) -> int:
+    """Bytes still allocated once the parsed document itself is dropped."""
+    gc.collect()
+    tracemalloc.start()
+    doc = json.loads(text)
+    records = loader(doc)
+    del doc
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--records", type=int, default=100_000)
+    args = ap.parse_args()
+
+    text = make_document(args.records)
+    n = args.records + max(1, args.records // 10)
+    plain = retained_bytes(text, load_plain)
+    for label, loader in (("dict-backed classes (before)", load_plain),
+                          ("slotted, lazy models (after)", load_slotted),
+                          ("plain dict records (schedule.py)", load_dicts)):
+        size = plain if loader is load_plain else retained_bytes(text, loader)
+        print(f"{label:34s} {size / n:7.1f} B/record  ({size / plain:.0%} of before)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Load/save timings for msms.json-shaped documents of 10k, 100k and 1M records:
+the old stdlib indent=2 path vs the compact path in app/serialization.py, plus
+streaming one section (attendance) with iter_section.
+
+    python -m benchmarks.bench_serialization [--sizes 10000 100000 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from app import serialization
+from app.serialization import iter_section
+
+
+def make_document(n: int, seed: int = 0) -> dict:
+    """n records: 5% students, 1% courses, 64% attendance, 30% payments."""
+    rng = random.Random(seed)
+    n_students, n_courses = max(1, n // 20), max(1, n // 100)
+    n_payments = n * 3 // 10
+    n_attendance = n - n_students - n_courses - n_payments
+    return {
+        "students": [{"id": i, "name": f"Student {i}", "email": f"s{i}@mail.com",
+                      "enrolled_course_ids": [rng.randrange(1, n_courses + 1)]} for i in range(1, n_students + 1)],
+        "teachers": [{"id": 1, "name": "Mr. Smith", "email": "smith@mail.com"}],
+        "courses": [{"id": i, "title": f"Course {i}", "teacher_id": 1} for i in range(1, n_courses + 1)],
+        "attendance": [{"student_id": rng.randrange(1, n_students + 1), "course_id": rng.randrange(1, n_courses + 1),
+                        "timestamp": f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}T16:00:00"}
+                       for _ in range(n_attendance)],
+        "finance_log": [{"student_id": rng.randrange(1, n_students + 1), "amount": rng.choice([25.0, 40.0, 120.0]),
+                         "method": rng.choice(["Card", "Cash", "Transfer"]),
+                         "timestamp": f"2025-{rng.randrange(1, 13):02d}-01T10:00:00"} for _ in range(n_payments)],
+    }
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def write(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def bench(n: int, tmp: str) -> None:
+    doc = make_document(n)
+    old_path, new_path = os.path.join(tmp, f"old-{n}.json"), os.path.join(tmp, f"new-{n}.json")
+
+    old_save = timed(lambda: write(old_path, json.dumps(doc, indent=2).encode("utf-8")))
+    new_save = timed(lambda: write(new_path, serialization.dumps(doc)))
+
+    def old_load():
+        with open(old_path, "r", encoding="utf-8") as f:
+            json.load(f)
+    old_load_s = timed(old_load)
+    new_load_s = timed(lambda: serialization.load_file(new_path))
+    stream_s = timed(lambda: sum(1 for _ in iter_section(new_path, "attendance")))
+
+    mb = 1024 * 1024
+    print(f"{n:>9,} records | save {old_save:6.2f}s -> {new_save:6.2f}s | "
+          f"load {old_load_s:6.2f}s -> {new_load_s:6.2f}s | "
+          f"size {os.path.getsize(old_path) / mb:7.1f} -> {os.path.getsize(new_path) / mb:7.1f} MB | "
+          f"stream attendance {stream_s:6.2f}s")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = ap.parse_args()
+    print(f"encoder: {'orjson' if serialization.HAVE_ORJSON else 'stdlib json'} (old path: stdlib, indent=2)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            bench(n, tmp)
+
+
+if __name__ == "__main__":
+    main()
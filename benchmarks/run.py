@@ -0,0 +1,177 @@
+"""
+Standalone benchmark suite for the MSMS managers (app/schedule.py,
+app/pst4_manager.py and pst2_main.py) on synthetic data.
+
+    python -m benchmarks.run [--sizes small medium] [--out results.json] [--baseline old.json]
+
+Every operation is timed over several calls. The summary is printed, and
+written as JSON (one record per size/target/op, with mean/p50/p95 in ms) so
+runs can be diffed. --baseline prints the change against an earlier file.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import pst2_main
+from app import serialization
+from app.pst4_manager import ScheduleManager as Pst4Manager
+from app.schedule import ScheduleManager
+from app.timetable import WEEKDAYS
+from benchmarks.synthetic import SIZES, generate
+
+Result = Dict[str, Any]
+
+
+def measure(fn: Callable[[int], Any], calls: int) -> Dict[str, float]:
+    """Time fn(i) for i in range(calls); returns per-call statistics in ms."""
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "calls": calls,
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+    }
+
+
+def bench_schedule(doc: Dict[str, Any], tmp: str, rng: random.Random) -> Dict[str, Dict[str, float]]:
+    path = os.path.join(tmp, "schedule.json")
+    serialization_write(path, doc)
+    n = len(doc["students"])
+    out = {"load": measure(lambda i: ScheduleManager(path), 3)}
+    m = ScheduleManager(path)
+    ids = [rng.randrange(1, n + 1) for _ in range(1000)]
+    links = [(s["id"], s["enrolled_course_ids"][0]) for s in rng.sample(m.students, 50)]
+    out["save"] = measure(lambda i: m._save_data(), 3)
+    out["lookup_student"] = measure(lambda i: m._student_by_id(ids[i]), len(ids))
+    out["search_students"] = measure(lambda i: m.search_students(doc["students"][ids[i] - 1]["name"][:5]), 200)
+    out["check_in"] = measure(lambda i: m.check_in(*links[i]), 10)
+    out["record_payment"] = measure(lambda i: m.record_payment(ids[i], 40.0, "Card"), 10)
+    course = max(m.courses, key=lambda c: len(c["enrolled_student_ids"]))
+    marks = [(sid, "present") for sid in course["enrolled_student_ids"]]
+    out["check_in_many"] = measure(lambda i: m.check_in_many(course["id"], marks), 3)
+    out["payment_history"] = measure(lambda i: m.get_payment_history(ids[i]), len(ids))
+    out["export_attendance"] = measure(lambda i: m.export_report("attendance", io.BytesIO()), 3)
+    out["export_payments_filtered"] = measure(
+        lambda i: m.export_report("payments", io.BytesIO(), "2025-02-01", "2025-03-01", method="card"), 3)
+    journaled = ScheduleManager(path, journal=True)
+    out["check_in_journal"] = measure(lambda i: journaled.check_in(*links[i]), 50)
+    journaled.close()
+    return out
+
+
+def bench_pst4(doc: Dict[str, Any], tmp: str, rng: random.Random) -> Dict[str, Dict[str, float]]:
+    path = os.path.join(tmp, "pst4.json")
+    serialization_write(path, doc)
+    n = len(doc["students"])
+    out = {"load": measure(lambda i: Pst4Manager(path), 3)}
+    m = Pst4Manager(path)
+    ids = [rng.randrange(1, n + 1) for _ in range(1000)]
+    out["save"] = measure(lambda i: m._save(), 3)
+    out["lookup_student"] = measure(lambda i: m._get_student_by_id(ids[i]), len(ids))
+    out["lookup_by_name"] = measure(lambda i: m.get_student_by_name(doc["students"][ids[i] - 1]["name"]), len(ids))
+    out["search_students"] = measure(lambda i: m.search_students(doc["students"][ids[i] - 1]["name"][:5]), 200)
+    out["roster_for_day"] = measure(lambda i: m.roster_for_day(WEEKDAYS[i % 5]), 50)
+    out["roster_for_range"] = measure(lambda i: m.roster_for_range("Monday", "Friday"), 5)
+    out["check_in"] = measure(lambda i: m.check_in(ids[i], doc["students"][ids[i] - 1]["enrolled_course_ids"][0]), 1000)
+    out["enroll"] = measure(lambda i: m.enroll_student_in_course(ids[i], len(m.courses)), 10)
+    return out
+
+
+def bench_pst2(doc: Dict[str, Any], tmp: str, rng: random.Random) -> Dict[str, Dict[str, float]]:
+    path = os.path.join(tmp, "pst2.json")
+    serialization_write(path, doc)
+    n = len(doc["students"])
+    ids = [rng.randrange(1, n + 1) for _ in range(200)]
+    with contextlib.redirect_stdout(io.StringIO()):      # pst2 reports by printing
+        out = {"load": measure(lambda i: pst2_main.load_data(path), 3)}
+        out["save"] = measure(lambda i: pst2_main.save_data(path), 3)
+        out["search_students"] = measure(lambda i: pst2_main.search_students(doc["students"][ids[i] - 1]["name"][:5]),
+                                         len(ids))
+        out["check_in"] = measure(lambda i: pst2_main.check_in(ids[i], 1), len(ids))
+    return out
+
+
+def serialization_write(path: str, doc: Dict[str, Any]) -> None:
+    with open(path, "wb") as f:
+        f.write(serialization.dumps(doc))
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(sizes: List[str], seed: int) -> Dict[str, Any]:
+    results: List[Result] = []
+    for size in sizes:
+        students = SIZES[size]
+        with tempfile.TemporaryDirectory() as tmp:
+            for target, bench, flavour in (("schedule", bench_schedule, "schedule"),
+                                           ("pst4", bench_pst4, "schedule"),
+                                           ("pst2", bench_pst2, "pst2")):
+                doc = generate(students, seed, flavour=flavour)
+                for op, stats in bench(doc, tmp, random.Random(seed)).items():
+                    results.append({"size": size, "students": students, "target": target, "op": op, **stats})
+                    print(f"{size:>6} {target:>8} {op:<26} mean {stats['mean_ms']:10.3f} ms  "
+                          f"p95 {stats['p95_ms']:10.3f} ms  ({stats['calls']} calls)")
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "encoder": "orjson" if serialization.HAVE_ORJSON else "json",
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["size"], r["target"], r["op"]): r for r in json.load(f)["results"]}
+    print(f"\nChange vs {baseline_path} (mean; + is slower):")
+    for r in current["results"]:
+        old = baseline.get((r["size"], r["target"], r["op"]))
+        if old and old["mean_ms"] > 0:
+            change = (r["mean_ms"] - old["mean_ms"]) / old["mean_ms"]
+            print(f"{r['size']:>6} {r['target']:>8} {r['op']:<26} {change:+7.1%}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="MSMS benchmark suite")
+    ap.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="benchmark-results.json")
+    ap.add_argument("--baseline", help="earlier results file to compare against")
+    args = ap.parse_args()
+
+    current = run(args.sizes, args.seed)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nWrote {args.out}")
+    if args.baseline:
+        compare(current, args.baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Reproducible synthetic msms.json data at any size.
+
+    python -m benchmarks.synthetic --students 10000 --out /tmp/msms-10k.json
+
+The same seed always gives the same document. One document works for both
+managers: courses carry "name" and "title", lessons carry "time" and
+"start_time". flavour="pst2" adds the name-based "enrolled_in" lists that
+pst2_main.py uses.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from app.persistence import atomic_write_json
+from app.timetable import WEEKDAYS
+
+INSTRUMENTS = ["Piano", "Guitar", "Violin", "Cello", "Drums", "Voice", "Flute", "Trumpet"]
+FIRST = ["Alice", "Liam", "Maya", "Noah", "Zoe", "Ian", "Ola", "Pia", "Ravi", "Sara", "Tom", "Uma", "Yuki", "Ben"]
+LAST = ["Johnson", "Patel", "Singh", "Chen", "Rossi", "Kim", "Garcia", "Nowak", "Okafor", "Silva", "Smith", "Wu"]
+METHODS = ["Card", "Cash", "Transfer"]
+TIMES = ["15:00", "16:00", "17:00", "18:00", "19:00"]
+
+# named sizes used by the suite; counts scale from the number of students
+SIZES = {"small": 1_000, "medium": 10_000, "large": 100_000}
+
+
+def generate(students: int, seed: int = 0, checkins_per_student: int = 20, payments_per_student: int = 4,
+             flavour: str = "schedule") -> Dict[str, Any]:
+    """
+    A document with `students` students, one teacher per 25 students, one
+    course per 10, 1-2 weekly lessons per course, 1-3 enrollments per student,
+    and attendance/payments over one term (~checkins/payments per student).
+    """
+    rng = random.Random(seed)
+    n_teachers = max(1, students // 25)
+    n_courses = max(1, students // 10)
+    n_rooms = max(1, n_courses // 6)
+
+    teachers = [{"id": t, "name": f"{rng.choice(FIRST)} {rng.choice(LAST)}", "email": f"t{t}@msms.example",
+                 "speciality": rng.choice(INSTRUMENTS)} for t in range(1, n_teachers + 1)]
+    courses = []
+    for c in range(1, n_courses + 1):
+        instrument = rng.choice(INSTRUMENTS)
+        name = f"{instrument} {rng.choice(['Basics', 'Ensemble', 'Advanced', 'Theory'])} {c}"
+        lessons = [{"lesson_id": 2 * c - i, "day": rng.choice(WEEKDAYS[:5]), "start_time": t, "time": t,
+                    "room": f"Room {rng.randrange(1, n_rooms + 1)}"}
+                   for i, t in enumerate(rng.sample(TIMES, rng.choice([1, 2])))]
+        courses.append({"id": c, "name": name, "title": name, "instrument": instrument,
+                        "teacher_id": rng.randrange(1, n_teachers + 1), "enrolled_student_ids": [],
+                        "lessons": lessons})
+
+    roster = []
+    for s in range(1, students + 1):
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)} {s}"
+        picked = rng.sample(courses, min(len(courses), rng.choice([1, 1, 2, 3])))
+        for c in picked:
+            c["enrolled_student_ids"].append(s)
+        row = {"id": s, "name": name, "email": f"s{s}@msms.example",
+               "enrolled_course_ids": [c["id"] for c in picked]}
+        if flavour == "pst2":
+            row["enrolled_in"] = [c["name"] for c in picked]
+        roster.append(row)
+
+    term = datetime(2025, 1, 6, 15, 0)
+    attendance, payments = [], []
+    for _ in range(students * checkins_per_student):
+        s = roster[rng.randrange(students)]
+        ts = term + timedelta(days=rng.randrange(84), minutes=rng.randrange(300))
+        attendance.append({"student_id": s["id"], "course_id": rng.choice(s["enrolled_course_ids"]),
+                           "timestamp": ts.isoformat(timespec="seconds"),
+                           "status": rng.choice(["present"] * 8 + ["late", "absent"])})
+    for _ in range(students * payments_per_student):
+        ts = term + timedelta(days=rng.randrange(84), minutes=rng.randrange(600))
+        payments.append({"student_id": rng.randrange(1, students + 1), "amount": rng.choice([25.0, 40.0, 120.0]),
+                         "method": rng.choice(METHODS), "timestamp": ts.isoformat(timespec="seconds")})
+    attendance.sort(key=lambda a: a["timestamp"])
+    payments.sort(key=lambda p: p["timestamp"])
+
+    return {
+        "students": roster, "teachers": teachers, "courses": courses,
+        "attendance": attendance, "finance_log": payments,
+        "next_student_id": students + 1, "next_teacher_id": n_teachers + 1,
+        "next_course_id": n_courses + 1, "next_lesson_id": 2 * n_courses + 1,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Write a synthetic msms.json")
+    ap.add_argument("--students", type=int, default=SIZES["medium"])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--flavour", choices=["schedule", "pst2"], default="schedule")
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+    doc = generate(args.students, args.seed, flavour=args.flavour)
+    atomic_write_json(args.out, doc)
+    print(f"Wrote {args.out}: " + ", ".join(f"{len(v)} {k}" for k, v in doc.items() if isinstance(v, list)))
+
+
+if __name__ == "__main__":
+    main()
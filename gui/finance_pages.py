@@ -1,3 +1,4 @@
+import io
 import streamlit as st
 
 def show_finance_page(manager):
@@ -28,6 +29,7 @@ def show_finance_page(manager):
     history = manager.get_payment_history(sid)
     if history:
         st.caption(f"{len(history)} payment(s) found.")
+        st.metric("Total paid (AUD)", f"{manager.get_balance(sid):.2f}")
         st.table(history)
     else:
         st.info("No payments for this student.")
@@ -43,3 +45,30 @@ def show_finance_page(manager):
     with col2:
         if st.button("Export Attendance CSV"):
             st.success("Exported to attendance_report.csv") if manager.export_report("attendance", "attendance_report.csv") else st.error("Export failed.")
+
+    # --- Filtered download (streamed straight into memory, no temp file) ---
+    st.subheader("Download Filtered Report")
+    with st.form("report_download_form"):
+        kind = st.selectbox("Report", ["payments", "attendance"])
+        col1, col2 = st.columns(2)
+        with col1:
+            start = st.date_input("From", value=None)
+        with col2:
+            end = st.date_input("Until (exclusive)", value=None)
+        only_student = st.selectbox("Student", ["All"] + list(student_map.keys()), key="report_student")
+        method_filter = st.text_input("Method (payments only, blank = any)")
+        compress = st.checkbox("gzip-compress")
+        prepared = st.form_submit_button("Prepare download")
+    if prepared:
+        buf = io.BytesIO()
+        ok = manager.export_report(
+            kind, buf, start=start, end=end,
+            student_id=None if only_student == "All" else student_map[only_student],
+            method=method_filter or None, compress=compress,
+        )
+        if ok:
+            fname = f"{kind}_report.csv" + (".gz" if compress else "")
+            st.download_button("Download", buf.getvalue(), file_name=fname,
+                               mime="application/gzip" if compress else "text/csv")
+        else:
+            st.error("Export failed.")
@@ -0,0 +1,28 @@
+import streamlit as st
+from app.metrics import METRICS
+
+def show_health_panel(shared=None):
+    """Sidebar panel with per-operation call counts and latency (app/metrics.py)."""
+    with st.sidebar.expander("System health"):
+        snap = METRICS.snapshot()
+        if not snap:
+            st.caption("No operations recorded yet.")
+            return
+        slowest = max(snap.items(), key=lambda kv: kv[1]["p95_ms"])
+        col1, col2 = st.columns(2)
+        col1.metric("Calls", sum(s["calls"] for s in snap.values()))
+        col2.metric("Errors", sum(s["errors"] for s in snap.values()))
+        st.caption(f"Slowest p95: {slowest[0]} ({slowest[1]['p95_ms']:g} ms)")
+        if shared is not None:
+            st.caption(f"Reloads after outside changes: {shared.reloads}")
+        st.dataframe(
+            [{"op": op, "calls": s["calls"], "p50 ms": s["p50_ms"], "p95 ms": s["p95_ms"], "max ms": s["max_ms"]}
+             for op, s in snap.items()],
+            hide_index=True,
+            use_container_width=True,
+        )
+        st.download_button("Prometheus metrics", METRICS.prometheus_text(), file_name="msms.prom",
+                           mime="text/plain")
+        if st.button("Reset counters"):
+            METRICS.reset()
+            st.rerun()
@@ -1,17 +1,26 @@
 import streamlit as st
 from app.schedule import ScheduleManager
+from app.shared import SharedManager
 from gui.student_pages import show_student_page
 from gui.roster_pages import show_roster_page
 from gui.finance_pages import show_finance_page  # <-- add import
+from gui.health_pages import show_health_panel
+
+@st.cache_resource
+def _shared_manager() -> SharedManager:
+    # one manager for every browser session; saves are coalesced on a
+    # background thread and flushed at exit
+    return SharedManager(lambda: ScheduleManager(write_behind=True))
 
 def launch():
     st.set_page_config(layout="wide", page_title="Music School Management System")
 
-    if "manager" not in st.session_state:
-        st.session_state.manager = ScheduleManager()
+    # cheap per-rerun check: reloads only if another process changed the file
+    st.session_state.manager = _shared_manager().view()
 
     st.sidebar.title("MSMS Navigation")
     page = st.sidebar.radio("Go to", ["Student Management", "Daily Roster", "Payments"])
+    show_health_panel(_shared_manager())
 
     if page == "Student Management":
         show_student_page(st.session_state.manager)
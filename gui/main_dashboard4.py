@@ -1,8 +1,15 @@
 # gui/main_dashboard4.py
 import streamlit as st
 from app.pst4_manager import ScheduleManager      # <-- adapter
+from app.shared import SharedManager
 from gui.student_pages4 import show_student_management_page
 from gui.roster_pages4 import show_roster_page
+from gui.health_pages import show_health_panel
+
+@st.cache_resource
+def _shared_manager() -> SharedManager:
+    # one process-wide manager shared by every tab
+    return SharedManager(ScheduleManager)
 
 def launch():
     st.set_page_config(layout="wide", page_title="MSMS Dashboard")
@@ -10,13 +17,8 @@ def launch():
     # show which class is used (debug helper)
     st.sidebar.caption(f"Manager: {ScheduleManager.__module__}.{ScheduleManager.__name__}")
 
-    # ensure we don't keep an OLD manager from session state
-    needs_new = (
-        "manager" not in st.session_state or
-        getattr(st.session_state["manager"].__class__, "__module__", "") != "app.pst4_manager"
-    )
-    if needs_new:
-        st.session_state.manager = ScheduleManager()
+    # every session gets a view onto the shared manager (reloaded if the file changed)
+    st.session_state.manager = _shared_manager().view()
 
 
     # optional reset button
@@ -26,11 +28,25 @@ def launch():
 
     if st.sidebar.button("Re-seed demo data"):
         st.session_state.manager.reset_demo_data()
-        st.success("Demo data has been re-seeded.")
+        st.success("Demo data has been re-seeded. Use Undo to get the previous data back.")
+        st.rerun()
+
+    # undo / redo the last changes (app/versions.py keeps the history)
+    undo_col, redo_col = st.sidebar.columns(2)
+    undo_label = st.session_state.manager.undo_label()
+    redo_label = st.session_state.manager.redo_label()
+    if undo_col.button("Undo", disabled=undo_label is None, help=undo_label):
+        ok, msg = st.session_state.manager.undo()
+        st.toast(msg)
+        st.rerun()
+    if redo_col.button("Redo", disabled=redo_label is None, help=redo_label):
+        ok, msg = st.session_state.manager.redo()
+        st.toast(msg)
         st.rerun()
 
     st.sidebar.title("MSMS Navigation")
     page = st.sidebar.radio("Go to", ["Student Management", "Daily Roster", "Payments (stub)"])
+    show_health_panel(_shared_manager())
 
     if page == "Student Management":
         show_student_management_page(st.session_state.manager)
@@ -23,7 +23,7 @@ def show_roster_page(manager):
         if st.button("Check-in"):
             sid = student_map[ssel]
             cid = course_map[csel]
-            student = next((x for x in manager.students if x["id"] == sid), None)
+            student = manager.get_student(sid)
             if not student:
                 st.error("Student not found.")
                 return
@@ -33,6 +33,33 @@ def show_roster_page(manager):
             ok = manager.check_in(sid, cid)
             st.success("Checked in!") if ok else st.error("Check-in failed.")
 
+    st.divider()
+    st.subheader("Whole-class Check-in")
+    cls = st.selectbox("Class", list(course_map.keys()), key="roster_class")
+    class_id = course_map[cls]
+    members = manager.students_in_course(class_id)
+    if not members:
+        st.caption("No students enrolled in this course.")
+    else:
+        with st.form("class_checkin"):
+            table = st.data_editor(
+                [{"student_id": s["id"], "name": s.get("name", ""), "status": "present"} for s in members],
+                column_config={
+                    "status": st.column_config.SelectboxColumn("Status", options=["present", "late", "absent"],
+                                                               required=True),
+                },
+                disabled=["student_id", "name"],
+                hide_index=True,
+                use_container_width=True,
+                key=f"class_marks_{class_id}",
+            )
+            if st.form_submit_button(f"Check in {len(members)} students"):
+                try:
+                    n = manager.check_in_many(class_id, [(r["student_id"], r["status"]) for r in table])
+                    st.success(f"Recorded attendance for {n} students.")
+                except ValueError as e:
+                    st.error(str(e))
+
     st.divider()
     st.subheader("Recent Attendance")
     if manager.attendance:
@@ -40,3 +67,10 @@ def show_roster_page(manager):
         st.table(rows)
     else:
         st.caption("No attendance yet.")
+
+    st.subheader("Course Attendance")
+    stats = manager.course_attendance_stats()
+    if stats:
+        st.table(stats)
+    else:
+        st.caption("No attendance yet.")
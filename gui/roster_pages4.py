@@ -4,17 +4,38 @@ import pandas as pd
 def show_roster_page(manager):
     st.header("Daily Roster")
 
-    day = st.selectbox("Select a day", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
-    rows = manager.roster_for_day(day)
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    view = st.radio("View", ["Single day", "Day range"], horizontal=True)
+    if view == "Single day":
+        start = end = st.selectbox("Select a day", days[:5])
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            start = st.selectbox("From", days, index=0)
+        with col2:
+            end = st.selectbox("To", days, index=4)
+
+    teacher_map = {"All teachers": None, **{f"{t.name} (ID {t.id})": t.id for t in getattr(manager, "teachers", [])}}
+    room_opts = ["All rooms"] + manager.rooms()
+    col1, col2 = st.columns(2)
+    with col1:
+        sel_teacher = st.selectbox("Teacher", list(teacher_map.keys()))
+    with col2:
+        sel_room = st.selectbox("Room", room_opts)
+    rows = manager.roster_for_range(
+        start, end,
+        room=None if sel_room == "All rooms" else sel_room,
+        teacher_id=teacher_map[sel_teacher],
+    )
 
     if rows:
         # reorder columns for readability if present
-        col_order = ["Day", "Time", "Course", "Instrument", "Teacher", "Course ID"]
+        col_order = ["Day", "Time", "Course", "Instrument", "Teacher", "Room", "Course ID"]
         df = pd.DataFrame(rows)
         df = df[[c for c in col_order if c in df.columns]]
         st.dataframe(df, use_container_width=True)
     else:
-        st.info("No lessons for this day.")
+        st.info("No lessons for this selection.")
 
     st.subheader("Student Check-in")
     if getattr(manager, "students", None) and getattr(manager, "courses", None):
@@ -6,10 +6,7 @@ def show_student_page(manager):
     st.subheader("Find a Student")
     query = st.text_input("Search by Name or ID", placeholder="Type a name or student ID")
     if query:
-        matches = [
-            s for s in manager.students
-            if query.lower() in s["name"].lower() or query == str(s["id"])
-        ]
+        matches = manager.search_students(query, k=20)
         if matches:
             st.table(matches)
         else:
@@ -37,8 +34,7 @@ def show_student_page(manager):
         elif not course_selected:
             st.error("Please select a course.")
         else:
-            s = manager.add_student(name, f"{name.lower().replace(' ', '.')}@example.com")
             course_id = course_choices[course_selected]
-            s["enrolled_course_ids"].append(course_id)
-            manager._save_data()
+            # add_student enrolls through the manager so the course side stays in sync
+            s = manager.add_student(name, f"{name.lower().replace(' ', '.')}@example.com", [course_id])
             st.success(f"Registered {s['name']} and enrolled in {course_selected}")
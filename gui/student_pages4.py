@@ -15,7 +15,7 @@ def show_student_management_page(manager):
                 if getattr(s, "enrolled_course_ids", []):
                     rows = []
                     for cid in s.enrolled_course_ids:
-                        c = next((c for c in manager.courses if c.id == cid), None)
+                        c = manager.get_course(cid)
                         if c:
                             rows.append({"Course": c.name, "Instrument": c.instrument, "Course ID": c.id})
                     if rows:
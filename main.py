@@ -1,7 +1,7 @@
 from gui.main_dashboard import launch
-from app.admin_utils import init_logger, backup_data
+from app.admin_utils import init_logger, backup_data_in_background
 
 if __name__ == "__main__":
-    init_logger("msms.log")                 # logging first
-    backup_data("msms.json", "backups")     # safe copy before the session
-    launch()                                # start Streamlit UI
+    init_logger("msms.log", async_mode=True)             # logging first; file writes on a background thread
+    backup_data_in_background("msms.json", "backups")    # incremental snapshot; launch does not wait
+    launch()                                             # start Streamlit UI
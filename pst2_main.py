@@ -1,21 +1,47 @@
 import json
 import datetime
+import os
+
+from app.ids import SharedIdAllocator
+from app.locking import FileLock
+from app.persistence import atomic_write_json, file_stamp, load_json, previous_generation, stored_version
+from app.search import SearchIndex
+from app.versions import History, diff, frozen, merge_into
 
 DATA_FILE = "msms.json"
 app_data = {}  # Global data store
+_student_index = None  # SearchIndex over app_data['students'], built on first search
+_indexed_students = {}  # id -> student record, kept alongside _student_index
+_history = None  # undo/redo over students and teachers (app/versions.py), reset by load_data
+_ids = None  # id counters shared with other sessions on the same file (app/ids.py), set by load_data
+# what the data file held as of our last load/save: its stamp (for files without a "version"),
+# our history version and attendance length
+_stamp = None
+_saved = None
+_saved_attendance = 0
 
 # --- Core Persistence Engine ---
 def load_data(path=DATA_FILE):
     """Loads all application data from a JSON file, with fallback to sample data if incomplete."""
-    global app_data
+    global app_data, _student_index, _stamp
+    _student_index = None
+    _stamp = file_stamp(path)
     try:
-        with open(path, 'r') as f:
-            loaded = json.load(f)
-            if not loaded.get("students") or not loaded.get("teachers"):
-                raise ValueError("Data incomplete")
-            app_data = loaded
-            print("Data loaded successfully.")
-    except (FileNotFoundError, json.JSONDecodeError, ValueError):
+        loaded = load_json(path)  # falls back to the previous generation if corrupt
+        if loaded is None:
+            raise FileNotFoundError(path)
+        if not loaded.get("students") or not loaded.get("teachers"):
+            raise ValueError("Data incomplete")
+        app_data = loaded
+        print("Data loaded successfully.")
+    except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+        if isinstance(e, json.JSONDecodeError):
+            # never let the sample data silently replace an unreadable file; with the
+            # live file missing, the generation that failed to parse is the previous one
+            broken = path if os.path.exists(path) else previous_generation(path)
+            kept = f"{broken}.corrupt-{datetime.datetime.now():%Y%m%d_%H%M%S}"
+            os.replace(broken, kept)
+            print(f"Data file is corrupt and has no readable backup; moved it to {kept}.")
         print("Initializing with default structure + sample data.")
         app_data = {
             "students": [
@@ -30,28 +56,122 @@ def load_data(path=DATA_FILE):
             "next_student_id": 3,
             "next_teacher_id": 3
         }
+    _load_ids(path)
+    _reset_history()
+
+def _load_ids(path):
+    global _ids
+    _ids = SharedIdAllocator(path)
+    _ids.load(app_data, {t[:-1]: [r['id'] for r in app_data.get(t, [])] for t in ("students", "teachers")})
+
+def _reset_history():
+    global _history, _saved, _saved_attendance
+    _history = History({t: ((r['id'], frozen(r)) for r in app_data.get(t, [])) for t in ("students", "teachers")})
+    _saved, _saved_attendance = _history.current, len(app_data.get('attendance', []))
+
+def _record(label, table, record_id, record):
+    """Adds one change to the undo history; record=None means the record was removed."""
+    _history.commit(label, {table: {record_id: None if record is None else frozen(record)}})
+
+def _restore(step):
+    global _student_index
+    current, target = step
+    for table, rows in diff(current, target).items():
+        records = app_data[table]
+        positions = {r['id']: i for i, r in enumerate(records)}
+        gone = set()
+        for record_id, _, new in rows:
+            if new is None:
+                gone.add(record_id)
+            elif record_id in positions:
+                records[positions[record_id]] = frozen(new)
+            else:
+                records.append(frozen(new))
+                key = f"next_{table[:-1]}_id"
+                app_data[key] = max(app_data.get(key, 1), record_id + 1)
+        if gone:
+            app_data[table] = [r for r in records if r['id'] not in gone]
+    _student_index = None  # rebuilt on the next search
+
+def undo():
+    """Reverts the last add/update/remove of a student or teacher; returns True if anything changed."""
+    step = _history.undo() if _history else None
+    if step is None:
+        print("Nothing to undo.")
+        return False
+    _restore(step)
+    print(f"Undid: {step[0].label}.")
+    return True
+
+def redo():
+    step = _history.redo() if _history else None
+    if step is None:
+        print("Nothing to redo.")
+        return False
+    _restore(step)
+    print(f"Redid: {step[1].label}.")
+    return True
+
+def _merge_from_disk(path):
+    """
+    Another process saved since we loaded: lays our changes since then over
+    its file, field by field (app/versions.py merge_into), and makes that our
+    data. Ids are reserved across sessions, so none of ours change. Undo
+    history restarts from the merged data.
+    """
+    global app_data, _student_index
+    disk = load_json(path)
+    if disk is None:
+        return
+    merge_into(disk, diff(_saved, _history.current))
+    disk.setdefault('attendance', []).extend(app_data['attendance'][_saved_attendance:])
+    for key in ("next_student_id", "next_teacher_id"):
+        disk[key] = max(disk.get(key, 1), app_data.get(key, 1))
+    app_data = disk
+    _student_index = None
+    _reset_history()
+    print("Merged changes saved meanwhile by another session.")
 
 def save_data(path=DATA_FILE):
-    """Saves all application data to a JSON file."""
+    """
+    Saves all application data to a JSON file (atomically, keeping the previous copy).
+    The file is locked while saving; if another process saved since we loaded,
+    both sets of changes are merged first, and the file's "version" goes up by one.
+    """
+    global app_data, _stamp, _saved, _saved_attendance
     try:
-        with open(path, 'w') as f:
-            json.dump(app_data, f, indent=4)
+        with FileLock(path):
+            on_disk = stored_version(path)
+            if on_disk is not None:
+                changed = on_disk != app_data.get('version', 0)
+            else:  # no version header (older file): fall back to the stamp
+                changed = file_stamp(path) != _stamp
+            if changed:
+                _merge_from_disk(path)
+            # "version" goes first so stored_version() finds it in the file's first bytes
+            version = app_data.pop('version', 0) + 1
+            app_data = {"version": version, **app_data}
+            atomic_write_json(path, app_data, pretty=True)
+            _stamp = file_stamp(path)
+        _saved, _saved_attendance = _history.current, len(app_data['attendance'])
         print("Data saved successfully.")
     except Exception as e:
         print(f"Error saving data: {e}")
 
 # --- CRUD Operations ---
 def add_teacher(name, speciality):
-    teacher_id = app_data['next_teacher_id']
+    teacher_id = _ids.allocate("teacher")  # reserved across sessions saving the same file
     new_teacher = {"id": teacher_id, "name": name, "speciality": speciality}
     app_data['teachers'].append(new_teacher)
-    app_data['next_teacher_id'] += 1
+    app_data['next_teacher_id'] = teacher_id + 1
+    _record("Add teacher", "teachers", teacher_id, new_teacher)
     print(f"Teacher '{name}' added.")
 
 def update_teacher(teacher_id, **fields):
     for teacher in app_data['teachers']:
         if teacher['id'] == teacher_id:
             teacher.update(fields)
+            _record("Update teacher", "teachers", teacher_id, teacher)
             print(f"Teacher {teacher_id} updated.")
             return
     print(f"Error: Teacher with ID {teacher_id} not found.")
@@ -60,14 +180,22 @@ def remove_teacher(teacher_id):
     original_count = len(app_data['teachers'])
     app_data['teachers'] = [t for t in app_data['teachers'] if t['id'] != teacher_id]
     if len(app_data['teachers']) < original_count:
+        _record("Remove teacher", "teachers", teacher_id, None)
         print(f"Teacher {teacher_id} removed.")
     else:
         print(f"Error: Teacher with ID {teacher_id} not found.")
 
+def _index_student(student):
+    if _student_index is not None:
+        _student_index.add(student['id'], student['name'], record_id=student['id'])
+        _indexed_students[student['id']] = student
+
 def update_student(student_id, **fields):
     for student in app_data['students']:
         if student['id'] == student_id:
             student.update(fields)
+            _index_student(student)
+            _record("Update student", "students", student_id, student)
             print(f"Student {student_id} updated.")
             return
     print(f"Error: Student with ID {student_id} not found.")
@@ -76,6 +204,10 @@ def remove_student(student_id):
     original_count = len(app_data['students'])
     app_data['students'] = [s for s in app_data['students'] if s['id'] != student_id]
     if len(app_data['students']) < original_count:
+        if _student_index is not None:
+            _student_index.remove(student_id)
+            _indexed_students.pop(student_id, None)
+        _record("Remove student", "students", student_id, None)
         print(f"Student {student_id} removed.")
     else:
         print(f"Error: Student with ID {student_id} not found.")
@@ -112,10 +244,15 @@ def print_student_card(student_id):
         print(f"Error: Could not print card, student {student_id} not found.")
 
 # --- New Features ---
-def search_students(query):
-    """Search for students by name (case-insensitive partial match)."""
-    query_lower = query.lower()
-    matches = [s for s in app_data['students'] if query_lower in s['name'].lower()]
+def search_students(query, k=20):
+    """Search for students by name or ID: prefix, partial and near-miss matches, best first."""
+    global _student_index
+    if _student_index is None:
+        _student_index = SearchIndex()
+        _indexed_students.clear()
+        for s in app_data['students']:
+            _index_student(s)
+    matches = [_indexed_students[i] for i in _student_index.search(query, k)]
     if matches:
         print("\nSearch Results:")
         for s in matches:
@@ -131,6 +268,7 @@ def enroll_student(student_id, courses):
             new_courses = {c.strip() for c in courses if c.strip()}
             updated_courses = list(current_courses.union(new_courses))
             student['enrolled_in'] = updated_courses
+            _record("Enroll student", "students", student_id, student)
             print(f"Student {student_id} enrolled in: {', '.join(new_courses)}")
             return
     print(f"Error: Student with ID {student_id} not found.")
@@ -150,6 +288,8 @@ def main():
         print("7. Print Student Card")
         print("8. Search Students")
         print("9. Enroll Student in New Courses")
+        print("u. Undo Last Change")
+        print("r. Redo")
         print("q. Quit and Save")
 
         choice = input("Enter your choice: ").strip()
@@ -230,6 +370,12 @@ def main():
             except ValueError:
                 print("Invalid input. Student ID must be a number.")
 
+        elif choice.lower() == 'u':
+            made_change = undo()
+
+        elif choice.lower() == 'r':
+            made_change = redo()
+
         elif choice.lower() == 'q':
             print("Saving final changes and exiting.")
             break
@@ -0,0 +1,260 @@
+import json
+import pytest
+from app.pst4_manager import ScheduleManager
+
+@pytest.fixture
+def pst4_manager(tmp_path):
+    # no file yet -> manager seeds the built-in demo data
+    return ScheduleManager(data_path=str(tmp_path / "msms.json"))
+
+def test_lookups_track_register_rename_remove(pst4_manager):
+    m = pst4_manager
+    ok, _, sid = m.register_new_student("Zoe Park", "Cello")
+    assert ok and m.get_student_by_name(" zoe park ").id == sid
+    assert m.register_new_student("ZOE PARK", "Cello")[0] is False
+
+    assert m.rename_student(sid, "Zoe Kim")[0] is True
+    assert m.get_student_by_name("zoe park") is None
+    assert m.get_student(sid).name == "Zoe Kim"
+
+    assert m.remove_student(1)[0] is True
+    assert m.get_student(1) is None and m.get_student_by_name("alice johnson") is None
+    assert 1 not in m.get_course(101).enrolled_student_ids
+
+    reloaded = ScheduleManager(data_path=str(m.data_path))
+    assert reloaded.get_student_by_name("zoe kim").id == sid
+    assert reloaded.roster_for_day("Monday")[0]["Teacher"] == "Mr. Taylor"
+
+def test_student_ids_are_monotonic_across_removal(pst4_manager):
+    m = pst4_manager
+    _, _, sid = m.register_new_student("Zoe Park", "Cello")
+    m.remove_student(sid)
+    reloaded = ScheduleManager(data_path=str(m.data_path))
+    assert reloaded.register_new_student("Ian Wu", "Drums")[2] == sid + 1
+
+def test_bulk_import_links_both_sides(pst4_manager):
+    m = pst4_manager
+    counts = m.bulk_import(
+        students=[{"id": 40, "name": "Ola"}, {"name": "Pia"}],
+        enrollments=[{"student_id": 40, "course_id": 201}],
+    )
+    assert counts["students"] == 2 and counts["enrollments"] == 1
+    assert m._get_course_by_id(201).enrolled_student_ids == [40]
+    assert m.get_student_by_name("pia").id == 41
+    with pytest.raises(ValueError, match="duplicate"):
+        m.bulk_import(students=[{"name": "ola"}])
+
+def test_sqlite_backend_keeps_public_api(tmp_path):
+    db = str(tmp_path / "msms.db")
+    m = ScheduleManager(data_path=db)          # empty database -> demo seed
+    ok, _, sid = m.register_new_student("Zoe Park", "Cello")
+    assert m.enroll_student_in_course(sid, 201) == (True, "Enrollment successful.")
+    m.remove_student(1)
+    again = ScheduleManager(data_path=db)
+    assert again.get_student_by_name("zoe park").enrolled_course_ids == [201]
+    assert again._get_course_by_id(201).enrolled_student_ids == [sid]
+    assert again._get_course_by_id(101).enrolled_student_ids == []
+    assert again.check_in(sid, 201)[0] is True
+    again.reset_demo_data()
+    assert again.get_student_by_name("zoe park") is None
+
+def test_search_follows_register_rename_remove(pst4_manager):
+    m = pst4_manager
+    _, _, sid = m.register_new_student("Zoe Park", "Cello")
+    assert m.search_students("zo")[0].id == sid
+    m.rename_student(sid, "Zoe Kim")
+    assert m.search_students("park") == []
+    m.remove_student(sid)
+    assert m.search_students("zoe") == []
+    assert m.search_teachers("violn")[0].name == "Dr. Rossi"
+
+def test_timetable_index_follows_lesson_and_teacher_edits(pst4_manager):
+    m = pst4_manager
+    assert [r["Time"] for r in m.roster_for_day("Monday")] == ["16:00", "16:30"]
+    assert m.add_lesson(102, "Monday", "9:15", room="Studio B")[0] is True
+    assert m.add_lesson(102, "Funday", "9:15")[0] is False
+    monday = m.roster_for_day("Monday")
+    assert [r["Time"] for r in monday] == ["9:15", "16:00", "16:30"]
+    assert [r["Course ID"] for r in m.roster_for_day("Monday", room="Studio B")] == [102]
+
+    assert m.update_teacher(2, name="Ms. Chen-Li")[0] is True
+    assert {r["Teacher"] for r in m.roster_for_day("Monday", teacher_id=2)} == {"Ms. Chen-Li"}
+    assert m.remove_lesson(102, "Monday", "09:15")[0] is True
+
+    week = m.roster_for_range("Monday", "Thursday")
+    assert [r["Day"] for r in week] == ["Monday", "Monday", "Tuesday", "Wednesday", "Thursday"]
+    assert [r["Day"] for r in m.roster_for_range("Thursday", "Monday")] == ["Thursday", "Monday", "Monday"]
+
+    reloaded = ScheduleManager(data_path=str(m.data_path))
+    assert reloaded.roster_for_range("Monday", "Sunday") == week
+
+def test_removed_course_without_lessons_leaves_its_teacher(pst4_manager):
+    m = pst4_manager
+    m.bulk_import(courses=[{"id": 300, "name": "Ear Training", "instrument": "Voice", "teacher_id": 2}])
+    assert 300 in m._timetable.courses_for_teacher(2)
+    assert m.remove_course(300)[0] is True
+    assert 300 not in m._timetable.courses_for_teacher(2)
+    assert m.update_teacher(2, name="Ms. Chen-Li")[0] is True
+    assert m.undo()[0] and m.undo()[0]          # rename, then the removal
+    assert m.update_teacher(2, name="Ms. Chen")[0] is True
+
+def test_add_lesson_rejects_double_booking(pst4_manager):
+    m = pst4_manager
+    assert m.add_lesson(101, "Monday", "16:30")[0] is False        # Mr. Taylor already teaches 16:00-17:00
+    assert m.add_lesson(101, "Friday", "10:00", room="Hall")[0] is True
+    ok, msg = m.add_lesson(102, "Friday", "10:30", room="Hall")
+    assert not ok and "Room Hall" in msg
+    assert m.audit_conflicts() == []
+
+def test_auto_schedule_respects_rooms_and_availability(pst4_manager):
+    m = pst4_manager
+    m.bulk_import(students=[{"id": 10 + i, "name": f"S{i}"} for i in range(5)],
+                  enrollments=[{"student_id": 10 + i, "course_id": 102} for i in range(5)]
+                  + [{"student_id": 10, "course_id": 101}])
+    rooms = {"Small": 2, "Hall": 8}
+    ok, msg = m.auto_schedule(rooms, availability={3: [("Friday", "17:00", "19:00")]}, course_ids=[101, 102, 201])
+    assert ok, msg
+    assert m.audit_conflicts() == []
+    assert all(ls["room"] == "Hall" for ls in m._get_course_by_id(102).lessons)
+    assert {ls["day"] for ls in m._get_course_by_id(201).lessons} == {"Friday"}
+    piano = m._get_course_by_id(101).lessons
+    assert len(piano) == 2 and piano[0]["day"] != piano[1]["day"]
+    assert len(m.roster_for_range("Monday", "Friday")) == 5
+
+    assert m.auto_schedule({"Small": 2})[0] is False            # Guitar Basics needs 6 seats
+    assert m.auto_schedule(rooms, availability={1: []})[0] is False
+
+def test_solver_local_search_repairs_greedy_clashes():
+    import random
+    from app.pst4_manager import Course
+    from app.timetable_solver import solve_timetable
+    rng = random.Random(1)
+    courses = []
+    for cid in range(1, 13):
+        c = Course(cid, f"C{cid}", "Piano", rng.randrange(1, 4))
+        c.lessons = [{}] * rng.choice([1, 2])
+        courses.append(c)
+    for sid in range(1, 15):
+        for c in rng.sample(courses, 3):
+            c.enrolled_student_ids.append(sid)
+    plan = solve_timetable(courses, {"A": 20, "B": 20}, days=["Monday", "Tuesday"],
+                           times=["15:00", "16:00", "17:00", "18:00", "19:00"], seed=1)
+    assert plan["rounds"] > 0 and plan["clashes"] == 0
+    seen = set()
+    for c in courses:
+        for ls in plan["lessons"][c.id]:
+            slot = (ls["day"], ls["time"])
+            keys = {("room", slot, ls["room"]), ("teacher", slot, c.teacher_id)}
+            keys |= {("student", slot, s) for s in c.enrolled_student_ids}
+            assert not keys & seen
+            seen |= keys
+
+def test_models_are_slotted_and_hydrate_lists_lazily(pst4_manager):
+    from app.models import Student
+    s = Student(9, "Ian Wu", [])
+    assert not hasattr(s, "__dict__") and s._course_ids is None
+    assert s.to_dict()["enrolled_course_ids"] == [] and s._course_ids is None
+    s.enrolled_course_ids.append(101)
+    assert s.to_dict()["enrolled_course_ids"] == [101]
+
+    reloaded = ScheduleManager(data_path=str(pst4_manager.data_path))
+    maya = reloaded.get_student_by_name("Maya Singh")
+    assert maya._course_ids is None and maya.enrolled_course_ids == []
+
+def test_enrollment_relation_cascades_and_repairs_on_load(pst4_manager):
+    m = pst4_manager
+    assert m.enroll_student_in_course(1, 201)[0] is True
+    assert m.unenroll_student(2, 102)[0] is True and m.unenroll_student(2, 102)[0] is False
+    assert m.check_in(2, 102)[0] is False
+
+    assert m.remove_course(101)[0] is True
+    assert m._get_student_by_id(1).enrolled_course_ids == [201]
+    assert m.roster_for_day("Wednesday") == [] and m.check_in(1, 101)[0] is False
+
+    doc = json.loads(m.data_path.read_text())
+    doc["courses"][0]["enrolled_student_ids"].append(3)         # one-sided link, as a hand edit would leave it
+    m.data_path.write_text(json.dumps(doc))
+    reloaded = ScheduleManager(data_path=str(m.data_path))
+    assert reloaded._get_student_by_id(3).enrolled_course_ids == [doc["courses"][0]["id"]]
+    assert reloaded.check_in(3, doc["courses"][0]["id"])[0] is True
+
+def _by_id(doc):
+    return {table: sorted(rows, key=lambda r: r["id"]) for table, rows in doc.items()}
+
+def test_undo_redo_walks_versions_and_keeps_indexes_in_step(pst4_manager):
+    m = pst4_manager
+    before = m.snapshot()
+    _, _, sid = m.register_new_student("Zoe Park", "Cello")
+    m.enroll_student_in_course(sid, 201)
+    m.update_teacher(3, name="Dr. Rossini")
+    m.remove_course(101)
+    m.remove_student(2)
+    after = m.snapshot()
+    assert m.undo_label() == "Remove student"
+    changes = m.changes_between(before, after)
+    assert {k for k, _, _ in changes["students"]} == {1, 2, sid}
+    assert {k for k, _, _ in changes["courses"]} == {101, 102, 201}
+    assert [(k, old["name"], new["name"]) for k, old, new in changes["teachers"]] == [(3, "Dr. Rossi", "Dr. Rossini")]
+    assert before.tables["students"][2]["enrolled_course_ids"] == [102]          # old versions never change
+
+    for _ in range(5):
+        assert m.undo()[0] is True
+    assert m.undo() == (False, "Nothing to undo.")
+    assert m.changes_between(before, m.snapshot()) == {}
+    assert m.get_student_by_name("Liam Patel").enrolled_course_ids == [102] and m.check_in(2, 102)[0] is True
+    assert m.check_in(1, 101)[0] is True and m.search_students("zoe") == []
+    assert [r["Teacher"] for r in m.roster_for_day("Thursday")] == ["Dr. Rossi"]
+    assert _by_id(ScheduleManager(data_path=str(m.data_path))._document()) == _by_id(m._document())
+
+    while m.redo()[0]:
+        pass
+    assert m.changes_between(after, m.snapshot()) == {}
+    assert m.check_in(sid, 201)[0] is True and m.check_in(1, 101)[0] is False
+    assert [r["Teacher"] for r in m.roster_for_day("Thursday")] == ["Dr. Rossini"]
+    assert _by_id(ScheduleManager(data_path=str(m.data_path))._document()) == _by_id(m._document())
+
+    m.undo()
+    m.rename_student(1, "Ally Johnson")
+    assert m.redo() == (False, "Nothing to redo.")
+
+def test_reset_demo_data_can_be_undone(tmp_path):
+    from benchmarks.synthetic import generate
+    path = tmp_path / "big.json"
+    path.write_text(json.dumps(generate(800, seed=2, checkins_per_student=0, payments_per_student=0)))
+    m = ScheduleManager(data_path=str(path))
+    loaded = _by_id(m._document())
+    m.reset_demo_data()
+    assert len(m.students) == 3 and m.undo_label() == "Re-seed demo data"
+    assert m.undo() == (True, "Undid: Re-seed demo data.")
+    assert _by_id(m._document()) == loaded and m.undo_label() is None
+    assert m.search_students(m.students[-1].name)[0].id == 800
+    assert _by_id(ScheduleManager(data_path=str(path))._document()) == loaded
+    ok, _, sid = m.register_new_student("Brand New", "Piano")
+    assert sid == 801
+    m.undo()
+    assert m.redo()[0] and m._get_student_by_id(801).name == "Brand New"
+
+def test_two_managers_on_one_file_merge_their_saves(pst4_manager):
+    a = pst4_manager
+    b = ScheduleManager(data_path=str(a.data_path))
+    zoe = a.register_new_student("Zoe Park", "Cello")[2]
+    ian = b.register_new_student("Ian Wu", "Drums")[2]           # b saves on top of a's save
+    assert zoe != ian and b.get_student(zoe).name == "Zoe Park"
+    assert a.enroll_student_in_course(zoe, 101)[0] and b.enroll_student_in_course(ian, 101)[0]
+    assert a.rename_student(1, "Ally Johnson")[0]
+
+    m = ScheduleManager(data_path=str(a.data_path))
+    assert {s.id: s.name for s in m.students if s.id in (1, zoe, ian)} == \
+        {1: "Ally Johnson", zoe: "Zoe Park", ian: "Ian Wu"}
+    assert sorted(m.get_course(101).enrolled_student_ids) == [1, zoe, ian]
+    assert m.get_student(zoe).enrolled_course_ids == [101] == m.get_student(ian).enrolled_course_ids
+    assert json.loads(m.data_path.read_text())["version"] == 6
+
+def test_persistent_map_shares_structure_and_diffs():
+    from app.versions import PMap
+    base = PMap((i, {"id": i}) for i in range(5000))
+    edited = base.set(7, {"id": 7, "name": "x"}).delete(4000).set(9000, {"id": 9000})
+    assert len(base) == 5000 and len(edited) == 5000 and 4000 in base and 4000 not in edited
+    assert sorted(k for k, _, _ in base.diff(edited)) == [7, 4000, 9000]
+    assert base.set(3, base[3]) is base and base.delete(-1) is base
+    assert dict(PMap(edited.items()).items()) == dict(edited.items())
@@ -24,9 +24,7 @@ def test_add_student_and_payment(fresh_manager):
     assert len(hist) == 1 and hist[0]["amount"] == 120.0
 
 def test_check_in_success(fresh_manager):
-    alice = fresh_manager._student_by_id(1)
-    alice["enrolled_course_ids"].append(1)
-    fresh_manager._save_data()
+    assert fresh_manager.enroll_student(1, 1) is True
     assert fresh_manager.check_in(1, 1) is True
     assert len(fresh_manager.attendance) == 1
 
@@ -36,3 +34,446 @@ def test_export_reports_empty_ok(fresh_manager, tmp_path):
     assert fresh_manager.export_report("payments", str(p_csv)) is True
     assert fresh_manager.export_report("attendance", str(a_csv)) is True
     assert p_csv.exists() and a_csv.exists()
+
+def test_journal_replays_mutations_after_restart(tmp_path):
+    path = tmp_path / "journal_data.json"
+    m = ScheduleManager(data_path=str(path), journal=True)
+    t = m.add_teacher("Ms. Chen", "chen@mail.com")
+    s = m.add_student("Bob", "bob@mail.com", [])
+    assert m.record_payment(s["id"], 50.0, "Cash") is True
+    # snapshot untouched since creation; mutations live only in the journal
+    assert json.loads(path.read_text())["students"] == []
+    assert len((tmp_path / "journal_data.json.journal").read_text().splitlines()) == 3
+
+    again = ScheduleManager(data_path=str(path), journal=True)
+    assert again.teachers == [t] and again.students == [s]
+    assert again.get_payment_history(s["id"])[0]["amount"] == 50.0
+
+def test_journal_drops_torn_tail_before_new_appends(tmp_path):
+    path = tmp_path / "journal_data.json"
+    m = ScheduleManager(data_path=str(path), journal=True)
+    m.add_student("A", "a@mail.com")
+    m.close()
+    journal = tmp_path / "journal_data.json.journal"
+    with journal.open("a") as f:
+        f.write('{"seq":2,"op":"add_stu')        # crash mid-write
+    after_crash = ScheduleManager(data_path=str(path), journal=True)
+    after_crash.add_student("B", "b@mail.com")
+    after_crash.close()
+    assert [s["name"] for s in ScheduleManager(data_path=str(path), journal=True).students] == ["A", "B"]
+
+def test_journal_compacts_into_snapshot(tmp_path):
+    path = tmp_path / "journal_data.json"
+    m = ScheduleManager(data_path=str(path), journal=True, compact_every=2)
+    m.add_student("A", "a@mail.com")
+    m.add_student("B", "b@mail.com")
+    assert len(json.loads(path.read_text())["students"]) == 2
+    assert (tmp_path / "journal_data.json.journal").read_text() == ""
+    m.add_student("C", "c@mail.com")
+    assert [s["name"] for s in ScheduleManager(data_path=str(path), journal=True).students] == ["A", "B", "C"]
+
+def test_id_indexes_follow_adds_and_reload(fresh_manager):
+    s = fresh_manager.add_student("Bob", "bob@mail.com", [1])
+    assert fresh_manager._student_by_id(s["id"]) is s
+    c = fresh_manager.add_course("Guitar Basics", 1)
+    assert fresh_manager._course_by_id(c["id"]) is c
+    with pytest.raises(ValueError):
+        fresh_manager.add_course("Orphan", 99)
+    reloaded = ScheduleManager(data_path=fresh_manager.data_path)
+    assert reloaded.get_student(s["id"])["name"] == "Bob"
+    assert reloaded.get_course(c["id"])["title"] == "Guitar Basics"
+
+def test_ids_are_not_reused_and_survive_restart(fresh_manager):
+    s = fresh_manager.add_student("Bob", "bob@mail.com")
+    # drop the newest student by hand; the counter must not hand its id out again
+    fresh_manager.students.remove(s)
+    fresh_manager._save_data()
+    reloaded = ScheduleManager(data_path=fresh_manager.data_path)
+    assert reloaded.add_student("Cara", "cara@mail.com")["id"] == s["id"] + 1
+    block = reloaded._ids.reserve("student", 3)
+    assert list(block) == [s["id"] + 2, s["id"] + 3, s["id"] + 4]
+    assert reloaded.add_student("Dan", "dan@mail.com")["id"] == s["id"] + 5
+
+def test_bulk_import_csv_and_jsonl_single_save(fresh_manager, tmp_path):
+    students_csv = tmp_path / "students.csv"
+    students_csv.write_text("id,name,email\n50,Cara,cara@mail.com\n,Dan,dan@mail.com\n")
+    courses = tmp_path / "courses.jsonl"
+    courses.write_text('{"title": "Drums", "teacher_id": 1}\n')
+    counts = fresh_manager.bulk_import(
+        students=str(students_csv),
+        courses=str(courses),
+        enrollments=[{"student_id": "50", "course_id": 1}],
+    )
+    assert counts == {"students": 2, "teachers": 0, "courses": 1, "enrollments": 1}
+    assert fresh_manager._student_by_id(50)["enrolled_course_ids"] == [1]
+    assert fresh_manager._student_by_id(51)["name"] == "Dan"
+    reloaded = ScheduleManager(data_path=fresh_manager.data_path)
+    assert len(reloaded.students) == 3 and len(reloaded.courses) == 2
+
+def test_bulk_import_is_all_or_nothing(fresh_manager):
+    with pytest.raises(ValueError, match="course 7"):
+        fresh_manager.bulk_import(students=[{"name": "Eve", "email": "e@mail.com"}],
+                                  enrollments=[{"student_id": 1, "course_id": 7}])
+    assert len(fresh_manager.students) == 1
+    # the failed batch's reserved id is handed out again
+    assert fresh_manager.add_student("Eve", "e@mail.com")["id"] == 2
+
+def test_export_report_filters_and_gzip_to_file_like(fresh_manager):
+    import gzip, io
+    fresh_manager.finance_log.extend([
+        {"student_id": 1, "amount": 10.0, "method": "Cash", "timestamp": "2025-01-31T09:00:00"},
+        {"student_id": 1, "amount": 20.0, "method": "Card", "timestamp": "2025-02-10T09:00:00"},
+        {"student_id": 2, "amount": 30.0, "method": "cash", "timestamp": "2025-02-11T09:00:00"},
+        {"student_id": 1, "amount": 40.0, "method": "Cash", "timestamp": "2025-03-01T00:00:00"},
+    ])
+    rows = list(fresh_manager.iter_report_rows("payments", start="2025-02-01", end="2025-03-01", method="CASH"))
+    assert [r["amount"] for r in rows] == [30.0]
+    # payments carry no course_id; the filter does not apply to them
+    assert len(list(fresh_manager.iter_report_rows("payments", course_id=1, student_id=1))) == 3
+
+    buf = io.BytesIO()
+    assert fresh_manager.export_report("payments", buf, student_id=1, compress=True) is True
+    lines = gzip.decompress(buf.getvalue()).decode("utf-8").splitlines()
+    assert lines[0] == "student_id,amount,method,timestamp" and len(lines) == 4
+
+    text = io.StringIO()
+    assert fresh_manager.export_report("payments", text, end="2025-02-01") is True
+    assert text.getvalue().splitlines()[1].startswith("1,10.0,Cash")
+    assert fresh_manager.export_report("bogus", text) is False
+
+def test_payment_index_and_running_totals(fresh_manager):
+    m = fresh_manager
+    m.record_payment(1, 100.0, "Card")
+    m.record_payment(1, 25.5, "Cash")
+    # a back-dated row loaded from disk still lands in timestamp order
+    m.finance_log.append({"student_id": 1, "amount": 5.0, "method": "Cash", "timestamp": "2000-01-01T00:00:00"})
+    m._save_data()
+    reloaded = ScheduleManager(data_path=m.data_path)
+    hist = reloaded.get_payment_history(1)
+    assert [p["amount"] for p in hist][-1] == 5.0 and len(hist) == 3
+    assert reloaded.get_balance(1) == 130.5 and reloaded.get_balance(99) == 0.0
+    assert reloaded.get_totals_by_method() == {"Card": 100.0, "Cash": 30.5}
+
+def test_attendance_range_queries_and_course_stats(fresh_manager):
+    from datetime import date
+    m = fresh_manager
+    m.attendance.extend([
+        {"student_id": 1, "course_id": 1, "timestamp": "2025-03-03T10:00:00"},
+        {"student_id": 2, "course_id": 1, "timestamp": "2025-03-03T10:05:00"},
+        {"student_id": 1, "course_id": 2, "timestamp": "2025-03-04T11:00:00"},
+        {"student_id": 1, "course_id": 1, "timestamp": "2025-03-10T10:00:00"},
+    ])
+    m._save_data()
+    m = ScheduleManager(data_path=m.data_path)
+    assert len(m.attendance_between("2025-03-03", "2025-03-05")) == 3
+    assert len(m.attendance_between(date(2025, 3, 3), date(2025, 3, 11), course_id=1)) == 3
+    assert m.attendance_between("2025-03-04", None, course_id=1, student_id=1)[0]["timestamp"] == "2025-03-10T10:00:00"
+    assert m.attendance_between("2025-03-03T10:01:00", "2025-03-04", course_id=1)[0]["student_id"] == 2
+
+    m.enroll_student(1, 1)
+    m.check_in(1, 1)
+    stats = m.course_attendance_stats(1)[0]
+    assert stats["checkins"] == 4 and stats["sessions"] == 3 and stats["students"] == 2
+    assert stats["rate"] == round(4 / 6, 4)
+
+def test_sqlite_backend_roundtrip_and_migration(fresh_manager, tmp_path):
+    from app.storage import migrate_json_to_sqlite
+    fresh_manager.record_payment(1, 15.0, "Cash")
+    db = tmp_path / "msms.db"
+    assert migrate_json_to_sqlite(fresh_manager.data_path, str(db))["finance_log"] == 1
+    with pytest.raises(ValueError):
+        migrate_json_to_sqlite(fresh_manager.data_path, str(db))
+
+    m = ScheduleManager(data_path=str(db))
+    s = m.add_student("Bob", "bob@mail.com", [1])
+    assert m.check_in(s["id"], 1) is True
+    m.bulk_import(students=[{"name": "Cara", "email": "c@mail.com"}])
+    m._db.close()
+
+    again = ScheduleManager(data_path=str(db))
+    assert [x["name"] for x in again.students] == ["Alice Johnson", "Bob", "Cara"]
+    assert again.get_balance(1) == 15.0 and len(again.attendance) == 1
+    assert again.add_teacher("Ms. Chen", "chen@mail.com")["id"] == 2
+
+def test_save_is_atomic_and_load_falls_back_to_previous_generation(fresh_manager):
+    from pathlib import Path
+    from app.persistence import previous_generation
+    fresh_manager.add_student("Bob", "bob@mail.com")
+    fresh_manager.add_student("Cara", "cara@mail.com")
+    live = Path(fresh_manager.data_path)
+    assert len(json.loads(previous_generation(live).read_text())["students"]) == 2
+    live.write_text('{"students": [')          # simulate a torn write
+    recovered = ScheduleManager(data_path=str(live))
+    assert [s["name"] for s in recovered.students] == ["Alice Johnson", "Bob"]
+    assert not list(live.parent.glob("*.tmp"))
+
+def test_pst2_moves_aside_a_corrupt_previous_generation_when_the_live_file_is_gone(tmp_path):
+    import pst2_main
+    from app.persistence import previous_generation
+    live = tmp_path / "x.json"
+    previous_generation(live).write_text('{bad')
+    pst2_main.load_data(str(live))
+    assert [s["name"] for s in pst2_main.app_data["students"]] == ["Alice Smith", "Bob Johnson"]
+    assert not previous_generation(live).exists() and not live.exists()
+    assert [p.name for p in tmp_path.glob("x.json.prev.corrupt-*")]
+
+def test_repair_under_a_running_manager_survives_its_next_save(fresh_manager):
+    from app.integrity import repair_file
+    m = fresh_manager
+    m.add_student("Bob", "bob@mail.com")
+    path = m.data_path
+    # someone hand-edits the file without bumping its version, leaving a dangling link
+    doc = json.loads(open(path).read())
+    doc["students"].append({"id": 50, "name": "Dan", "email": "d@mail.com", "enrolled_course_ids": [9]})
+    open(path, "w").write(json.dumps(doc))
+    assert repair_file(path) == ["student 50 lists unknown course 9"]
+    m.add_student("Cara", "cara@mail.com")
+
+    saved = json.loads(open(path).read())
+    assert [(s["name"], s["enrolled_course_ids"]) for s in saved["students"]] == \
+        [("Alice Johnson", []), ("Bob", []), ("Dan", []), ("Cara", [])]
+    assert saved["version"] == doc["version"] + 2
+
+def test_student_search_ranks_prefix_substring_and_typos(fresh_manager):
+    m = fresh_manager
+    m.add_student("Alicia Keys", "keys@mail.com")
+    bob = m.add_student("Bob Alison", "bob@mail.com")
+    assert [s["name"] for s in m.search_students("ali")] == ["Alice Johnson", "Alicia Keys", "Bob Alison"]
+    assert m.search_students("johnsno")[0]["name"] == "Alice Johnson"     # transposed letters
+    assert m.search_students("lison") == [bob]                             # substring
+    assert m.search_students(str(bob["id"]))[0] is bob
+    m.bulk_import(students=[{"name": "Zed Alison", "email": "z@mail.com"}])
+    assert [s["name"] for s in m.search_students("alison")] == ["Bob Alison", "Zed Alison"]
+
+def test_lesson_conflicts_by_room_and_teacher(fresh_manager, tmp_path):
+    m = fresh_manager
+    t2 = m.add_teacher("Ms. Lee", "lee@mail.com")
+    other = m.add_course("Guitar", t2["id"])
+    first = m.add_lesson(1, "Monday", "16:00", room="Room A")
+    assert m.find_conflicts(other["id"], "Monday", "16:30", room="Room A")[0]["kind"] == "room"
+    assert m.find_conflicts(other["id"], "Monday", "17:00", room="Room A") == []
+    assert m.find_conflicts(1, "Monday", "16:45", room="Room B")[0]["kind"] == "teacher"
+    with pytest.raises(ValueError):
+        m.add_lesson(other["id"], "Monday", "15:30", room="Room A", duration=45)
+    m.add_lesson(other["id"], "Monday", "17:00", room="Room A")
+    assert m.audit_conflicts() == []
+
+    # bad data already on disk shows up in the audit after a reload
+    m._course_by_id(other["id"])["lessons"].append({"day": "Monday", "start_time": "15:30", "room": "Room A"})
+    m._save_data()
+    again = ScheduleManager(data_path=m.data_path)
+    assert [(c["kind"], c["course_id"], c["other_course_id"]) for c in again.audit_conflicts()] == [
+        ("room", other["id"], 1)]
+    assert again.add_lesson(1, "Tuesday", "09:00")["lesson_id"] == first["lesson_id"] + 2
+
+def test_compact_save_pretty_export_and_section_streaming(fresh_manager, tmp_path):
+    from app.serialization import iter_section
+    m = fresh_manager
+    m.record_payment(1, 10.0, "Card")
+    m.record_payment(1, 5.5, "Cash")
+    raw = open(m.data_path, encoding="utf-8").read()
+    assert "\n" not in raw and json.loads(raw)["finance_log"][1]["amount"] == 5.5
+
+    out = tmp_path / "export.json"
+    m.export_json(out)
+    assert out.read_text().count("\n") > 10 and json.loads(out.read_text())["students"] == m.students
+
+    for chunk in (1, 7, 1 << 20):
+        amounts = [p["amount"] for p in iter_section(m.data_path, "finance_log", chunk_size=chunk)]
+        assert amounts == [10.0, 5.5]
+    assert list(iter_section(m.data_path, "attendance")) == []
+    assert list(iter_section(m.data_path, "no_such_section")) == []
+
+def test_enrollment_relation_journal_and_repair(tmp_path):
+    from app.integrity import audit_document, repair_file
+    path = tmp_path / "msms.json"
+    path.write_text(json.dumps({
+        "students": [{"id": 1, "name": "Ann", "enrolled_course_ids": [1, 1, 9]},
+                     {"id": 2, "name": "Ben", "enrolled_course_ids": []}],
+        "teachers": [{"id": 1, "name": "T"}],
+        "courses": [{"id": 1, "title": "Piano", "teacher_id": 1, "enrolled_student_ids": [2]},
+                    {"id": 2, "title": "Drums", "teacher_id": 7, "enrolled_student_ids": []}],
+    }))
+    problems = repair_file(path, dry_run=True)
+    assert len(problems) == 5 and "course 2 has unknown teacher 7" in problems
+    repair_file(path)
+    doc = json.loads(path.read_text())
+    assert [s["enrolled_course_ids"] for s in doc["students"]] == [[1], [1]]
+    assert doc["courses"][0]["enrolled_student_ids"] == [2, 1]
+    assert audit_document(doc) == ["course 2 has unknown teacher 7"]
+
+    assert doc["version"] == 1
+
+    m = ScheduleManager(data_path=str(path), journal=True)
+    assert m.enroll_student(1, 2) is True and m.enroll_student(1, 2) is False
+    with pytest.raises(ValueError):
+        m.enroll_student(3, 1)
+    m.close()
+    again = ScheduleManager(data_path=str(path), journal=True)
+    assert again._student_by_id(1)["enrolled_course_ids"] == [1, 2]
+    assert [s["id"] for s in again.students_in_course(2)] == [1]
+    assert again.check_in(1, 2) is True
+
+def test_check_in_many_validates_then_saves_once(fresh_manager, monkeypatch):
+    m = fresh_manager
+    ids = [m.add_student(f"S{i}", f"s{i}@mail.com", [1])["id"] for i in range(30)]
+    saves = []
+    real_save = m._save_data
+    monkeypatch.setattr(m, "_save_data", lambda: (saves.append(1), real_save()))
+
+    with pytest.raises(ValueError):
+        m.check_in_many(1, [(ids[0], "present"), (1, "present")])     # Alice is not enrolled
+    with pytest.raises(ValueError):
+        m.check_in_many(1, [(ids[0], "asleep")])
+    assert m.attendance == [] and saves == []
+
+    marks = [(sid, "absent" if i % 10 == 0 else "present") for i, sid in enumerate(ids)]
+    assert m.check_in_many(1, marks, timestamp="2025-03-03T16:00:00") == 30
+    assert len(saves) == 1
+    stats = m.course_attendance_stats(1)[0]
+    assert stats["checkins"] == 27 and stats["absences"] == 3 and stats["students"] == 27
+
+    again = ScheduleManager(data_path=m.data_path)
+    assert len(again.attendance_between("2025-03-03", "2025-03-04", course_id=1)) == 30
+    assert again.attendance[0]["status"] == "absent"
+
+def test_check_in_many_replays_from_journal(tmp_path):
+    path = tmp_path / "j.json"
+    m = ScheduleManager(data_path=str(path), journal=True)
+    t = m.add_teacher("T", "t@mail.com")
+    c = m.add_course("Choir", t["id"])
+    sids = [m.add_student(f"S{i}", "", [c["id"]])["id"] for i in range(5)]
+    m.check_in_many(c["id"], [(sid, "late") for sid in sids])
+    m.close()
+    again = ScheduleManager(data_path=str(path), journal=True)
+    assert [a["status"] for a in again.attendance] == ["late"] * 5
+
+def test_synthetic_data_is_reproducible_and_consistent(tmp_path):
+    from app.integrity import audit_document
+    from benchmarks.synthetic import generate
+    doc = generate(200, seed=3, checkins_per_student=2, payments_per_student=1)
+    assert doc == generate(200, seed=3, checkins_per_student=2, payments_per_student=1)
+    assert audit_document(json.loads(json.dumps(doc))) == []
+    path = tmp_path / "synthetic.json"
+    path.write_text(json.dumps(doc))
+    m = ScheduleManager(data_path=str(path))
+    assert len(m.students) == 200 and len(m.attendance) == 400
+    assert m.find_conflicts(1, "Saturday", "09:00") == []
+
+def test_operations_are_counted_and_timed(fresh_manager, tmp_path):
+    from app.metrics import METRICS, Metrics
+    before = METRICS.snapshot().get("schedule.check_in", {}).get("calls", 0)
+    s = fresh_manager.add_student("Bob", "", [1])
+    fresh_manager.check_in(s["id"], 1)
+    fresh_manager.check_in(1, 1)                                  # not enrolled: counted, returns False
+    fresh_manager.export_report("attendance", str(tmp_path / "a.csv"))
+    snap = METRICS.snapshot()
+    assert snap["schedule.check_in"]["calls"] == before + 2
+    assert snap["schedule.save"]["sampled"] >= 1 and snap["schedule.export_report"]["max_ms"] > 0
+    assert 'msms_operation_calls_total{op="schedule.check_in"}' in METRICS.prometheus_text()
+
+    local = Metrics()
+    hot = local.timed("hot", sample_every=4)(lambda x: x)
+    for i in range(8):
+        hot(i)
+    boom = local.timed("boom")(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        boom()
+    snap = local.snapshot()
+    assert snap["hot"]["calls"] == 8 and snap["hot"]["sampled"] == 2
+    assert snap["boom"]["errors"] == 1
+    text = local.prometheus_text()
+    assert 'msms_operation_latency_seconds_bucket{op="hot",le="+Inf"} 2' in text
+    local.reset()
+    hot(0)
+    assert local.snapshot()["hot"]["calls"] == 1
+
+def test_async_json_logging_flushes_on_shutdown(fresh_manager, tmp_path, monkeypatch):
+    import logging
+    from logging.handlers import QueueHandler
+    from app.admin_utils import init_logger, shutdown_logger
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", [])
+    monkeypatch.setattr(root, "level", root.level)
+    log_file = tmp_path / "msms.log"
+    init_logger(str(log_file), async_mode=True, json_lines=True)
+    assert [isinstance(h, QueueHandler) for h in root.handlers] == [True]     # callers never touch the file
+
+    s = fresh_manager.add_student("Bob", "bob@mail.com", [])
+    fresh_manager.record_payment(s["id"], 25.0, "Card")
+    logging.info("tagged", extra={"student_id": s["id"]})
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logging.exception("boom")
+    shutdown_logger()
+    assert root.handlers == []
+
+    lines = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+    msgs = [line["msg"] for line in lines]
+    assert any(m.startswith("Added student: {'id': 2") for m in msgs)
+    assert any(m.startswith("Payment recorded:") for m in msgs)
+    tagged = next(line for line in lines if line["msg"] == "tagged")
+    assert tagged["student_id"] == 2 and tagged["level"] == "INFO"
+    boom = next(line for line in lines if line["level"] == "ERROR")
+    assert boom["msg"] == "boom" and "ZeroDivisionError" in boom["exc"]
+
+def test_backups_are_incremental_deduplicated_and_restorable(tmp_path):
+    import os
+    from datetime import datetime, timedelta
+    from app.admin_utils import backup_data
+    from app.backups import BackupStore, iter_chunks
+    from benchmarks.synthetic import generate
+
+    data = tmp_path / "msms.json"
+    doc = generate(1000, seed=1, checkins_per_student=5)
+    data.write_text(json.dumps(doc))
+    original = data.read_bytes()
+    assert b"".join(iter_chunks(original)) == original
+
+    store = BackupStore(tmp_path / "backups")
+    first = backup_data(str(data), str(store.root))
+    assert first and backup_data(str(data), str(store.root)) == first      # unchanged: nothing new
+    chunks_before = len(list(store.chunk_dir.glob("*/*")))
+
+    doc["attendance"].append({"student_id": 1, "course_id": 1, "timestamp": "2025-04-01T10:00:00"})
+    data.write_text(json.dumps(doc))
+    second = backup_data(str(data), str(store.root))
+    assert second != first
+    added = len(list(store.chunk_dir.glob("*/*"))) - chunks_before
+    assert 1 <= added <= 2                                      # only the tail of the file changed
+    assert sum(p.stat().st_size for p in store.chunk_dir.glob("*/*")) < len(original)
+
+    assert store.restore(tmp_path / "restored.json", first) == first
+    assert (tmp_path / "restored.json").read_bytes() == original
+    assert store.read() == data.read_bytes()
+
+    # retention: twice-daily snapshots over three weeks collapse to hourly/daily/weekly keepers
+    old = BackupStore(tmp_path / "old")
+    start = datetime(2025, 3, 1)
+    for h in range(0, 21 * 24, 12):
+        data.write_text(json.dumps({"tick": h}))
+        os.utime(data, ns=(h * 10**9, h * 10**9))
+        old.snapshot(data, now=start + timedelta(hours=h))
+    now = start + timedelta(days=21)
+    dropped = old.prune(last=2, hourly=12, daily=3, weekly=2, now=now)
+    kept = [s["id"] for s in old.snapshots()]
+    assert len(kept) + len(dropped) == 42 and len(kept) < 10
+    assert kept[-1] == (now - timedelta(hours=12)).strftime("%Y%m%d_%H%M%S_%f")
+    used = {d for s in old.snapshots() for d in s["chunks"]}
+    assert {p.name for p in old.chunk_dir.glob("*/*")} == used
+    assert old.restore(tmp_path / "r2.json", now - timedelta(days=10)) == "20250309_120000_000000"   # weekly keeper
+    assert json.loads((tmp_path / "r2.json").read_text()) == {"tick": 8 * 24 + 12}
+
+def test_prune_waits_for_a_backup_in_another_process(tmp_path):
+    from app.backups import BackupStore
+    import threading
+    from app.locking import FileLock
+    store = BackupStore(tmp_path / "backups")
+    pruned = threading.Event()
+    with FileLock(tmp_path / "backups" / "store"):      # what a running snapshot holds
+        t = threading.Thread(target=lambda: (store.prune(last=1), pruned.set()))
+        t.start()
+        assert not pruned.wait(0.3)
+    assert pruned.wait(5)
+    t.join()
@@ -0,0 +1,151 @@
+import json
+import multiprocessing
+import threading
+import pytest
+from app.schedule import ScheduleManager
+from app.shared import SharedManager
+
+def _seed(path):
+    path.write_text(json.dumps({
+        "students": [{"id": 1, "name": "Alice Johnson", "email": "a@mail.com", "enrolled_course_ids": []}],
+        "teachers": [], "courses": [], "attendance": [], "finance_log": [],
+    }))
+
+def test_sessions_share_one_loaded_manager(tmp_path):
+    path = tmp_path / "shared.json"
+    _seed(path)
+    shared = SharedManager(lambda: ScheduleManager(data_path=str(path)))
+    tab1, tab2 = shared.view(), shared.view()
+    s = tab1.add_student("Bob", "bob@mail.com")
+    assert tab2.get_student(s["id"])["name"] == "Bob"
+    assert shared.refresh() is False            # our own save is not an outside change
+
+def test_outside_write_invalidates_and_reloads(tmp_path):
+    path = tmp_path / "shared.json"
+    _seed(path)
+    shared = SharedManager(lambda: ScheduleManager(data_path=str(path)))
+    other_process = ScheduleManager(data_path=str(path))
+    other_process.add_student("Cara", "cara@mail.com")
+    view = shared.view()
+    assert shared.reloads == 1
+    assert [x["name"] for x in view.students] == ["Alice Johnson", "Cara"]
+
+def test_concurrent_writers_through_views_lose_nothing(tmp_path):
+    path = tmp_path / "shared.json"
+    _seed(path)
+    shared = SharedManager(lambda: ScheduleManager(data_path=str(path)))
+
+    def desk():
+        view = shared.view()
+        for _ in range(10):
+            view.record_payment(1, 1.0, "Cash")
+            view.get_payment_history(1)
+
+    threads = [threading.Thread(target=desk) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert shared.view().get_balance(1) == 80.0
+    assert len(ScheduleManager(data_path=str(path)).finance_log) == 80
+
+def _front_desk(path, desk, n, write_behind):
+    m = ScheduleManager(data_path=path, write_behind=write_behind, save_interval_ms=5)
+    for i in range(n):
+        s = m.add_student(f"p{desk}-{i}", "desk@mail.com", enrolled_course_ids=[1])
+        m.check_in(s["id"], 1)
+        m.record_payment(s["id"], desk * 1000 + i + 1, "Cash")
+        if i % 3 == 0:
+            # every desk tries the same explicit ids; whoever claims one first keeps it
+            try:
+                m.bulk_import(students=[{"id": 500 + i, "name": f"x{desk}-{i}", "email": "x@mail.com"}])
+            except ValueError as e:
+                assert "already" in str(e)      # reserved by another desk, or saved by it already
+    m.close()
+
+def test_processes_saving_the_same_file_lose_no_updates(tmp_path):
+    path = tmp_path / "shared.json"
+    path.write_text(json.dumps({
+        "students": [], "teachers": [{"id": 1, "name": "T", "email": "t@mail.com"}],
+        "courses": [{"id": 1, "title": "Piano", "teacher_id": 1}], "attendance": [], "finance_log": [],
+    }))
+    desks, n = 4, 15
+    procs = [multiprocessing.Process(target=_front_desk, args=(str(path), d, n, d % 2 == 1)) for d in range(desks)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+
+    m = ScheduleManager(data_path=str(path))
+    ids = [s["id"] for s in m.students]
+    imported = {s["id"]: s["name"] for s in m.students if s["name"].startswith("x")}
+    assert len(ids) == len(set(ids)) == desks * n + len(imported)
+    assert imported and all(500 <= sid < 500 + n for sid in imported)
+    assert {s["name"] for s in m.students} - set(imported.values()) == \
+        {f"p{d}-{i}" for d in range(desks) for i in range(n)}
+    # every payment and check-in landed on the student that made it
+    owner = {s["id"]: s["name"] for s in m.students}
+    assert sorted((owner[e["student_id"]], e["amount"]) for e in m.finance_log) == \
+        sorted((f"p{d}-{i}", d * 1000 + i + 1) for d in range(desks) for i in range(n))
+    assert sorted(owner[a["student_id"]] for a in m.attendance) == sorted(set(owner.values()) - set(imported.values()))
+    assert set(m.courses[0]["enrolled_student_ids"]) == set(ids) - set(imported)
+    assert json.loads(path.read_text())["version"] > 0
+
+def test_ids_handed_out_before_another_process_saves_stay_put(tmp_path):
+    path = tmp_path / "shared.json"
+    _seed(path)
+    a = ScheduleManager(data_path=str(path), write_behind=True, save_interval_ms=60_000)
+    b = ScheduleManager(data_path=str(path))
+    ann = a.add_student("Ann", "ann@mail.com")          # not saved yet
+    bob = b.add_student("Bob", "bob@mail.com")          # saved first
+    assert ann["id"] != bob["id"]
+    a.record_payment(ann["id"], 25.0, "Cash")
+    a.flush()                                           # merges b's save, then writes
+    a.close()
+
+    m = ScheduleManager(data_path=str(path))
+    assert {s["name"]: s["id"] for s in m.students} == {"Alice Johnson": 1, "Ann": ann["id"], "Bob": bob["id"]}
+    assert [(e["student_id"], e["amount"]) for e in m.finance_log] == [(ann["id"], 25.0)]
+
+def test_explicit_import_ids_are_reserved_across_processes(tmp_path):
+    path = tmp_path / "shared.json"
+    _seed(path)
+    a = ScheduleManager(data_path=str(path), write_behind=True, save_interval_ms=60_000)
+    b = ScheduleManager(data_path=str(path))
+    ann = a.add_student("Ann", "ann@mail.com")          # reserved, not saved yet
+    with pytest.raises(ValueError, match="already reserved"):
+        b.bulk_import(students=[{"id": ann["id"], "name": "Imp", "email": "i@mail.com"}])
+    b.bulk_import(students=[{"id": 40, "name": "Imp", "email": "i@mail.com"}])
+    assert a.add_student("Bea", "bea@mail.com")["id"] == 41
+    a.close()
+    assert sorted(s["id"] for s in ScheduleManager(data_path=str(path)).students) == [1, ann["id"], 40, 41]
+
+def _pst2_desk(path, desk, n):
+    import pst2_main
+    pst2_main.load_data(path)
+    for i in range(n):
+        pst2_main.add_teacher(f"t{desk}-{i}", "Piano")
+        pst2_main.check_in(1, f"desk{desk}-{i}")
+        pst2_main.save_data(path)
+
+def test_pst2_sessions_merge_their_saves(tmp_path):
+    path = tmp_path / "pst2.json"
+    path.write_text(json.dumps({
+        "students": [{"id": 1, "name": "Alice Smith", "enrolled_in": []}],
+        "teachers": [{"id": 1, "name": "Mr. Taylor", "speciality": "Piano"}],
+        "attendance": [], "next_student_id": 2, "next_teacher_id": 2,
+    }))
+    desks, n = 3, 10
+    procs = [multiprocessing.Process(target=_pst2_desk, args=(str(path), d, n)) for d in range(desks)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+
+    data = json.loads(path.read_text())
+    ids = [t["id"] for t in data["teachers"]]
+    assert len(ids) == len(set(ids)) == desks * n + 1
+    assert sorted(a["course_id"] for a in data["attendance"]) == sorted(f"desk{d}-{i}" for d in range(desks) for i in range(n))
+    assert data["version"] == desks * n
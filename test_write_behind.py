@@ -0,0 +1,77 @@
+import json
+import threading
+import time
+import pytest
+from app.schedule import ScheduleManager
+from app.write_behind import WriteBehind
+
+def test_burst_is_coalesced_into_one_save():
+    calls = []
+    wb = WriteBehind(lambda: calls.append(time.monotonic()), interval_ms=50, max_pending=1000)
+    for _ in range(200):
+        wb.mark_dirty()
+    time.sleep(0.3)
+    assert len(calls) == 1 and wb.pending == 0
+    wb.close()
+
+def test_max_pending_triggers_early_save():
+    saved = threading.Event()
+    wb = WriteBehind(saved.set, interval_ms=60_000, max_pending=5)
+    for _ in range(5):
+        wb.mark_dirty()
+    assert saved.wait(2.0)
+    wb.close()
+
+def test_flush_and_close_save_synchronously_and_failures_retry():
+    attempts = []
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+    wb = WriteBehind(flaky, interval_ms=60_000, max_pending=1000)
+    wb.mark_dirty()
+    with pytest.raises(OSError):
+        wb.flush()                  # fails, changes stay pending
+    assert wb.pending == 1 and wb.saves == 0
+    wb.close()                      # final flush succeeds
+    assert wb.pending == 0 and wb.saves == 1
+    with pytest.raises(RuntimeError):
+        wb.mark_dirty()
+
+def test_close_surfaces_a_failed_final_save():
+    def broken():
+        raise OSError("read-only file system")
+    wb = WriteBehind(broken, interval_ms=60_000, max_pending=1000)
+    wb.mark_dirty()
+    with pytest.raises(OSError):
+        wb.close()
+    assert wb.pending == 1
+
+def test_manager_write_behind_defers_and_flushes(tmp_path):
+    path = tmp_path / "wb.json"
+    m = ScheduleManager(data_path=str(path), write_behind=True, save_interval_ms=60_000)
+    s = m.add_student("Bob", "bob@mail.com")
+    for _ in range(10):
+        m.record_payment(s["id"], 5.0, "Cash")
+    assert json.loads(path.read_text())["finance_log"] == []
+    m.flush()
+    assert len(json.loads(path.read_text())["finance_log"]) == 10
+    m.close()
+    assert ScheduleManager(data_path=str(path)).get_balance(s["id"]) == 50.0
+
+def test_bulk_import_during_background_saves_does_not_deadlock(tmp_path):
+    path = tmp_path / "wb.json"
+    m = ScheduleManager(data_path=str(path), write_behind=True, save_interval_ms=1)
+    m.add_teacher("Ms. Chen", "chen@mail.com")
+    done = threading.Event()
+
+    def importer():
+        for batch in range(3):
+            m.bulk_import(students=[{"name": f"S{batch}-{i}", "email": "s@mail.com"} for i in range(2000)])
+        done.set()
+
+    t = threading.Thread(target=importer, daemon=True)
+    t.start()
+    assert done.wait(60), "bulk_import and the background saver deadlocked"
+    m.close()
+    assert len(ScheduleManager(data_path=str(path)).students) == 6000